@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+'''
+    decoders
+    --------
+
+    Benchmark of JSON decoders usable as `json_decoder` of the clients,
+    on `local/chain/blocks-after` payloads from `bench/payloads`.
+
+    Usage: python bench/decoders.py [--number N] [payload.json ...]
+'''
+
+import argparse
+import glob
+import importlib
+import json
+import os
+import timeit
+
+PAYLOADS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'payloads')
+
+
+def decoders():
+    """
+    Gets installed JSON decoders by name, stdlib `json` is always present.
+    """
+    found = [('json', json.loads)]
+    for name in ('orjson', 'simdjson', 'ujson'):
+        try:
+            found.append((name, importlib.import_module(name).loads))
+        except ImportError:
+            print('{0} is not installed, skipped'.format(name))
+    return found
+
+
+def bench(loads, content, number):
+    """
+    Gets the best time of decoding content `number` times, out of 5 runs.
+    """
+    return min(timeit.repeat(lambda: loads(content), number=number,
+                             repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('payloads', nargs='*',
+                        default=sorted(glob.glob(os.path.join(PAYLOADS,
+                                                              '*.json'))))
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    found = decoders()
+    for path in args.payloads:
+        with open(path, 'rb') as f:
+            content = f.read()
+        print('\n{0} ({1} KiB)'.format(os.path.basename(path),
+                                       len(content) // 1024))
+        baseline = None
+        for name, loads in found:
+            seconds = bench(loads, content, args.number)
+            baseline = baseline or seconds
+            print('  {0:<10} {1:9.1f} us  {2:8.1f} MiB/s  x{3:.2f}'.format(
+                name, seconds * 1e6, len(content) / seconds / 2 ** 20,
+                baseline / seconds))
+
+
+if __name__ == '__main__':
+    main()
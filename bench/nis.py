@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+'''
+    nis
+    ---
+
+    Stand-in NIS for the benchmarks, serving payloads recorded in
+    `bench/payloads` with configurable latency, jitter and error rate.
+
+    Serves `heartbeat`, `status`, `chain/height`, `local/chain/blocks-after`
+    (recorded blocks renumbered up to `--height`), `account/get`,
+    `account/transfers/*` (recorded transactions, `--transfers` of them per
+    account) and `transaction/announce`. Responses are assembled from
+    JSON serialized once at startup, so the server keeps up with clients
+    on the same machine.
+
+    Usage: python bench/nis.py [--port N] [--latency MS] [--jitter MS]
+           [--error-rate P] [--height N] [--transfers N]
+'''
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import random
+
+from aiohttp import web
+
+PAYLOADS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'payloads')
+
+# the same as `BLOCKS_AFTER_SIZE` and `TRANSFERS_PAGE_SIZE` of NIS
+BLOCKS_AFTER_SIZE = 10
+TRANSFERS_PAGE_SIZE = 25
+
+# placeholders in serialized payloads, replaced in each response
+_HEIGHT = '"@height@"'
+_HASH = '"@hash@"'
+_PREV = '"@prev@"'
+_ADDRESS = '"@address@"'
+
+
+def load(name):
+    """
+    Gets a recorded payload by file name.
+    """
+    with open(os.path.join(PAYLOADS, name), 'rb') as f:
+        return json.loads(f.read().decode('utf-8'))
+
+
+def _hash(height):
+    """
+    Gets a made up hash of the block at a height.
+    """
+    return '"{0:064x}"'.format(height)
+
+
+class NIS(object):
+    """
+    Recorded payloads and the settings of the server.
+    """
+
+    def __init__(self, height=1500000, transfers=10000, latency=0,
+                 jitter=0, error_rate=0, seed=0):
+        """
+        Initialize server state.
+        :param height: height of the chain.
+        :param transfers: number of transactions of every account.
+        :param latency: mean delay of responses in seconds.
+        :param jitter: standard deviation of the delay in seconds.
+        :param error_rate: share of requests answered with 503 error.
+        :param seed: seed of the random delays and errors.
+        """
+        self.height = height
+        self.transfers = transfers
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.announced = 0
+        blocks = load('blocks_after.json')['data']
+        self.blocks = []
+        for block in blocks:
+            block = copy.deepcopy(block)
+            block['block']['height'] = _HEIGHT[1:-1]
+            block['block']['prevBlockHash']['data'] = _PREV[1:-1]
+            block['hash'] = _HASH[1:-1]
+            self.blocks.append(json.dumps(block))
+        self.transactions = [json.dumps(tx['tx'])
+                             for block in blocks for tx in block['txes']]
+        account = load('account_get.json')
+        account['account']['address'] = _ADDRESS[1:-1]
+        self.account = json.dumps(account)
+
+    def blocks_after(self, height):
+        """
+        Gets JSON of the blocks after a height.
+        """
+        parts = []
+        for h in range(height + 1, min(height + BLOCKS_AFTER_SIZE,
+                                       self.height) + 1):
+            block = self.blocks[h % len(self.blocks)]
+            parts.append(block.replace(_HEIGHT, str(h))
+                         .replace(_PREV, _hash(h - 1))
+                         .replace(_HASH, _hash(h)))
+        return '{"data": [' + ', '.join(parts) + ']}'
+
+    def transfers_page(self, _id):
+        """
+        Gets JSON of the page of transactions up to an id, exclusive.
+        """
+        top = self.transfers if _id is None else min(_id - 1, self.transfers)
+        parts = []
+        for i in range(top, max(top - TRANSFERS_PAGE_SIZE, 0), -1):
+            parts.append(
+                '{{"meta": {{"innerHash": {{}}, "id": {0}, "hash": '
+                '{{"data": {1}}}, "height": {2}}}, "transaction": {3}}}'
+                .format(i, _hash(i), self.height - self.transfers + i,
+                        self.transactions[i % len(self.transactions)]))
+        return '{"data": [' + ', '.join(parts) + ']}'
+
+    def delay(self):
+        """
+        Gets the delay of the next response in seconds.
+        """
+        if not self.latency and not self.jitter:
+            return 0
+        return max(0, self.random.gauss(self.latency, self.jitter))
+
+    def failed(self):
+        """
+        Checks if the next request fails.
+        """
+        return self.error_rate and self.random.random() < self.error_rate
+
+
+def _json(text):
+    return web.Response(text=text, content_type='application/json')
+
+
+@web.middleware
+async def conditions(request, handler):
+    """
+    Delays responses and fails requests like a loaded node.
+    """
+    nis = request.app['nis']
+    delay = nis.delay()
+    if delay:
+        await asyncio.sleep(delay)
+    if nis.failed():
+        return web.json_response({'error': 'Service Unavailable',
+                                  'message': 'NIS is overloaded',
+                                  'status': 503}, status=503)
+    return await handler(request)
+
+
+async def heartbeat(request):
+    return _json('{"code": 1, "type": 2, "message": "ok"}')
+
+
+async def status(request):
+    return _json('{"code": 6, "type": 4, "message": "status"}')
+
+
+async def height(request):
+    return _json('{{"height": {0}}}'.format(request.app['nis'].height))
+
+
+async def blocks_after(request):
+    payload = await request.json()
+    return _json(request.app['nis'].blocks_after(payload['height']))
+
+
+async def account_get(request):
+    return _json(request.app['nis'].account.replace(
+        _ADDRESS, json.dumps(request.query.get('address', ''))))
+
+
+async def transfers(request):
+    _id = request.query.get('id')
+    return _json(request.app['nis'].transfers_page(
+        int(_id) if _id else None))
+
+
+async def announce(request):
+    await request.read()
+    nis = request.app['nis']
+    nis.announced += 1
+    return _json('{{"type": 1, "code": 1, "message": "SUCCESS", '
+                 '"transactionHash": {{"data": {0}}}, '
+                 '"innerTransactionHash": {{}}}}'.format(
+                     _hash(nis.announced)))
+
+
+def application(nis):
+    """
+    Gets the aiohttp application of the server.
+    :param nis: `NIS` with payloads and settings.
+    """
+    app = web.Application(middlewares=[conditions])
+    app['nis'] = nis
+    app.router.add_get('/heartbeat', heartbeat)
+    app.router.add_get('/status', status)
+    app.router.add_get('/chain/height', height)
+    app.router.add_post('/local/chain/blocks-after', blocks_after)
+    app.router.add_get('/account/get', account_get)
+    for kind in ('incoming', 'outgoing', 'all'):
+        app.router.add_get('/account/transfers/' + kind, transfers)
+    app.router.add_post('/transaction/announce', announce)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7891)
+    parser.add_argument('--latency', type=float, default=0,
+                        help='mean delay of responses in milliseconds')
+    parser.add_argument('--jitter', type=float, default=0,
+                        help='standard deviation of the delay in ms')
+    parser.add_argument('--error-rate', type=float, default=0,
+                        help='share of requests answered with 503 error')
+    parser.add_argument('--height', type=int, default=1500000)
+    parser.add_argument('--transfers', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    nis = NIS(args.height, args.transfers, args.latency / 1000.0,
+              args.jitter / 1000.0, args.error_rate, args.seed)
+    web.run_app(application(nis), host=args.host, port=args.port,
+                print=None, access_log=None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+'''
+    overhead
+    --------
+
+    Micro-benchmark of the per-call overhead of `Client`: time a call
+    spends in the client before and after its HTTP request. The session
+    of the client answers requests at once with a prepared response, so
+    only the pure Python path of the call is measured.
+
+    Usage: python bench/overhead.py [--number N]
+'''
+
+import argparse
+import timeit
+
+import requests
+from nemnis import Client, Metrics
+
+ADDRESS = 'NCKMNCU3STBWBR7E3XD2LR7WSIXF5IVJIDBHBZQT'
+
+
+class Session(object):
+    """
+    Session which answers every request with the same response.
+    """
+
+    def __init__(self):
+        self.response = requests.Response()
+        self.response.status_code = 200
+        self.response._content = b'{}'
+
+    def request(self, method, url, **kwds):
+        return self.response
+
+
+def cases():
+    """
+    Gets benchmarked statements by name, with the bare session first.
+    """
+    plain = Client()
+    plain.session = session = Session()
+    measured = Client(metrics=Metrics())
+    measured.session = Session()
+    return [
+        ('session.request', lambda: session.request(
+            'GET', 'http://127.0.0.1:7890/account/get',
+            params={'address': ADDRESS})),
+        ('client.account', lambda: plain.account),
+        ('account.get', lambda: plain.account.get(ADDRESS)),
+        ('account.get metrics', lambda: measured.account.get(ADDRESS)),
+        ('call', lambda: plain.call('GET', 'account/get',
+                                    params={'address': ADDRESS})),
+    ]
+
+
+def bench(statement, number):
+    """
+    Gets the best time of running statement `number` times, out of 5 runs.
+    """
+    return min(timeit.repeat(statement, number=number, repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--number', type=int, default=100000)
+    args = parser.parse_args()
+
+    baseline = None
+    for name, statement in cases():
+        seconds = bench(statement, args.number)
+        baseline = seconds if baseline is None else baseline
+        print('  {0:<20} {1:8.3f} us  +{2:7.3f} us'.format(
+            name, seconds * 1e6, max(seconds - baseline, 0) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+'''
+    scenarios
+    ---------
+
+    Throughput, latency and memory of `Client` and `AsyncioClient` in
+    typical workloads, against the stand-in NIS of `bench/nis.py` started
+    in a subprocess:
+
+    - transfers: full transfer history of an account, page by page;
+    - blocks: range sync of `--blocks` blocks;
+    - accounts: bulk lookup of `--accounts` accounts;
+    - announce: burst of `--announces` transaction announces.
+
+    For each scenario and client prints the number of requests per second,
+    p50 and p99 latency of the requests measured by the client, failed
+    requests and, with `--memory`, peak memory allocated during the run
+    (tracing allocations slows the calls down).
+
+    Usage: python bench/scenarios.py [--latency MS] [--jitter MS]
+           [--error-rate P] [--concurrency N] [--clients sync,async]
+           [--memory] [scenario ...]
+'''
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import requests
+from nemnis import AsyncioClient, Client, Histogram, Metrics, RetryPolicy
+
+NIS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nis.py')
+
+ADDRESS = 'NCKMNCU3STBWBR7E3XD2LR7WSIXF5IVJIDBHBZQT'
+
+
+def _addresses(count):
+    return ['NBENCH{0:034d}'.format(i) for i in range(count)]
+
+
+def _announce(i):
+    return {'data': '{0:0128x}'.format(i), 'signature': '{0:0128x}'.format(i)}
+
+
+def transfers(client, args):
+    return sum(1 for _ in client.account.iter_transfers_all(ADDRESS))
+
+
+def blocks(client, args):
+    return sum(1 for _ in client.blockchain.iter_blocks(
+        2, args.blocks + 1, args.concurrency))
+
+
+def accounts(client, args):
+    return len(client.account.get_many(_addresses(args.accounts),
+                                       args.concurrency,
+                                       return_exceptions=True))
+
+
+def announce(client, args):
+    return len(client.fetch_many(
+        lambda i: client.transaction.announce(_announce(i)),
+        range(args.announces), args.concurrency, return_exceptions=True))
+
+
+async def transfers_async(client, args):
+    count = 0
+    async for _ in client.account.iter_transfers_all(ADDRESS):
+        count += 1
+    return count
+
+
+async def blocks_async(client, args):
+    count = 0
+    async for _ in client.blockchain.iter_blocks(2, args.blocks + 1,
+                                                 args.concurrency):
+        count += 1
+    return count
+
+
+async def accounts_async(client, args):
+    return len(await client.account.get_many(_addresses(args.accounts),
+                                             args.concurrency,
+                                             return_exceptions=True))
+
+
+async def announce_async(client, args):
+    return len(await client.fetch_many(
+        lambda i: client.transaction.announce(_announce(i)),
+        range(args.announces), args.concurrency, return_exceptions=True))
+
+
+SCENARIOS = {
+    'transfers': (transfers, transfers_async),
+    'blocks': (blocks, blocks_async),
+    'accounts': (accounts, accounts_async),
+    'announce': (announce, announce_async),
+}
+
+
+def run(kind, scenario, endpoint, args):
+    """
+    Runs a scenario with a new client of a kind.
+    :return: `(seconds, items, metrics, peak memory or None)`.
+    """
+    sync, asynchronous = SCENARIOS[scenario]
+    metrics = Metrics()
+    retry_policy = RetryPolicy(backoff=0.01) if args.error_rate else None
+    if args.memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    if kind == 'sync':
+        client = Client(endpoint, pool_size=args.concurrency,
+                        retry_policy=retry_policy, metrics=metrics)
+        items = sync(client, args)
+        client.session.close()
+    else:
+        async def main():
+            async with AsyncioClient(endpoint, args.concurrency,
+                                     initial_concurrency=args.concurrency,
+                                     retry_policy=retry_policy,
+                                     metrics=metrics) as client:
+                return await asynchronous(client, args)
+        items = asyncio.run(main())
+    seconds = time.perf_counter() - start
+    peak = None
+    if args.memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, items, metrics, peak
+
+
+def summary(metrics):
+    """
+    Gets latencies and the numbers of requests and failed requests of all
+    API endpoint methods.
+    """
+    latency = Histogram()
+    requests_count = failed = 0
+    for endpoint in metrics.endpoints.values():
+        latency.merge(endpoint.latency)
+        for status, count in endpoint.statuses.items():
+            requests_count += count
+            if status == 'error' or status >= 500:
+                failed += count
+    return latency, requests_count, failed
+
+
+def _free_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def start_nis(args):
+    """
+    Starts the stand-in NIS in a subprocess and waits until it is up.
+    :return: `(process, endpoint)`.
+    """
+    port = _free_port()
+    process = subprocess.Popen([
+        sys.executable, NIS, '--port', str(port),
+        '--latency', str(args.latency), '--jitter', str(args.jitter),
+        '--error-rate', str(args.error_rate),
+        '--height', str(args.blocks + 1), '--transfers', str(args.transfers)])
+    endpoint = 'http://127.0.0.1:{0}'.format(port)
+    deadline = time.time() + 30
+    while True:
+        try:
+            requests.get(endpoint + '/heartbeat', timeout=1)
+            return process, endpoint
+        except requests.ConnectionError:
+            if process.poll() is not None or time.time() > deadline:
+                process.kill()
+                raise RuntimeError('stand-in NIS did not start')
+            time.sleep(0.1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('scenarios', nargs='*', default=sorted(SCENARIOS),
+                        help='any of ' + ', '.join(sorted(SCENARIOS)))
+    parser.add_argument('--clients', default='sync,async')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0,
+                        help='mean delay of responses in milliseconds')
+    parser.add_argument('--jitter', type=float, default=0,
+                        help='standard deviation of the delay in ms')
+    parser.add_argument('--error-rate', type=float, default=0,
+                        help='share of requests answered with 503 error')
+    parser.add_argument('--transfers', type=int, default=10000)
+    parser.add_argument('--blocks', type=int, default=100000)
+    parser.add_argument('--accounts', type=int, default=10000)
+    parser.add_argument('--announces', type=int, default=10000)
+    parser.add_argument('--memory', action='store_true',
+                        help='trace peak memory allocated')
+    args = parser.parse_args()
+    for scenario in args.scenarios:
+        if scenario not in SCENARIOS:
+            parser.error('unknown scenario: ' + scenario)
+
+    process, endpoint = start_nis(args)
+    try:
+        print('{0:<10} {1:<6} {2:>9} {3:>9} {4:>9} {5:>9} {6:>7} {7:>9}'
+              .format('scenario', 'client', 'items', 'req/s', 'p50 ms',
+                      'p99 ms', 'failed', 'peak MiB'))
+        for scenario in args.scenarios:
+            for kind in args.clients.split(','):
+                seconds, items, metrics, peak = run(kind, scenario,
+                                                    endpoint, args)
+                latency, count, failed = summary(metrics)
+                print('{0:<10} {1:<6} {2:>9} {3:>9.0f} {4:>9.2f} {5:>9.2f} '
+                      '{6:>7} {7:>9}'.format(
+                          scenario, kind, items, count / seconds,
+                          (latency.percentile(0.5) or 0) * 1e3,
+                          (latency.percentile(0.99) or 0) * 1e3, failed,
+                          '-' if peak is None else
+                          '{0:.1f}'.format(peak / 2.0 ** 20)))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -13,8 +13,19 @@ __email__ = "semolex@live.com"
 '''
 
 from .core import *
+from .cache import *
+from .pool import *
+from .ratelimit import *
+from .retry import *
+from .store import *
+from .index import *
+from .history import *
+from .catalogue import *
+from .metrics import *
+from .announce import *
 from .client import *
 try:
     from .asyncio import *
+    from .discovery import *
 except:
     pass
@@ -0,0 +1,368 @@
+__copyright__ = "2017 Oleksii Semeshchuk"
+__license__ = "License: MIT, see LICENSE."
+__version__ = "0.0.9"
+__author__ = "Oleksii Semeshchuk"
+__email__ = "semolex@live.com"
+
+'''
+    announce
+    --------
+
+    Pipeline of signed transactions announced to NIS and tracked until
+    they are confirmed.
+
+    Queued `RequestAnnounce` objects are announced in batches of
+    concurrent calls. When NIS is overloaded, the calls in flight are
+    halved and the next batch waits with exponential backoff, then the
+    concurrency grows back one call per batch. Announced transactions are
+    looked up by hash in unconfirmed transactions of their accounts and
+    in new blocks, until they are confirmed or their deadline passes.
+'''
+
+import binascii
+import collections
+import struct
+import time
+from .core import BLOCKS_AFTER_SIZE
+from .retry import RETRY_STATUSES
+
+__all__ = [
+    'LOAD_STATUSES',
+    'LOAD_RESULTS',
+    'Announcement',
+    'AnnouncePipeline',
+]
+
+
+# status codes of responses of an overloaded node
+LOAD_STATUSES = RETRY_STATUSES | frozenset([429])
+
+# validation results of transactions NIS is too busy to accept
+LOAD_RESULTS = frozenset(['FAILURE_TRANSACTION_CACHE_TOO_FULL'])
+
+# validation results of transactions NIS already has
+_KNOWN_RESULTS = frozenset(['NEUTRAL', 'FAILURE_TRANSACTION_DUPLICATE'])
+_IN_CHAIN_RESULTS = frozenset(['FAILURE_TRANSACTION_DUPLICATE_IN_CHAIN'])
+
+# offset of the deadline in serialized transactions: type, version,
+# time stamp, length of the public key, public key of the signer and fee
+_DEADLINE_OFFSET = 56
+
+
+def _deadline(data):
+    """
+    Gets the deadline of a serialized transaction, in seconds of the NEM
+    epoch, or `None` if the data is malformed.
+    """
+    try:
+        return struct.unpack_from('<I', binascii.unhexlify(data),
+                                  _DEADLINE_OFFSET)[0]
+    except (TypeError, ValueError, struct.error, binascii.Error):
+        return None
+
+
+def _status(error):
+    """
+    Gets the HTTP status code of an error of `requests` or `aiohttp`,
+    or `None` if the request failed without a response.
+    """
+    status = getattr(error, 'status', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code',
+                         None)
+    return status
+
+
+class Announcement(object):
+    """
+    Signed transaction in the pipeline and its state.
+    """
+
+    QUEUED = 'queued'
+    ANNOUNCED = 'announced'
+    UNCONFIRMED = 'unconfirmed'
+    CONFIRMED = 'confirmed'
+    REJECTED = 'rejected'
+    EXPIRED = 'expired'
+    FAILED = 'failed'
+
+    __slots__ = ('request', 'address', 'deadline', 'state', 'hash',
+                 'height', 'message', 'attempts')
+
+    def __init__(self, request, address=None):
+        self.request = request
+        self.address = address
+        self.deadline = _deadline(request.get('data'))
+        self.state = self.QUEUED
+        self.hash = None
+        self.height = None
+        self.message = None
+        self.attempts = 0
+
+    def __repr__(self):
+        return ('Announcement(state={0!r}, hash={1!r}, height={2!r}, '
+                'message={3!r})').format(self.state, self.hash, self.height,
+                                         self.message)
+
+
+class AnnouncePipeline(object):
+    """
+    Announces signed transactions with a `Client` and tracks them.
+    Use `AsyncioAnnouncePipeline` with `AsyncioClient`. With pooled
+    clients transactions are announced to the best node of the pool.
+    """
+
+    def __init__(self, client, concurrency=16, batch_size=200, attempts=5,
+                 backoff=0.5, max_backoff=30):
+        """
+        Initialize pipeline, empty.
+        :param client: client the transactions are announced with.
+        :param concurrency: maximum number of announce calls in flight,
+               also the number of concurrent calls of tracking.
+        :param batch_size: number of transactions announced in a batch.
+        :param attempts: maximum number of attempts to announce
+               a transaction while NIS is overloaded or unreachable.
+        :param backoff: base delay in seconds after a batch with load
+               errors, doubled with each such batch in a row.
+        :param max_backoff: maximum delay in seconds after a batch.
+        """
+        self.client = client
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.window = concurrency
+        self.queue = collections.deque()
+        self.announcements = []
+        self.height = None
+        self.time = None
+        self._tracked = collections.OrderedDict()
+        self._overloads = 0
+
+    @property
+    def settled(self):
+        """
+        Checks if all transactions are announced and reached a final state.
+        """
+        return not self.queue and not self._tracked
+
+    def submit(self, request, address=None):
+        """
+        Queue a signed transaction.
+        :param request: `RequestAnnounce` JSON object
+               (https://nemproject.github.io/#requestAnnounce).
+        :param address: (optional) the address of the signer, to see the
+               transaction among unconfirmed ones before it is in a block.
+        :return: `Announcement` of the transaction.
+        """
+        announcement = Announcement(request, address)
+        self.queue.append(announcement)
+        self.announcements.append(announcement)
+        return announcement
+
+    def announce(self):
+        """
+        Announce queued transactions in batches, slowing down while NIS
+        is overloaded. Transactions which could not be announced in
+        `attempts` are `FAILED`.
+        :return: number of announced transactions.
+        """
+        if self.height is None and self.queue:
+            self.height = self.client.call_json('GET',
+                                                'chain/height')['height']
+        announced = 0
+        while self.queue:
+            delay, count = self._accept(self.client.fetch_many(
+                self._announce, self._batch(), self.window,
+                return_exceptions=True))
+            announced += count
+            if delay:
+                time.sleep(delay)
+        return announced
+
+    def track(self):
+        """
+        Look for announced transactions in new blocks and, if their
+        addresses are known, in unconfirmed transactions.
+        :return: list of announcements whose state changed.
+        """
+        height = self.client.call_json('GET', 'chain/height')['height']
+        changed = self._confirm(height, self.client.fetch_many(
+            self._blocks_after, self._windows(height), self.concurrency,
+            return_exceptions=True))
+        return changed + self._unconfirm(self.client.fetch_many(
+            self._unconfirmed, self._addresses(), self.concurrency,
+            return_exceptions=True))
+
+    def run(self, interval=15):
+        """
+        Announce queued transactions and track them until all of them
+        are settled, polling NIS every `interval` seconds.
+        :return: list of all announcements.
+        """
+        while True:
+            self.announce()
+            if self.settled:
+                return self.announcements
+            time.sleep(interval)
+            self.track()
+
+    def _announce(self, announcement):
+        """
+        Announces a transaction.
+        """
+        return self.client.call_json('POST', 'transaction/announce',
+                                     payload=announcement.request)
+
+    def _blocks_after(self, height):
+        """
+        Gets blocks after a height.
+        """
+        return self.client.call_json('POST', 'local/chain/blocks-after',
+                                     payload={'height': height})
+
+    def _unconfirmed(self, address):
+        """
+        Gets unconfirmed transactions of an account.
+        """
+        return self.client.call_json('GET', 'account/unconfirmedTransactions',
+                                     params={'address': address})
+
+    def _batch(self):
+        """
+        Takes the next batch of queued transactions.
+        """
+        return [self.queue.popleft()
+                for _ in range(min(self.batch_size, len(self.queue)))]
+
+    def _accept(self, results):
+        """
+        Updates transactions from the mapping of announcements to
+        `NemAnnounceResult` JSON objects or errors, and adapts the
+        concurrency to load errors among them.
+        :return: `(delay before the next batch, number of announced)`.
+        """
+        retry, overloaded, count = [], False, 0
+        for announcement, result in results.items():
+            announcement.attempts += 1
+            if isinstance(result, Exception):
+                status = _status(result)
+                if status is not None and status not in LOAD_STATUSES:
+                    self._settle(announcement, Announcement.REJECTED,
+                                 str(result))
+                    continue
+                overloaded = True
+                message = str(result)
+            else:
+                result = result or {}
+                message = result.get('message')
+                _hash = (result.get('transactionHash') or {}).get('data')
+                if result.get('code') == 1 or (_hash and
+                                               message in _KNOWN_RESULTS):
+                    announcement.state = Announcement.ANNOUNCED
+                    announcement.hash = _hash
+                    self._tracked[_hash] = announcement
+                    count += 1
+                    continue
+                if message in _IN_CHAIN_RESULTS:
+                    announcement.hash = _hash
+                    self._settle(announcement, Announcement.CONFIRMED,
+                                 message)
+                    continue
+                if message not in LOAD_RESULTS:
+                    self._settle(announcement, Announcement.REJECTED, message)
+                    continue
+                overloaded = True
+            if announcement.attempts >= self.attempts:
+                self._settle(announcement, Announcement.FAILED, message)
+            else:
+                retry.append(announcement)
+        self.queue.extendleft(reversed(retry))
+        if not overloaded:
+            self._overloads = 0
+            self.window = min(self.concurrency, self.window + 1)
+            return 0, count
+        self._overloads += 1
+        self.window = max(1, self.window // 2)
+        return min(self.max_backoff,
+                   self.backoff * 2 ** (self._overloads - 1)), count
+
+    def _settle(self, announcement, state, message=None):
+        """
+        Sets the final state of a transaction.
+        """
+        announcement.state = state
+        announcement.message = message
+        self._tracked.pop(announcement.hash, None)
+
+    def _windows(self, height):
+        """
+        Gets heights to request blocks after, to get blocks up to a height.
+        """
+        if self.height is None:
+            self.height = height
+        return list(range(self.height, height, BLOCKS_AFTER_SIZE))
+
+    def _confirm(self, height, results):
+        """
+        Confirms transactions found in blocks from the mapping of heights
+        to results of `_blocks_after`, and expires transactions whose
+        deadline passed. Blocks after the first failed lookup are looked
+        up again by the next `track`.
+        :return: list of announcements whose state changed.
+        """
+        changed, failed = [], []
+        for after, response in results.items():
+            if isinstance(response, Exception):
+                failed.append(after)
+                continue
+            for block in response['data']:
+                self.time = max(self.time or 0, block['block']['timeStamp'])
+                for tx in block['txes']:
+                    announcement = self._tracked.get(tx['hash'])
+                    if announcement is not None:
+                        announcement.height = block['block']['height']
+                        self._settle(announcement, Announcement.CONFIRMED)
+                        changed.append(announcement)
+        self.height = max(self.height, min(failed) if failed else height)
+        for announcement in list(self._tracked.values()):
+            if announcement.deadline is not None and self.time is not None \
+                    and announcement.deadline < self.time:
+                self._settle(announcement, Announcement.EXPIRED,
+                             'deadline passed')
+                changed.append(announcement)
+        return changed
+
+    def _addresses(self):
+        """
+        Gets addresses of announced transactions not seen as unconfirmed.
+        """
+        return [announcement.address
+                for announcement in self._tracked.values()
+                if announcement.address is not None and
+                announcement.state == Announcement.ANNOUNCED]
+
+    def _unconfirm(self, results):
+        """
+        Marks transactions found in the mapping of addresses to results of
+        `_unconfirmed` as unconfirmed. Transactions are matched by their
+        signatures, since `UnconfirmedTransactionMetaData` only has the
+        hash of an inner transaction. Failed lookups are skipped.
+        :return: list of announcements whose state changed.
+        """
+        signatures = dict((announcement.request.get('signature'), announcement)
+                          for announcement in self._tracked.values()
+                          if announcement.state == Announcement.ANNOUNCED)
+        signatures.pop(None, None)
+        changed = []
+        for response in results.values():
+            if isinstance(response, Exception):
+                continue
+            for pair in response.get('data') or []:
+                signature = (pair.get('transaction') or {}).get('signature')
+                announcement = signatures.pop(signature, None)
+                if announcement is not None:
+                    announcement.state = Announcement.UNCONFIRMED
+                    changed.append(announcement)
+        return changed
@@ -13,22 +13,53 @@ __email__ = "semolex@live.com"
 
 import aiohttp
 import asyncio
-from .core import AbstractClient, LOCALHOST_ENDPOINT
+import collections
+import itertools
+import json
+from .announce import AnnouncePipeline
+from .catalogue import MosaicCatalogue
+from .core import (AbstractClient, Call, LOCALHOST_ENDPOINT, _call_key,
+                   _clock, _handler, _keyed)
+from .models import decode
+from .pool import EndpointPool
 
 __all__ = [
     'loop',
     'run',
     'map',
+    'as_completed',
+    'AdaptiveLimiter',
     'AsyncioClient',
+    'AsyncioPooledClient',
+    'AsyncioMosaicCatalogue',
+    'AsyncioAnnouncePipeline',
 ]
 
 
+_loop = None
+
+
+def _new_loop():
+    """
+    Creates a new event loop, using `uvloop` if it is installed.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.new_event_loop()
+    return uvloop.new_event_loop()
+
+
 def loop():
     """
-    Represents the global event loop.
+    Represents the global event loop of `run` and `map` helpers.
+    It is created on the first use, with `uvloop` if it is installed.
     :return: Event loop for nemnis client.
     """
-    return asyncio.get_event_loop()
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = _new_loop()
+    return _loop
 
 
 def run(future):
@@ -44,33 +75,846 @@ def map(futures):
     Asynchronously map list of futures.
     :return: Return value of all futures, or raise exception.
     """
-    return run(asyncio.gather(*futures))
+    async def gather():
+        return await asyncio.gather(*futures)
+    return run(gather())
+
+
+async def as_completed(aws, limit=100):
+    """
+    Run awaitables with at most `limit` of them in flight and yield their
+    results as they complete. The iterable is consumed lazily, so a
+    generator of coroutines can be arbitrarily long.
+    If an awaitable raises, the rest in flight are cancelled.
+    :return: asynchronous generator of results.
+    """
+    aws = iter(aws)
+    pending = set(asyncio.ensure_future(aw)
+                  for aw in itertools.islice(aws, limit))
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED)
+            for aw in itertools.islice(aws, len(done)):
+                pending.add(asyncio.ensure_future(aw))
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _ahandle(middleware):
+    """
+    Gets the coroutine function which handles calls of an asynchronous
+    client for a middleware: its `ahandle`, or one running its hooks.
+    """
+    ahandle = getattr(middleware, 'ahandle', None)
+    if ahandle is not None:
+        return ahandle
+
+    async def handle(call, next):
+        result = middleware.on_request(call)
+        if not isinstance(result, Call):
+            return middleware.on_response(call, result)
+        try:
+            response = await next(result)
+        except Exception as error:
+            response = middleware.on_error(call, error)
+            if response is None:
+                raise
+            return response
+        return middleware.on_response(call, response)
+    return handle
+
+
+class AdaptiveLimiter(object):
+    """
+    Adaptive limit of concurrent calls to a NIS node (AIMD).
+    The limit grows by one per round of successful calls while latency
+    stays close to the lowest one seen, and is cut by `backoff` factor
+    on server errors, timeouts or latency spikes.
+    """
+
+    def __init__(self, initial=10, min_limit=1, max_limit=100, backoff=0.7,
+                 tolerance=2.0):
+        """
+        Initialize limiter.
+        :param initial: initial limit.
+        :param min_limit: the limit never goes below this value.
+        :param max_limit: the limit never goes above this value.
+        :param backoff: factor the limit is multiplied by on overload.
+        :param tolerance: latency above the lowest one seen multiplied by
+               this factor is treated as overload.
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.in_flight = 0
+        self.min_latency = None
+        self._decreased = 0
+        self._waiters = collections.deque()
+
+    @property
+    def queue_depth(self):
+        """
+        Number of calls waiting for a free slot.
+        """
+        return len(self._waiters)
+
+    async def acquire(self):
+        """
+        Wait for a free slot.
+        """
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over already, pass it on
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, latency=None, failed=False):
+        """
+        Free a slot and adapt the limit to the outcome of the call.
+        :param latency: latency of the call in seconds, `None` if unknown.
+        :param failed: whether the node failed to serve the call.
+        """
+        self.in_flight -= 1
+        now = _clock()
+        overloaded = failed
+        if latency is not None:
+            if self.min_latency is None or latency < self.min_latency:
+                self.min_latency = latency
+            else:
+                # let the baseline follow lasting changes of the network
+                self.min_latency += 0.01 * (latency - self.min_latency)
+            overloaded = (overloaded or
+                          latency > self.tolerance * self.min_latency)
+        if overloaded:
+            # cut the limit at most once per round trip
+            if now - self._decreased > (self.min_latency or 0):
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._decreased = now
+        elif latency is not None and self.in_flight + 1 >= int(self.limit):
+            # grow only if the limit was reached, not while the node idles
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def _wake(self):
+        """
+        Hand free slots over to the waiting calls.
+        """
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
 
 
 class AsyncioClient(AbstractClient):
     """
     Asynchronous variant of the main API client.
-    Uses a session for connection pooling.
+    Uses a session for connection pooling, created in the running event
+    loop on the first call. Close it with `aclose`, or use the client as
+    an asynchronous context manager.
     """
 
-    def __init__(self, endpoint=LOCALHOST_ENDPOINT, max_concurrency=100):
+    def __init__(self, endpoint=LOCALHOST_ENDPOINT, max_concurrency=100,
+                 decoded=False, json_decoder=None, cache=None,
+                 coalesce=False, limit_per_host=0, keep_alive=True,
+                 keepalive_timeout=15, dns_cache_ttl=10, min_concurrency=1,
+                 initial_concurrency=10, rate_limiter=None,
+                 retry_policy=None, block_store=None, metrics=None,
+                 middleware=None):
         """
         Initialize client.
         :param endpoint: address of the NIS.
+        :param max_concurrency: maximum number of calls in flight to a node,
+               also the size of the connection pool.
+        :param decoded: return decoded payloads instead of response objects.
+        :param json_decoder: (optional) function that decodes JSON from
+               body bytes.
+        :param cache: (optional) `ResponseCache` for responses.
+        :param coalesce: share one HTTP request between identical GET calls
+               made while it is in flight.
+        :param limit_per_host: maximum number of connections to one host,
+               `0` for no limit besides `max_concurrency`.
+        :param keep_alive: reuse connections between calls.
+        :param keepalive_timeout: number of seconds an idle connection is
+               kept open.
+        :param dns_cache_ttl: number of seconds resolved addresses are
+               cached, `None` to cache them forever, `0` to disable cache.
+        :param min_concurrency: the adaptive limit of calls in flight to
+               a node never goes below this value.
+        :param initial_concurrency: initial adaptive limit of calls in
+               flight to a node. Pass the same value for all three
+               concurrency params to get a fixed limit.
+        :param rate_limiter: (optional) `RateLimiter` for calls.
+        :param retry_policy: (optional) `RetryPolicy` for calls.
+        :param block_store: (optional) `BlockStore` for blocks.
+        :param metrics: (optional) `Metrics` of calls.
+        :param middleware: (optional) list of `Middleware` of calls.
+        """
+        super(AsyncioClient, self).__init__(endpoint, decoded, json_decoder,
+                                            cache, coalesce, rate_limiter,
+                                            retry_policy, block_store,
+                                            metrics, middleware)
+        self._connector_options = {
+            'limit': max_concurrency,
+            'limit_per_host': limit_per_host,
+            'use_dns_cache': dns_cache_ttl != 0,
+            'ttl_dns_cache': dns_cache_ttl,
+        }
+        if keep_alive:
+            self._connector_options['keepalive_timeout'] = keepalive_timeout
+        else:
+            self._connector_options['force_close'] = True
+        self._session = None
+        self._loop = None
+        self._limiter_options = {
+            'initial': initial_concurrency,
+            'min_limit': min_concurrency,
+            'max_limit': max_concurrency,
+        }
+        self.limiters = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    @property
+    def session(self):
+        """
+        Represents the HTTP session of the client, bound to the event loop
+        it was created in. A new session is opened in another event loop.
+
+        :return: `aiohttp.ClientSession` instance.
+        """
+        self._bind_loop()
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(**self._connector_options))
+        return self._session
+
+    def limiter(self, endpoint):
+        """
+        Gets the adaptive limiter of calls in flight to a node, e.g. to
+        read its current `limit`, `in_flight` and `queue_depth`.
+
+        :param endpoint: address of the NIS.
+        :return: `AdaptiveLimiter` instance.
         """
-        super(AsyncioClient, self).__init__(endpoint)
-        self.session = aiohttp.ClientSession(loop=loop())
-        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self._bind_loop()
+        limiter = self.limiters.get(endpoint)
+        if limiter is None:
+            limiter = self.limiters[endpoint] = AdaptiveLimiter(
+                **self._limiter_options)
+            if self.metrics is not None:
+                self.metrics.add_limiter(endpoint, limiter)
+        return limiter
 
-    def __del__(self):
-        self.session.close()
+    def _bind_loop(self):
+        """
+        Drops the session, limiters and shared calls of the event loop they
+        were created in when the client is used in another one, e.g. in
+        the next `asyncio.run`, since they cannot be used across loops.
+        :return: `True` if the loop changed.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        if loop is self._loop:
+            return False
+        self._loop = loop
+        self._session = None
+        self.limiters = {}
+        self._in_flight = {}
+        return True
+
+    async def aclose(self):
+        """
+        Close the session and its connections.
+        The next call opens a new session.
+        """
+        self._bind_loop()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
 
     async def call(self, method, name, params=None, payload=None, **kwds):
         """
         Make calls to the API via HTTP methods and passed params.
-        :return: response object
+        :return: response object, or decoded payload if client is `decoded`.
+        """
+        if self.decoded:
+            return decode(name, await self.call_json(method, name, params,
+                                                     payload, **kwds))
+        return await self._request(method, name, params, payload, **kwds)
+
+    async def call_json(self, method, name, params=None, payload=None,
+                        **kwds):
+        """
+        Make calls to the API and decode JSON from the response body bytes.
+        :return: decoded JSON, or `None` if response body is empty.
+        """
+        store = self.block_store
+        if store is not None:
+            data = store.lookup(name, payload)
+            if data is not None:
+                return data
+        response = await self._request(method, name, params, payload,
+                                       read=True, **kwds)
+        response.raise_for_status()
+        content = await response.read()
+        start = _clock()
+        data = self.json_decoder(content) if content else None
+        if self.metrics is not None:
+            self.metrics.decode(name, _clock() - start)
+        if store is not None:
+            store.record(name, data)
+        if self.cache is not None:
+            self.cache.record(name, data)
+        return data
+
+    async def _request(self, method, name, params, payload, **kwds):
+        """
+        Make the HTTP request through the middleware.
+        """
+        middleware = self.middleware
+        if not middleware:
+            return await self._fetch(method, name, params, payload, **kwds)
+        if self._chain[0] is not middleware:
+            self._chain = (middleware, _handler(
+                [_ahandle(layer) for layer in middleware], self._fetch_call))
+        return await self._chain[1](Call(method, name, params, payload, kwds))
+
+    async def _fetch_call(self, call):
+        """
+        Make the HTTP request of a call which went through the middleware.
+        """
+        return await self._fetch(call.method, call.name, call.params,
+                                 call.payload, **(call.options or {}))
+
+    async def _fetch(self, method, name, params, payload, read=False,
+                     **kwds):
+        """
+        Make the HTTP request, or get its response from the cache.
+        The body is read while the call is in flight if `read` is set,
+        or the response is cached or shared.
+        """
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(method, name, params, payload)
+            if key is not None:
+                response = self.cache.get(key)
+                if response is not None:
+                    return response
+        if not (self.coalesce and method == 'GET'):
+            return await self._send(method, name, params, payload, key, read,
+                                    **kwds)
+        flight = _call_key(method, name, params)
+        future = self._in_flight.get(flight)
+        if future is None:
+            future = asyncio.ensure_future(
+                self._send(method, name, params, payload, key, True, **kwds))
+            self._in_flight[flight] = future
+            future.add_done_callback(
+                lambda _: self._in_flight.pop(flight, None))
+        # a cancelled waiter must not cancel the request of the others
+        return await asyncio.shield(future)
+
+    async def _send(self, method, name, params, payload, key, read, **kwds):
+        """
+        Make the HTTP request and cache its response under `key`, if any.
+        """
+        if params:
+            params = {k: v for k, v in params.items() if v is not None}
+        read = read or key is not None
+        if self.retry_policy is None:
+            response = await self._dispatch(method, name, params, payload,
+                                            read, **kwds)
+        else:
+            response = await self._retry(method, name, params, payload, read,
+                                         **kwds)
+        if key is not None and response.status < 400:
+            self.cache.put(key, response, len(await response.read()))
+        return response
+
+    async def _retry(self, method, name, params, payload, read, **kwds):
+        """
+        Make the HTTP request following the retry policy.
+        Reads are retried on network errors and `statuses` of the policy,
+        other calls only if the connection could not be established.
+        """
+        policy = self.retry_policy
+        idempotent = policy.idempotent(method, name)
+        errors = ((aiohttp.ClientError, asyncio.TimeoutError) if idempotent
+                  else aiohttp.ClientConnectorError)
+        attempt = 0
+        while True:
+            last = attempt + 1 >= policy.attempts
+            start = _clock()
+            try:
+                if idempotent:
+                    response = await self._hedged(method, name, params,
+                                                  payload, read, **kwds)
+                else:
+                    response = await self._dispatch(method, name, params,
+                                                    payload, read, **kwds)
+            except errors:
+                if last:
+                    raise
+            else:
+                if last or not (idempotent and
+                                response.status in policy.statuses):
+                    if response.status < 500:
+                        policy.record(name, _clock() - start)
+                    return response
+                response.release()
+            await asyncio.sleep(policy.delay(attempt))
+            attempt += 1
+
+    async def _hedged(self, method, name, params, payload, read, **kwds):
+        """
+        Make the HTTP request, and if it takes longer than the hedge delay
+        of the policy, a second one. The first successful response wins,
+        the other request is cancelled.
+        """
+        delay = self.retry_policy.hedge_delay(name)
+        if delay is None:
+            return await self._dispatch(method, name, params, payload, read,
+                                        **kwds)
+        first = asyncio.ensure_future(
+            self._dispatch(method, name, params, payload, read, **kwds))
+        second = None
+        try:
+            done, _ = await asyncio.wait([first], timeout=delay)
+            if done:
+                return first.result()
+            second = asyncio.ensure_future(
+                self._dispatch(method, name, params, payload, read,
+                               hedge=True, **kwds))
+            error = None
+            for future in asyncio.as_completed([first, second]):
+                try:
+                    return await future
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    error = error or e
+            raise error
+        finally:
+            first.cancel()
+            if second is not None:
+                second.cancel()
+
+    async def _dispatch(self, method, name, params, payload, read,
+                        hedge=False, **kwds):
+        """
+        Make the HTTP request within the rate limit of its endpoint group.
+        """
+        if self.rate_limiter is not None:
+            delay = self.rate_limiter.reserve(name)
+            if delay:
+                await asyncio.sleep(delay)
+            if self.metrics is not None:
+                self.metrics.wait(name, delay)
+        return await self._route(method, name, params, payload, read, hedge,
+                                 **kwds)
+
+    async def _route(self, method, name, params, payload, read, hedge=False,
+                     **kwds):
+        """
+        Make the HTTP request to the NIS endpoint.
+        """
+        return await self._attempt(self.endpoint, method, name, params,
+                                   payload, read, **kwds)
+
+    async def _attempt(self, endpoint, method, name, params, payload, read,
+                       **kwds):
+        """
+        Make the HTTP request to a node within its adaptive limit of calls
+        in flight, and adapt the limit to the outcome.
+        The body is read before the slot is freed if `read` is set.
+        """
+        limiter = self.limiter(endpoint)
+        metrics = self.metrics
+        start = _clock()
+        await limiter.acquire()
+        if metrics is not None:
+            metrics.wait(name, _clock() - start)
+        latency = None
+        failed = True
+        status = None
+        received = 0
+        try:
+            start = _clock()
+            response = await self.session.request(
+                method, endpoint + '/' + name, params=params, json=payload,
+                **kwds)
+            status = response.status
+            if read:
+                received = len(await response.read())
+            else:
+                received = response.content_length or 0
+            latency = _clock() - start
+            failed = status >= 500
+            return response
+        except asyncio.TimeoutError:
+            raise
+        except asyncio.CancelledError:
+            # cancelled on purpose, e.g. the slower request of a hedge,
+            # which says nothing of the load of the node
+            latency, failed = None, False
+            raise
+        except aiohttp.ClientError:
+            # the node is unreachable, its latency says nothing of the load
+            failed = False
+            raise
+        finally:
+            limiter.release(latency, failed)
+            if metrics is not None:
+                metrics.request(
+                    name, _clock() - start, status,
+                    0 if payload is None else len(json.dumps(payload)),
+                    received)
+
+    async def paginate(self, fetch, cursor, start=None, page_size=None,
+                       stop=None):
+        """
+        Walk all pages of a paged API resource, item by item.
+        The next page is requested while the current one is consumed.
+        :return: asynchronous generator of page items.
+        """
+        pending = asyncio.ensure_future(self._page(fetch, start))
+        try:
+            while pending is not None:
+                items = await pending
+                pending = None
+                if stop is not None:
+                    last = next((i for i, item in enumerate(items)
+                                 if stop(item)), None)
+                    if last is not None:
+                        for item in items[:last]:
+                            yield item
+                        return
+                if items and (page_size is None or len(items) >= page_size):
+                    pending = asyncio.ensure_future(
+                        self._page(fetch, cursor(items[-1])))
+                for item in items:
+                    yield item
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def fetch_pages(self, fetch, args, concurrency=1, stop=None,
+                          before=None):
+        """
+        Fetch a page of API resource for each of passed arguments
+        in concurrent tasks and walk their items in the order of arguments.
+        Calls are also bounded by the adaptive limit of the node.
+        :return: asynchronous generator of page items.
+        """
+        if before is not None:
+            await before()
+        args = iter(args)
+        pending = collections.deque(
+            asyncio.ensure_future(self._page(fetch, arg))
+            for arg in itertools.islice(args, concurrency))
+        try:
+            while pending:
+                items = await pending.popleft()
+                for arg in itertools.islice(args, 1):
+                    pending.append(
+                        asyncio.ensure_future(self._page(fetch, arg)))
+                for item in items:
+                    if stop is not None and stop(item):
+                        return
+                    yield item
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def fetch_many(self, fetch, args, concurrency=None,
+                         return_exceptions=False):
+        """
+        Make a call for each of distinct arguments in concurrent tasks,
+        which take the arguments one by one.
+        Calls are also bounded by the adaptive limit of the node.
+        :return: mapping of arguments to results, in the order of arguments.
+        """
+        args = list(collections.OrderedDict.fromkeys(args))
+        outcomes = [None] * len(args)
+        pending = iter(enumerate(args))
+
+        async def worker():
+            for i, arg in pending:
+                try:
+                    outcomes[i] = (await fetch(arg), None)
+                except Exception as error:
+                    outcomes[i] = (None, error)
+        workers = min(len(args), concurrency or
+                      self._connector_options['limit'] or len(args))
+        await asyncio.gather(*[worker() for _ in range(workers)])
+        return _keyed(args, outcomes, return_exceptions)
+
+    async def follow(self, fetch, follower, min_interval=1, max_interval=15):
+        """
+        Walk the items of a growing API resource as they appear,
+        polling it with exponential backoff.
+        :return: endless asynchronous generator of items.
+        """
+        interval = min_interval
+        while True:
+            items, more = follower.accept(
+                await self._page(fetch, follower.cursor))
+            for item in items:
+                yield item
+            if more:
+                continue
+            interval = min_interval if items else min(max_interval,
+                                                      interval * 2)
+            await asyncio.sleep(interval)
+
+    async def _page(self, fetch, arg):
+        """
+        Make the call for a page and get its items.
+        `fetch` can also return JSON payload of the page.
+        """
+        response = await fetch(arg)
+        if self.decoded:
+            return response
+        if isinstance(response, dict):
+            return response['data']
+        response.raise_for_status()
+        return self.json_decoder(await response.read())['data']
+
+
+class AsyncioPooledClient(AsyncioClient):
+    """
+    Asynchronous client for a pool of NIS nodes.
+    Routes calls to the fastest node in sync with the highest chain seen
+    and fails over to the next one on errors.
+    """
+
+    def __init__(self, endpoints, max_lag=2, refresh_interval=30,
+                 probe_timeout=5, **kwds):
+        """
+        Initialize client.
+        :param endpoints: addresses of the NIS nodes, or `EndpointPool`.
+        :param max_lag: number of blocks a node can be behind the highest
+               chain seen and still serve calls.
+        :param refresh_interval: number of seconds between probes of nodes.
+        :param probe_timeout: timeout of a probe request in seconds.
+        :param kwds: any arguments of `AsyncioClient`.
+        """
+        if not isinstance(endpoints, EndpointPool):
+            endpoints = EndpointPool(endpoints, max_lag, refresh_interval)
+        self.pool = endpoints
+        self.probe_timeout = probe_timeout
+        self._refreshed = False
+        self._refresh_task = None
+        super(AsyncioPooledClient, self).__init__(self.pool.endpoints[0],
+                                                  **kwds)
+
+    async def aclose(self):
+        """
+        Stop the background refresh of the pool, close the session and
+        its connections.
+        """
+        self._bind_loop()
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        await super(AsyncioPooledClient, self).aclose()
+
+    def _bind_loop(self):
+        """
+        Also forgets the background refresh of the previous event loop.
+        """
+        changed = super(AsyncioPooledClient, self)._bind_loop()
+        if changed:
+            self._refresh_task = None
+        return changed
+
+    async def refresh(self):
+        """
+        Probe all nodes of the pool concurrently with `status` and
+        `chain/height` requests, updating their latency, status and height.
+        """
+        await asyncio.gather(*[self.probe(endpoint)
+                               for endpoint in self.pool.endpoints])
+        self._refreshed = True
+
+    async def _refresh_due(self):
+        """
+        Refresh the pool if probes are due. Only the first refresh, without
+        which there is no ranking, is awaited by the call itself; later ones
+        run in a background task while calls use the current ranking.
+        """
+        if not self.pool.due():
+            return
+        if not self._refreshed:
+            await self.refresh()
+            return
+        self._refresh_task = asyncio.ensure_future(self.refresh())
+
+    async def probe(self, endpoint, add=False):
+        """
+        Probe a node and record the result in the pool.
+        :param add: add the node to the pool, if it is not there and the
+               probe shows it can serve calls.
+        :return: `status` response JSON, or `None` if the probe failed.
+        """
+        try:
+            start = _clock()
+            status = await self._node_json(endpoint, 'status')
+            latency = _clock() - start
+            height = await self._node_json(endpoint, 'chain/height')
+            self.pool.update(endpoint, latency, status['code'],
+                             height['height'], add)
+            return status
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError,
+                KeyError, TypeError):
+            self.pool.failed(endpoint)
+
+    async def _node_json(self, endpoint, name):
+        """
+        Make GET request to API endpoint of the given node, bypassing the
+        routing, and decode its JSON.
+        """
+        timeout = aiohttp.ClientTimeout(total=self.probe_timeout)
+        response = await self._attempt(endpoint, 'GET', name, None, None,
+                                       True, timeout=timeout)
+        response.raise_for_status()
+        return self.json_decoder(await response.read())
+
+    async def _route(self, method, name, params, payload, read, hedge=False,
+                     **kwds):
+        """
+        Make the HTTP request to the best node of the pool, or the second
+        best one for a hedge.
+        Reads are retried on the next nodes if a node can not be reached or
+        responds with a server error.
+        """
+        await self._refresh_due()
+        endpoints = self.pool.ranked()
+        if hedge:
+            endpoints = endpoints[1:] + endpoints[:1]
+        if not self.pool.is_read(method, name):
+            endpoints = endpoints[:1]
+        last = len(endpoints) - 1
+        for i, endpoint in enumerate(endpoints):
+            start = _clock()
+            try:
+                response = await self._attempt(endpoint, method, name,
+                                               params, payload, read, **kwds)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self.pool.failed(endpoint)
+                if i == last:
+                    raise
+                continue
+            if response.status >= 500:
+                self.pool.failed(endpoint)
+                if i < last:
+                    response.release()
+                    continue
+            else:
+                self.pool.succeeded(endpoint, _clock() - start)
+            return response
+
+
+class AsyncioMosaicCatalogue(MosaicCatalogue):
+    """
+    Namespaces and mosaic definitions, refreshed with an `AsyncioClient`.
+    """
+
+    async def refresh(self):
+        """
+        Fetch root namespaces and mosaic definitions added since the last
+        refresh, and sub-namespaces of all roots, see
+        `MosaicCatalogue.refresh`.
+        :return: number of new or changed mosaic definitions.
+        """
+        namespace = self.client.namespace
+        self.errors = {}
+        self._add_roots([root async for root in namespace.iter_roots(
+            since=self._root_id)])
+        self._add_sub_namespaces(await self.client.fetch_many(
+            self._sub_namespaces, self._roots(), self.concurrency,
+            return_exceptions=True))
+        return self._add_definitions(await self.client.fetch_many(
+            self._definitions, list(self.namespaces), self.concurrency,
+            return_exceptions=True))
+
+    async def _definitions(self, fqn):
+        """
+        Gets mosaic definitions of a namespace added since the last refresh.
+        """
+        return [definition async for definition in
+                self.client.namespace.iter_mosaic_definitions(
+                    fqn, since=self._mosaic_ids.get(fqn))]
+
+
+class AsyncioAnnouncePipeline(AnnouncePipeline):
+    """
+    Announces signed transactions with an `AsyncioClient` and tracks them.
+    """
+
+    async def announce(self):
+        """
+        Announce queued transactions in batches, slowing down while NIS
+        is overloaded, see `AnnouncePipeline.announce`.
+        :return: number of announced transactions.
+        """
+        if self.height is None and self.queue:
+            self.height = (await self.client.call_json(
+                'GET', 'chain/height'))['height']
+        announced = 0
+        while self.queue:
+            delay, count = self._accept(await self.client.fetch_many(
+                self._announce, self._batch(), self.window,
+                return_exceptions=True))
+            announced += count
+            if delay:
+                await asyncio.sleep(delay)
+        return announced
+
+    async def track(self):
+        """
+        Look for announced transactions in new blocks and unconfirmed
+        transactions, see `AnnouncePipeline.track`.
+        :return: list of announcements whose state changed.
+        """
+        height = (await self.client.call_json('GET', 'chain/height'))['height']
+        changed = self._confirm(height, await self.client.fetch_many(
+            self._blocks_after, self._windows(height), self.concurrency,
+            return_exceptions=True))
+        return changed + self._unconfirm(await self.client.fetch_many(
+            self._unconfirmed, self._addresses(), self.concurrency,
+            return_exceptions=True))
+
+    async def run(self, interval=15):
+        """
+        Announce queued transactions and track them until all of them
+        are settled, polling NIS every `interval` seconds.
+        :return: list of all announcements.
         """
-        url = self.endpoint + '/' + name
-        async with self.semaphore:
-            return await self.session.request(method, url, params=params,
-                                              json=payload, **kwds)
+        while True:
+            await self.announce()
+            if self.settled:
+                return self.announcements
+            await asyncio.sleep(interval)
+            await self.track()
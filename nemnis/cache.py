@@ -0,0 +1,176 @@
+__copyright__ = "2017 Oleksii Semeshchuk"
+__license__ = "License: MIT, see LICENSE."
+__version__ = "0.0.9"
+__author__ = "Oleksii Semeshchuk"
+__email__ = "semolex@live.com"
+
+'''
+    cache
+    -----
+
+    Response cache for the NIS clients.
+
+    Responses of endpoints which return immutable or slow-changing data
+    (final blocks, namespaces, account and node info) are kept for the time
+    set by per-endpoint policies. Endpoints without a policy, e.g.
+    `transaction/announce`, are never cached. Blocks are immutable only
+    once they are `FINALITY` blocks deep, so blocks near the tip of the
+    chain, or at any height while the chain height is unknown, are kept
+    only for a short time.
+'''
+
+import collections
+import json
+import threading
+from .core import _call_key, _clock
+from .store import FINALITY
+
+__all__ = [
+    'FOREVER',
+    'UntilFinal',
+    'CACHE_POLICIES',
+    'ResponseCache',
+]
+
+
+FOREVER = float('inf')
+
+
+class UntilFinal(object):
+    """
+    Policy of an endpoint about the block at `height` of the payload:
+    its responses are kept forever if the block is final under the chain
+    height known to the cache, and for `ttl` seconds otherwise.
+    """
+
+    def __init__(self, ttl=15):
+        self.ttl = ttl
+
+    def __repr__(self):
+        return 'UntilFinal({0!r})'.format(self.ttl)
+
+
+CACHE_POLICIES = {
+    'block/at/public': UntilFinal(15),
+    'namespace/': 300,
+    'node/info': 300,
+    'node/extended-info': 300,
+    'account/get': 15,
+    'account/get/from-public-key': 15,
+    'account/get/forwarded': 15,
+    'account/get/forwarded/from-public-key': 15,
+    'account/status': 15,
+}
+
+
+class ResponseCache(object):
+    """
+    Thread-safe LRU cache of responses, bounded by their total size in bytes.
+    Keeps hit and miss counters of cacheable calls.
+    """
+
+    def __init__(self, max_bytes=32 * 2 ** 20, policies=None,
+                 finality=FINALITY):
+        """
+        Initialize cache.
+        :param max_bytes: maximum total size of cached response bodies.
+        :param policies: (optional) mapping of API endpoint method names to
+               the number of seconds their responses are kept (`FOREVER` for
+               immutable data) or `UntilFinal` policies, `CACHE_POLICIES` is
+               used by default.
+        :param finality: number of blocks after which a block is final.
+        """
+        self.max_bytes = max_bytes
+        self.policies = CACHE_POLICIES if policies is None else policies
+        self.finality = finality
+        self.tip = None
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def observe(self, height):
+        """
+        Records a height of the chain, blocks `finality` deep under it are
+        cached forever.
+        """
+        with self._lock:
+            self.tip = max(self.tip or 0, height)
+
+    def record(self, name, data):
+        """
+        Takes the chain height from JSON payload of a call of API endpoint
+        method, if it has one.
+        """
+        if name in ('chain/height', 'chain/last-block') and data:
+            self.observe(data['height'])
+
+    def key(self, method, name, params=None, payload=None):
+        """
+        Gets the cache key of a call.
+        :return: hashable key, or `None` if the endpoint is not cached.
+        """
+        if name not in self.policies:
+            return None
+        return _call_key(method, name, params, payload)
+
+    def get(self, key):
+        """
+        Gets a cached response and marks it as recently used.
+        Expired response is dropped.
+        :return: response, or `None` if it is not cached.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[2] < _clock():
+                if entry is not None:
+                    self.size -= entry[1]
+                self.misses += 1
+                return None
+            self._entries[key] = entry
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, response, size):
+        """
+        Caches a response for the time set by the policy of its endpoint,
+        evicting least recently used ones to fit into `max_bytes`.
+        Response larger than `max_bytes` is not cached.
+        """
+        if size > self.max_bytes:
+            return
+        expires = _clock() + self._ttl(key)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            while self._entries and self.size + size > self.max_bytes:
+                self.size -= self._entries.popitem(last=False)[1][1]
+            self._entries[key] = (response, size, expires)
+            self.size += size
+
+    def _ttl(self, key):
+        """
+        Gets the number of seconds a response of a call is kept.
+        """
+        policy = self.policies[key[1]]
+        if not isinstance(policy, UntilFinal):
+            return policy
+        height = json.loads(key[3])['height'] if key[3] else None
+        tip = self.tip
+        if height is not None and tip is not None and \
+                height <= tip - self.finality:
+            return FOREVER
+        return policy.ttl
+
+    def clear(self):
+        """
+        Drops all cached responses. Counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
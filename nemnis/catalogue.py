@@ -0,0 +1,147 @@
+__copyright__ = "2017 Oleksii Semeshchuk"
+__license__ = "License: MIT, see LICENSE."
+__version__ = "0.0.9"
+__author__ = "Oleksii Semeshchuk"
+__email__ = "semolex@live.com"
+
+'''
+    catalogue
+    ---------
+
+    Catalogue of namespaces and mosaic definitions of the chain.
+
+    Walks all root namespaces, then the sub-namespaces of each root among
+    the namespaces of its owner, then the mosaic definitions of every
+    namespace, concurrently, keeping the most recent definition of every
+    mosaic. The next refresh only requests pages of roots and definitions
+    added after the highest database ids seen, so keeping the catalogue up
+    to date takes about one request per namespace and one per root.
+'''
+
+from .core import NAMESPACE_PAGE_SIZE, _meta_id
+
+__all__ = [
+    'MosaicCatalogue',
+]
+
+
+def _mosaic_key(definition):
+    """
+    Gets `(namespace id, name)` of `MosaicDefinitionMetaDataPair`.
+    """
+    mosaic_id = definition['mosaic']['id']
+    return mosaic_id['namespaceId'], mosaic_id['name']
+
+
+class MosaicCatalogue(object):
+    """
+    Namespaces and mosaic definitions, refreshed with a `Client`.
+    Root namespaces are kept as `NamespaceMetaDataPair` objects, and
+    sub-namespaces, which have no database ids, as `{'namespace': ...}`.
+    Use `AsyncioMosaicCatalogue` with `AsyncioClient`.
+    """
+
+    def __init__(self, client, concurrency=8):
+        """
+        Initialize catalogue, empty.
+        :param client: client the catalogue is fetched with.
+        :param concurrency: maximum number of namespaces whose mosaic
+               definitions are fetched at once.
+        """
+        self.client = client
+        self.concurrency = concurrency
+        self.namespaces = {}
+        self.mosaics = {}
+        self.errors = {}
+        self._root_id = None
+        self._mosaic_ids = {}
+
+    def refresh(self):
+        """
+        Fetch root namespaces and mosaic definitions added since the last
+        refresh, and sub-namespaces of all roots. Namespaces whose
+        sub-namespaces or definitions could not be fetched are kept in
+        `errors` and fetched again on the next refresh, as are roots with
+        a full page of sub-namespaces, which may have more.
+        :return: number of new or changed mosaic definitions.
+        """
+        namespace = self.client.namespace
+        self.errors = {}
+        self._add_roots(list(namespace.iter_roots(since=self._root_id)))
+        self._add_sub_namespaces(self.client.fetch_many(
+            self._sub_namespaces, self._roots(), self.concurrency,
+            return_exceptions=True))
+        return self._add_definitions(self.client.fetch_many(
+            self._definitions, list(self.namespaces), self.concurrency,
+            return_exceptions=True))
+
+    def _sub_namespaces(self, fqn):
+        """
+        Gets `Namespace` JSON objects of sub-namespaces of a root
+        namespace, among the namespaces of its owner. NIS pages them by
+        database ids which `Namespace` objects do not have, so only the
+        first `NAMESPACE_PAGE_SIZE` are fetched.
+        """
+        owner = self.namespaces[fqn]['namespace']['owner']
+        return self.client.call_json('GET', 'account/namespace/page',
+                                     params={'address': owner, 'parent': fqn,
+                                             'pageSize': NAMESPACE_PAGE_SIZE})
+
+    def _definitions(self, fqn):
+        """
+        Gets mosaic definitions of a namespace added since the last refresh.
+        """
+        return list(self.client.namespace.iter_mosaic_definitions(
+            fqn, since=self._mosaic_ids.get(fqn)))
+
+    def _add_roots(self, roots):
+        """
+        Adds `NamespaceMetaDataPair` objects of root namespaces, most recent
+        first, keeping the most recent entry of each namespace.
+        """
+        for root in reversed(roots):
+            self.namespaces[root['namespace']['fqn']] = root
+        if roots:
+            self._root_id = max(self._root_id or 0, _meta_id(roots[0]))
+
+    def _roots(self):
+        """
+        Gets names of the root namespaces.
+        """
+        return [fqn for fqn in self.namespaces if '.' not in fqn]
+
+    def _add_sub_namespaces(self, results):
+        """
+        Adds sub-namespaces from the mapping of root namespaces to results
+        of `_sub_namespaces`.
+        """
+        for fqn, response in results.items():
+            if isinstance(response, Exception):
+                self.errors[fqn] = response
+                continue
+            for namespace in response['data']:
+                self.namespaces[namespace['fqn']] = {'namespace': namespace}
+            if len(response['data']) >= NAMESPACE_PAGE_SIZE:
+                # the page is full, and the rest cannot be paged to
+                self.errors[fqn] = ValueError(
+                    '{0} may have more than {1} sub-namespaces'.format(
+                        fqn, NAMESPACE_PAGE_SIZE))
+
+    def _add_definitions(self, results):
+        """
+        Adds definitions from the mapping of namespaces to results of
+        `_definitions`, most recent first.
+        :return: number of new or changed mosaic definitions.
+        """
+        count = 0
+        for fqn, definitions in results.items():
+            if isinstance(definitions, Exception):
+                self.errors[fqn] = definitions
+                continue
+            for definition in reversed(definitions):
+                self.mosaics[_mosaic_key(definition)] = definition
+            if definitions:
+                self._mosaic_ids[fqn] = max(self._mosaic_ids.get(fqn, 0),
+                                            _meta_id(definitions[0]))
+            count += len(definitions)
+        return count
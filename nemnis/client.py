@@ -11,33 +11,654 @@ __email__ = "semolex@live.com"
     Module for the synchronous NIS client.
 '''
 
+import collections
+import itertools
 import requests
-from .core import AbstractClient, LOCALHOST_ENDPOINT
+import socket
+import threading
+import time
+from concurrent.futures import (Future, ThreadPoolExecutor, TimeoutError,
+                                as_completed)
+from requests.adapters import HTTPAdapter
+from .core import (AbstractClient, BatchError, Call, LOCALHOST_ENDPOINT,
+                   _call_key, _clock, _handler, _keyed)
+from .models import decode
+from .pool import EndpointPool
 
 __all__ = [
+    'Batch',
     'Client',
+    'PooledClient',
 ]
 
 
+class _PoolAdapter(HTTPAdapter):
+    """
+    Transport adapter which sets socket options of pooled connections.
+    """
+
+    def __init__(self, socket_options=None, **kwds):
+        self.socket_options = socket_options
+        super(_PoolAdapter, self).__init__(**kwds)
+
+    def init_poolmanager(self, *args, **kwds):
+        if self.socket_options is not None:
+            kwds['socket_options'] = self.socket_options
+        super(_PoolAdapter, self).init_poolmanager(*args, **kwds)
+
+
 class Client(AbstractClient):
     """
     Synchronous variant of the main API client.
     Uses a session for connection pooling.
     """
 
-    def __init__(self, endpoint=LOCALHOST_ENDPOINT):
+    def __init__(self, endpoint=LOCALHOST_ENDPOINT, decoded=False,
+                 json_decoder=None, cache=None, coalesce=False,
+                 pool_size=10, pool_hosts=10, pool_block=False,
+                 keep_alive=True, tcp_nodelay=True, rate_limiter=None,
+                 retry_policy=None, block_store=None, metrics=None,
+                 middleware=None):
         """
         Initialize client.
         :param endpoint: address of the NIS.
+        :param decoded: return decoded payloads instead of response objects.
+        :param json_decoder: (optional) function that decodes JSON from
+               body bytes.
+        :param cache: (optional) `ResponseCache` for responses.
+        :param coalesce: share one HTTP request between identical GET calls
+               made from different threads while it is in flight.
+        :param pool_size: maximum number of connections kept open per host.
+               Should be at least the number of threads sharing the client.
+        :param pool_hosts: number of hosts connection pools are kept for.
+        :param pool_block: wait for a free connection when `pool_size`
+               connections are in use, instead of opening and then
+               discarding an extra one.
+        :param keep_alive: reuse connections between calls.
+        :param tcp_nodelay: disable Nagle's algorithm on connections.
+        :param rate_limiter: (optional) `RateLimiter` for calls.
+        :param retry_policy: (optional) `RetryPolicy` for calls.
+        :param block_store: (optional) `BlockStore` for blocks.
+        :param metrics: (optional) `Metrics` of calls.
+        :param middleware: (optional) list of `Middleware` of calls.
         """
-        super(Client, self).__init__(endpoint)
+        super(Client, self).__init__(endpoint, decoded, json_decoder, cache,
+                                     coalesce, rate_limiter, retry_policy,
+                                     block_store, metrics, middleware)
+        self.pool_size = pool_size
         self.session = requests.Session()
+        adapter = _PoolAdapter(
+            socket_options=[(socket.IPPROTO_TCP, socket.TCP_NODELAY,
+                             int(tcp_nodelay))],
+            pool_connections=pool_hosts, pool_maxsize=pool_size,
+            pool_block=pool_block)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+        self._in_flight_lock = threading.Lock()
+        self._local = threading.local()
+        self._hedges = None
 
     def call(self, method, name, params=None, payload=None, **kwds):
         """
         Make calls to the API via HTTP methods and passed params.
-        :return: response object
+        :return: response object, or decoded payload if client is `decoded`.
+        """
+        if self.decoded:
+            return decode(name, self.call_json(method, name, params, payload,
+                                               **kwds))
+        return self._request(method, name, params, payload, **kwds)
+
+    def call_json(self, method, name, params=None, payload=None, **kwds):
+        """
+        Make calls to the API and decode JSON from the response body bytes.
+        :return: decoded JSON, or `None` if response body is empty.
+        """
+        store = self.block_store
+        if store is not None:
+            data = store.lookup(name, payload)
+            if data is not None:
+                return data
+        response = self._request(method, name, params, payload, **kwds)
+        response.raise_for_status()
+        content = response.content
+        start = _clock()
+        data = self.json_decoder(content) if content else None
+        if self.metrics is not None:
+            self.metrics.decode(name, _clock() - start)
+        if store is not None:
+            store.record(name, data)
+        if self.cache is not None:
+            self.cache.record(name, data)
+        return data
+
+    def _request(self, method, name, params, payload, **kwds):
+        """
+        Make the HTTP request through the middleware.
+        """
+        middleware = self.middleware
+        if not middleware:
+            return self._fetch(method, name, params, payload, **kwds)
+        if self._chain[0] is not middleware:
+            self._chain = (middleware, _handler(
+                [layer.handle for layer in middleware], self._fetch_call))
+        return self._chain[1](Call(method, name, params, payload, kwds))
+
+    def _fetch_call(self, call):
+        """
+        Make the HTTP request of a call which went through the middleware.
+        """
+        return self._fetch(call.method, call.name, call.params, call.payload,
+                           **(call.options or {}))
+
+    def _fetch(self, method, name, params, payload, **kwds):
+        """
+        Make the HTTP request, or get its response from the cache.
+        """
+        timeout = getattr(self._local, 'timeout', None)
+        if timeout is not None:
+            kwds.setdefault('timeout', timeout)
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(method, name, params, payload)
+            if key is not None:
+                response = self.cache.get(key)
+                if response is not None:
+                    return response
+        if self.coalesce and method == 'GET':
+            return self._coalesced(method, name, params, payload, key, **kwds)
+        return self._send(method, name, params, payload, key, **kwds)
+
+    def _coalesced(self, method, name, params, payload, key, **kwds):
+        """
+        Make the HTTP request, or wait for the identical one in flight
+        and share its response.
+        """
+        flight = _call_key(method, name, params)
+        with self._in_flight_lock:
+            future = self._in_flight.get(flight)
+            leader = future is None
+            if leader:
+                future = self._in_flight[flight] = Future()
+        if not leader:
+            return future.result()
+        try:
+            response = self._send(method, name, params, payload, key, **kwds)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[flight]
+        future.set_result(response)
+        return response
+
+    def _send(self, method, name, params, payload, key, **kwds):
+        """
+        Make the HTTP request and cache its response under `key`, if any.
+        """
+        if self.retry_policy is None:
+            response = self._dispatch(method, name, params, payload, **kwds)
+        else:
+            response = self._retry(method, name, params, payload, **kwds)
+        if key is not None and response.ok:
+            self.cache.put(key, response, len(response.content))
+        return response
+
+    def _retry(self, method, name, params, payload, **kwds):
+        """
+        Make the HTTP request following the retry policy.
+        Reads are retried on network errors and `statuses` of the policy,
+        other calls only if the connection could not be established.
+        """
+        policy = self.retry_policy
+        idempotent = policy.idempotent(method, name)
+        errors = ((requests.ConnectionError, requests.Timeout) if idempotent
+                  else requests.ConnectTimeout)
+        attempt = 0
+        while True:
+            last = attempt + 1 >= policy.attempts
+            start = _clock()
+            try:
+                if idempotent:
+                    response = self._hedged(method, name, params, payload,
+                                            **kwds)
+                else:
+                    response = self._dispatch(method, name, params, payload,
+                                              **kwds)
+            except errors:
+                if last:
+                    raise
+            else:
+                if last or not (idempotent and
+                                response.status_code in policy.statuses):
+                    if response.status_code < 500:
+                        policy.record(name, _clock() - start)
+                    return response
+            time.sleep(policy.delay(attempt))
+            attempt += 1
+
+    def _hedged(self, method, name, params, payload, **kwds):
+        """
+        Make the HTTP request, and if it takes longer than the hedge delay
+        of the policy, a second one. The first successful response wins.
+        """
+        delay = self.retry_policy.hedge_delay(name)
+        if delay is None:
+            return self._dispatch(method, name, params, payload, **kwds)
+        if self._hedges is None:
+            self._hedges = ThreadPoolExecutor(max_workers=2 * self.pool_size)
+        first = self._hedges.submit(self._dispatch, method, name, params,
+                                    payload, **kwds)
+        try:
+            return first.result(timeout=delay)
+        except TimeoutError:
+            pass
+        second = self._hedges.submit(self._dispatch, method, name, params,
+                                     payload, hedge=True, **kwds)
+        for future in as_completed([first, second]):
+            if future.exception() is None:
+                return future.result()
+        return first.result()
+
+    def _dispatch(self, method, name, params, payload, hedge=False, **kwds):
+        """
+        Make the HTTP request within the rate limit of its endpoint group.
+        """
+        metrics = self.metrics
+        if self.rate_limiter is not None:
+            delay = self.rate_limiter.reserve(name)
+            if delay:
+                time.sleep(delay)
+            if metrics is not None:
+                metrics.wait(name, delay)
+        if metrics is None:
+            return self._route(method, name, params, payload, hedge, **kwds)
+        start = _clock()
+        try:
+            response = self._route(method, name, params, payload, hedge,
+                                   **kwds)
+        except requests.RequestException:
+            metrics.request(name, _clock() - start, None)
+            raise
+        body = getattr(response.request, 'body', None)
+        metrics.request(name, _clock() - start, response.status_code,
+                        len(body or ''), len(response.content or ''))
+        return response
+
+    def _route(self, method, name, params, payload, hedge=False, **kwds):
         """
-        url = self.endpoint + '/' + name
+        Make the HTTP request to the NIS endpoint.
+        """
+        url = self._urls.get(name)
+        if url is None:
+            url = self._urls[name] = self.endpoint + '/' + name
         return self.session.request(method, url, params=params,
                                     json=payload, **kwds)
+
+    def batch(self, max_workers=None, timeout=None):
+        """
+        Make a batch of calls run in a thread pool sharing the session.
+        Use as a context manager, which waits for all calls on exit.
+        :param max_workers: (optional) maximum number of calls in flight,
+               `pool_size` by default.
+        :param timeout: (optional) timeout in seconds of each HTTP request
+               made by the calls.
+        :return: `Batch` instance.
+        """
+        return Batch(self, max_workers or self.pool_size, timeout)
+
+    def map(self, calls, max_workers=None, timeout=None,
+            return_exceptions=False):
+        """
+        Run calls in a thread pool sharing the session, see `batch`.
+        Calls which run longer than their own timeout fail with
+        `TimeoutError`, and are not waited for.
+        :param calls: iterable of callables without arguments, e.g.
+               `functools.partial(client.account.get, address)`, or of
+               `(callable, timeout)` pairs, with the number of seconds
+               the call may run.
+        :param return_exceptions: return exceptions of failed calls in
+               place of their results, instead of raising `BatchError`.
+        :return: list of results in the order of calls.
+        """
+        batch = self.batch(max_workers, timeout)
+        try:
+            for call in calls:
+                if isinstance(call, tuple):
+                    batch.submit(call[0], timeout=call[1])
+                else:
+                    batch.submit(call)
+            return batch.results(return_exceptions)
+        finally:
+            batch.close(wait=False)
+
+    def fetch_many(self, fetch, args, concurrency=None,
+                   return_exceptions=False):
+        """
+        Make a call for each of distinct arguments in a thread pool
+        sharing the session.
+        :return: mapping of arguments to results, in the order of arguments.
+        """
+        args = list(collections.OrderedDict.fromkeys(args))
+        with self.batch(concurrency) as batch:
+            for arg in args:
+                batch.submit(fetch, arg)
+        outcomes = []
+        for future in batch.futures:
+            error = future.exception()
+            outcomes.append((None if error else future.result(), error))
+        return _keyed(args, outcomes, return_exceptions)
+
+    def _run(self, timeout, fn, args, kwds):
+        """
+        Run a call of a batch with the timeout of its HTTP requests.
+        """
+        self._local.timeout = timeout
+        try:
+            return fn(*args, **kwds)
+        finally:
+            self._local.timeout = None
+
+    def paginate(self, fetch, cursor, start=None, page_size=None, stop=None):
+        """
+        Walk all pages of a paged API resource, item by item.
+        The next page is requested in a background thread while the current
+        one is consumed.
+        :return: generator of page items.
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(self._page, fetch, start)
+            while pending is not None:
+                items = pending.result()
+                pending = None
+                if stop is not None:
+                    last = next((i for i, item in enumerate(items)
+                                 if stop(item)), None)
+                    if last is not None:
+                        for item in items[:last]:
+                            yield item
+                        return
+                if items and (page_size is None or len(items) >= page_size):
+                    pending = executor.submit(self._page, fetch,
+                                              cursor(items[-1]))
+                for item in items:
+                    yield item
+
+    def fetch_pages(self, fetch, args, concurrency=1, stop=None,
+                    before=None):
+        """
+        Fetch a page of API resource for each of passed arguments
+        in a thread pool and walk their items in the order of arguments.
+        :return: generator of page items.
+        """
+        if before is not None:
+            before()
+        args = iter(args)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = collections.deque(
+                executor.submit(self._page, fetch, arg)
+                for arg in itertools.islice(args, concurrency))
+            try:
+                while pending:
+                    items = pending.popleft().result()
+                    for arg in itertools.islice(args, 1):
+                        pending.append(executor.submit(self._page, fetch, arg))
+                    for item in items:
+                        if stop is not None and stop(item):
+                            return
+                        yield item
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def follow(self, fetch, follower, min_interval=1, max_interval=15):
+        """
+        Walk the items of a growing API resource as they appear,
+        polling it with exponential backoff.
+        :return: endless generator of items.
+        """
+        interval = min_interval
+        while True:
+            items, more = follower.accept(self._page(fetch, follower.cursor))
+            for item in items:
+                yield item
+            if more:
+                continue
+            interval = min_interval if items else min(max_interval,
+                                                      interval * 2)
+            time.sleep(interval)
+
+    def _page(self, fetch, arg):
+        """
+        Make the call for a page and get its items.
+        `fetch` can also return JSON payload of the page.
+        """
+        response = fetch(arg)
+        if self.decoded:
+            return response
+        if isinstance(response, dict):
+            return response['data']
+        response.raise_for_status()
+        return self.json_decoder(response.content)['data']
+
+
+class Batch(object):
+    """
+    Batch of calls of a synchronous client, run in a thread pool.
+    """
+
+    def __init__(self, client, max_workers, timeout=None):
+        """
+        Initialize batch.
+        :param client: client the calls are made with.
+        :param max_workers: maximum number of calls in flight.
+        :param timeout: (optional) timeout in seconds of each HTTP request
+               made by the calls.
+        """
+        self.client = client
+        self.timeout = timeout
+        self.futures = []
+        self._timeouts = []
+        self._started = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self, wait=True):
+        """
+        Stop taking calls.
+        :param wait: wait for the calls in flight to end.
+        """
+        self._executor.shutdown(wait=wait)
+
+    def submit(self, fn, *args, **kwds):
+        """
+        Schedule a call, e.g. `batch.submit(client.account.get, address)`.
+        A `timeout` keyword argument is taken by the batch: the number of
+        seconds the call may run, also the timeout of its HTTP requests.
+        `results` reports the call as failed with `TimeoutError` if it
+        runs longer.
+        :return: future of the call result.
+        """
+        timeout = kwds.pop('timeout', None)
+        future = self._executor.submit(self._run, len(self.futures),
+                                       timeout, fn, args, kwds)
+        self.futures.append(future)
+        self._timeouts.append(timeout)
+        return future
+
+    def results(self, return_exceptions=False):
+        """
+        Wait for all calls and get their results in the order of submission.
+        Calls still running after their timeout are not waited for.
+        :param return_exceptions: return exceptions of failed calls in place
+               of their results, instead of raising `BatchError`.
+        :return: list of results.
+        """
+        results = []
+        errors = {}
+        for i, future in enumerate(self.futures):
+            error = self._wait(i, future)
+            if error is not None:
+                errors[i] = error
+            results.append(future.result() if error is None else error)
+        if errors and not return_exceptions:
+            raise BatchError(results, errors)
+        return results
+
+    def _run(self, i, timeout, fn, args, kwds):
+        """
+        Run a call, failing it if it ran longer than its timeout.
+        """
+        start = self._started[i] = _clock()
+        result = self.client._run(self.timeout if timeout is None
+                                  else timeout, fn, args, kwds)
+        if timeout is not None and _clock() - start > timeout:
+            raise _timed_out(timeout)
+        return result
+
+    def _wait(self, i, future):
+        """
+        Wait for a call until it ends or its timeout passes.
+        :return: error of the call, or `None` if it succeeded.
+        """
+        timeout = self._timeouts[i]
+        if timeout is None:
+            return future.exception()
+        while True:
+            start = self._started.get(i)
+            remaining = timeout if start is None else \
+                start + timeout - _clock()
+            try:
+                return future.exception(max(remaining, 0))
+            except TimeoutError:
+                if start is not None:
+                    return _timed_out(timeout)
+
+
+def _timed_out(timeout):
+    """
+    Gets the error of a call of a batch which ran out of time.
+    """
+    return TimeoutError('call timed out after {0} seconds'.format(timeout))
+
+
+class PooledClient(Client):
+    """
+    Synchronous client for a pool of NIS nodes.
+    Routes calls to the fastest node in sync with the highest chain seen
+    and fails over to the next one on errors.
+    """
+
+    def __init__(self, endpoints, max_lag=2, refresh_interval=30,
+                 probe_timeout=5, **kwds):
+        """
+        Initialize client.
+        :param endpoints: addresses of the NIS nodes, or `EndpointPool`.
+        :param max_lag: number of blocks a node can be behind the highest
+               chain seen and still serve calls.
+        :param refresh_interval: number of seconds between probes of nodes.
+        :param probe_timeout: timeout of a probe request in seconds.
+        :param kwds: any arguments of `Client`.
+        """
+        if not isinstance(endpoints, EndpointPool):
+            endpoints = EndpointPool(endpoints, max_lag, refresh_interval)
+        self.pool = endpoints
+        self.probe_timeout = probe_timeout
+        self._refreshed = False
+        kwds.setdefault('pool_hosts', max(10, len(self.pool.endpoints)))
+        super(PooledClient, self).__init__(self.pool.endpoints[0], **kwds)
+
+    def refresh(self):
+        """
+        Probe all nodes of the pool concurrently with `status` and
+        `chain/height` requests, updating their latency, status and height.
+        """
+        endpoints = self.pool.endpoints
+        with ThreadPoolExecutor(max_workers=len(endpoints)) as executor:
+            for _ in executor.map(self.probe, endpoints):
+                pass
+        self._refreshed = True
+
+    def _refresh_due(self):
+        """
+        Refresh the pool if probes are due. Only the first refresh, without
+        which there is no ranking, is made by the call itself; later ones
+        run in a background thread while calls use the current ranking.
+        """
+        if not self.pool.due():
+            return
+        if not self._refreshed:
+            self.refresh()
+            return
+        thread = threading.Thread(target=self.refresh,
+                                  name='nemnis-pool-refresh')
+        thread.daemon = True
+        thread.start()
+
+    def probe(self, endpoint, add=False):
+        """
+        Probe a node and record the result in the pool.
+        :param add: add the node to the pool, if it is not there and the
+               probe shows it can serve calls.
+        :return: `status` response JSON, or `None` if the probe failed.
+        """
+        try:
+            start = _clock()
+            status = self._node_json(endpoint, 'status')
+            latency = _clock() - start
+            height = self._node_json(endpoint, 'chain/height')
+            self.pool.update(endpoint, latency, status['code'],
+                             height['height'], add)
+            return status
+        except (requests.RequestException, ValueError, KeyError, TypeError):
+            self.pool.failed(endpoint)
+
+    def _node_json(self, endpoint, name):
+        """
+        Make GET request to API endpoint of the given node, bypassing the
+        routing, and decode its JSON.
+        """
+        response = self.session.get(endpoint + '/' + name,
+                                    timeout=self.probe_timeout)
+        response.raise_for_status()
+        return self.json_decoder(response.content)
+
+    def _route(self, method, name, params, payload, hedge=False, **kwds):
+        """
+        Make the HTTP request to the best node of the pool, or the second
+        best one for a hedge.
+        Reads are retried on the next nodes if a node can not be reached or
+        responds with a server error.
+        """
+        self._refresh_due()
+        endpoints = self.pool.ranked()
+        if hedge:
+            endpoints = endpoints[1:] + endpoints[:1]
+        if not self.pool.is_read(method, name):
+            endpoints = endpoints[:1]
+        last = len(endpoints) - 1
+        for i, endpoint in enumerate(endpoints):
+            start = _clock()
+            try:
+                response = self.session.request(
+                    method, endpoint + '/' + name, params=params,
+                    json=payload, **kwds)
+            except requests.RequestException:
+                self.pool.failed(endpoint)
+                if i == last:
+                    raise
+                continue
+            if response.status_code >= 500:
+                self.pool.failed(endpoint)
+                if i < last:
+                    continue
+            else:
+                self.pool.succeeded(endpoint, _clock() - start)
+            return response
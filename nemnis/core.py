@@ -19,12 +19,25 @@ __email__ = "semolex@live.com"
 '''
 
 import abc
+import collections
+import functools
+import importlib
+import json
 import six
+import time
 
 __all__ = [
     'STATUS_LIST',
     'LOCALHOST_ENDPOINT',
+    'TRANSFERS_PAGE_SIZE',
+    'BLOCKS_AFTER_SIZE',
+    'HISTORICAL_DATA_SIZE',
+    'NAMESPACE_PAGE_SIZE',
+    'JSON_DECODER',
     'explain_status',
+    'BatchError',
+    'Call',
+    'Middleware',
     'AbstractClient',
     'Account',
     'BlockChain',
@@ -49,36 +62,310 @@ STATUS_LIST = [
 
 LOCALHOST_ENDPOINT = 'http://127.0.0.1:7890'
 
+TRANSFERS_PAGE_SIZE = 25
+
+BLOCKS_AFTER_SIZE = 10
+
+HISTORICAL_DATA_SIZE = 1000
+
+NAMESPACE_PAGE_SIZE = 100
+
+
+def _json_decoder():
+    """
+    Picks the fastest installed JSON decoder, falling back to `json` module.
+    All of them decode raw body bytes without an intermediate `str`.
+
+    :return: function that decodes JSON document.
+    """
+    for name in ('orjson', 'simdjson', 'ujson'):
+        try:
+            return importlib.import_module(name).loads
+        except ImportError:
+            pass
+    return json.loads
+
+
+JSON_DECODER = _json_decoder()
+
+_clock = getattr(time, 'monotonic', time.time)
+
 
 def explain_status(response):
     """
     Modifies status response to make it verbose.
-    Gets status message related to response code.
+    Gets status message related to response code, "Unknown status" for
+    codes out of the list.
 
     :param response: response from `client.status` resource.
     :return: dict with modified status response
     """
-    verbose = STATUS_LIST[response['code']]
+    code = response['code']
+    if not (isinstance(code, int) and 0 <= code < len(STATUS_LIST)):
+        code = 0
+    verbose = STATUS_LIST[code]
     response['verbose'] = verbose
     return response
 
 
+class BatchError(Exception):
+    """
+    Raised when some calls of a batch failed.
+    Keeps results of all calls, with exceptions in place of failed ones.
+    """
+
+    def __init__(self, results, errors):
+        """
+        :param results: results of all calls in the order of submission,
+               or mapping of their arguments to results.
+        :param errors: mapping of indexes or arguments of failed calls to
+               exceptions.
+        """
+        self.results = results
+        self.errors = errors
+        super(BatchError, self).__init__(
+            '{0} of {1} calls failed'.format(len(self.errors), len(results)))
+
+
+Call = collections.namedtuple('Call', 'method name params payload options')
+Call.__new__.__defaults__ = (None,)
+Call.__doc__ = """
+Immutable description of a call of API endpoint method, passed through
+the middleware of a client. Use `call._replace(...)` to change it.
+`options` are keyword arguments of the request, such as `timeout`.
+"""
+
+
+class Middleware(object):
+    """
+    Base class of middleware, which runs around the HTTP requests of both
+    synchronous and asynchronous clients.
+    Each middleware handles a call by passing it on to the next handler:
+    the next middleware of the client, the last one to the request itself.
+    Override `handle` for `Client`, and define a coroutine method
+    `ahandle(call, next)` with the same arguments for `AsyncioClient`, to
+    wait, retry or re-issue calls. Without them the hooks run, which are
+    shared by the clients and so must not block: in order before the
+    request, and in reverse order after it. Override the hooks that are
+    needed, the defaults do nothing.
+    """
+
+    def handle(self, call, next):
+        """
+        Handles a call of a synchronous client.
+        :param call: `Call` to be made.
+        :param next: function that makes a `Call` through the rest of the
+               middleware and gets its response. May be called any number
+               of times.
+        :return: response of the call.
+        """
+        result = self.on_request(call)
+        if not isinstance(result, Call):
+            return self.on_response(call, result)
+        try:
+            response = next(result)
+        except Exception as error:
+            response = self.on_error(call, error)
+            if response is None:
+                raise
+            return response
+        return self.on_response(call, response)
+
+    def on_request(self, call):
+        """
+        Called before the request.
+        :param call: `Call` to be made.
+        :return: `Call` to be made instead, usually the same one. Any other
+                 value is used as the response: the request is not made
+                 and middleware after this one is skipped.
+        """
+        return call
+
+    def on_response(self, call, response):
+        """
+        Called after the request with its response.
+        :param call: `Call` this middleware received in `on_request`.
+        :param response: response object of the HTTP library.
+        :return: response to be returned instead, usually the same one.
+        """
+        return response
+
+    def on_error(self, call, error):
+        """
+        Called if the request raised an error.
+        :param call: `Call` this middleware received in `on_request`.
+        :param error: the exception.
+        :return: response to be returned instead of raising the error,
+                 or `None` to raise it. Middleware before this one gets
+                 it in `on_response`.
+        """
+        return None
+
+
+def _handler(handlers, fetch):
+    """
+    Chains handlers of middleware around a function that makes a call.
+
+    :param handlers: `handle` functions of middleware, outermost first.
+    :param fetch: function that takes a `Call` and makes the request.
+    :return: function that takes a `Call` and gets its response.
+    """
+    handler = fetch
+    for handle in reversed(handlers):
+        handler = functools.partial(handle, next=handler)
+    return handler
+
+
+def _keyed(args, outcomes, return_exceptions):
+    """
+    Gets results of calls by their arguments.
+
+    :param args: arguments of the calls.
+    :param outcomes: `(result, error)` pairs of the calls, in the same order.
+    :param return_exceptions: return exceptions of failed calls in place
+           of their results, instead of raising `BatchError`.
+    :return: ordered mapping of arguments to results.
+    """
+    results = collections.OrderedDict()
+    errors = {}
+    for arg, (result, error) in zip(args, outcomes):
+        if error is not None:
+            errors[arg] = result = error
+        results[arg] = result
+    if errors and not return_exceptions:
+        raise BatchError(results, errors)
+    return results
+
+
+def _meta_id(item):
+    """
+    Gets the database id of a paged item, used as cursor for the next page.
+
+    :param item: item with `meta` data, e.g. `TransactionMetaDataPair`.
+    :return: id of the item.
+    """
+    return item['meta']['id']
+
+
+def _call_key(method, name, params=None, payload=None):
+    """
+    Gets a key which is equal for identical calls of API endpoint.
+    Params with `None` value are not sent, so they are skipped.
+
+    :return: hashable key of the call.
+    """
+    if params:
+        params = tuple(sorted((k, v) for k, v in params.items()
+                              if v is not None))
+    if payload is not None:
+        payload = json.dumps(payload, sort_keys=True)
+    return method, name, params or None, payload
+
+
+def _prev_block_hash(item):
+    """
+    Gets the hash of the previous block of `ExplorerBlockViewModel`.
+    Decoded blocks have it unwrapped from the `Hash` object.
+    """
+    prev = item['block']['prevBlockHash']
+    return prev['data'] if isinstance(prev, dict) else prev
+
+
+class _ChainFollower(object):
+    """
+    State of a walk along the growing block chain, see `BlockChain.follow`.
+    Keeps hashes of the recently walked blocks, to detect blocks that were
+    replaced by a fork of the chain.
+    """
+
+    def __init__(self, from_height, depth):
+        """
+        :param from_height: height of the first block to walk.
+        :param depth: number of recent blocks re-checked for a fork.
+        """
+        self.cursor = from_height - 1
+        self.recent = collections.deque(maxlen=depth)
+
+    def accept(self, items):
+        """
+        Takes the blocks after `cursor`. If the first of them does not follow
+        the last walked block, the chain was forked: the cursor steps back
+        by one block and nothing is taken.
+
+        :param items: `ExplorerBlockViewModel` objects after `cursor`.
+        :return: `(blocks, more)` pair, where blocks are the new ones to be
+                 walked, and more is true if the next blocks should be
+                 requested without a delay.
+        """
+        if not items:
+            return [], False
+        if self.recent and _prev_block_hash(items[0]) != self.recent[-1]:
+            self.recent.pop()
+            self.cursor -= 1
+            return [], True
+        for item in items:
+            self.recent.append(item['hash'])
+        self.cursor += len(items)
+        return items, len(items) >= BLOCKS_AFTER_SIZE
+
+
 @six.add_metaclass(abc.ABCMeta)
 class AbstractClient():
     """
     Abstract base class that represents main API client.
-    Make calls to NIS via related methods.
+    Make calls to NIS via related methods, grouped like the API in
+    `account`, `blockchain`, `node`, `namespace`, `transaction` and `debug`.
     For all required information, please follow:
     https://nemproject.github.io/
     All available methods documentation is also can be found there.
     """
 
-    def __init__(self, endpoint):
+    def __init__(self, endpoint, decoded=False, json_decoder=None,
+                 cache=None, coalesce=False, rate_limiter=None,
+                 retry_policy=None, block_store=None, metrics=None,
+                 middleware=None):
         """
         Initialize client.
         :param endpoint: address of the NIS.
+        :param decoded: return decoded payloads (see `nemnis.models`)
+               instead of response objects.
+        :param json_decoder: (optional) function that decodes JSON from
+               body bytes, `JSON_DECODER` is used by default.
+        :param cache: (optional) `ResponseCache` for responses of immutable
+               and slow-changing endpoints.
+        :param coalesce: share one HTTP request between identical GET calls
+               made while it is in flight.
+        :param rate_limiter: (optional) `RateLimiter` which delays calls
+               over the budget of their endpoint group.
+        :param retry_policy: (optional) `RetryPolicy` for failed and slow
+               calls.
+        :param block_store: (optional) `BlockStore` which keeps fetched
+               final blocks and serves block reads decoded from JSON.
+        :param metrics: (optional) `Metrics` which records latency, sizes
+               and status codes of HTTP requests, wait and decode times.
+        :param middleware: (optional) list of `Middleware` run around the
+               requests of calls, in order.
         """
         self.endpoint = endpoint
+        self.decoded = decoded
+        self.json_decoder = json_decoder or JSON_DECODER
+        self.cache = cache
+        self.coalesce = coalesce
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.block_store = block_store
+        self.metrics = metrics
+        self.middleware = tuple(middleware or ())
+        # middleware and the chain of their handlers, built on first use
+        self._chain = ((), None)
+        self._in_flight = {}
+        # endpoint groups, created once and shared by all calls
+        self.account = Account(self)
+        self.blockchain = BlockChain(self)
+        self.node = Node(self)
+        self.namespace = Namespace(self)
+        self.transaction = Transaction(self)
+        self.debug = Debug(self)
 
     @abc.abstractmethod
     def call(self, method, name, params=None, payload=None, **kwds):
@@ -90,89 +377,137 @@ class AbstractClient():
         :param params: GET method params, used when method is GET.
         :param payload: POST method data, used when method is POST.
         :param kwds: any additional arguments.
+        :return: response object, or decoded payload if client is `decoded`.
+               Successful responses of cached endpoints are served from
+               `cache`, if it is set. If client `coalesce`s calls, identical
+               GET calls in flight share one response object.
+               Requests go through `middleware` of the client, if any.
         """
 
-    def heartbeat(self):
-        """
-        Implements https://nemproject.github.io/#heart-beat-request
-        Determines if NIS is up and responsive.
-        If there is no response to this request, NIS is either not running or
-        is in a state where it can't serve requests.
+    @abc.abstractmethod
+    def call_json(self, method, name, params=None, payload=None, **kwds):
         """
-        return self.call('GET', 'heartbeat')
+        Make calls to the API like `call` and decode JSON of the response
+        directly from the body bytes with `json_decoder`.
+        Raises an error of the HTTP library if the request failed.
+        Blocks are read from `block_store`, if it is set and has them.
 
-    def status(self):
-        """
-        Implements https://nemproject.github.io/#status-request
-        Determines the status of NIS.
-        If there is no response to this request, NIS is either not running or
-        is in a state where it can't serve requests
+        :return: decoded JSON, or `None` if response body is empty.
         """
-        return self.call('GET', 'status')
 
-    @property
-    def account(self):
+    @abc.abstractmethod
+    def paginate(self, fetch, cursor, start=None, page_size=None, stop=None):
         """
-        Represents account related requests from API.
+        Walk all pages of a paged API resource, item by item.
+        The next page is requested while the current one is consumed.
 
-        :return: Account instance for use with it's methods.
+        :param fetch: callable that takes the cursor of the page (`None` for
+               the most recent one) and makes the call for it.
+        :param cursor: callable that gets the cursor of the next page from
+               the last item of the current one.
+        :param start: (optional) cursor of the first page.
+        :param page_size: (optional) maximum number of items in a page.
+               Page with less items is treated as the last one.
+        :param stop: (optional) predicate that ends the walk at the first
+               item it is true for. Pages after it are not requested.
         """
-        return Account(self)
 
-    @property
-    def blockchain(self):
+    @abc.abstractmethod
+    def fetch_pages(self, fetch, args, concurrency=1, stop=None,
+                    before=None):
         """
-        Represents block chain related requests from API.
+        Fetch a page of API resource for each of passed arguments
+        concurrently and walk their items in the order of arguments.
+        At most `concurrency` pages are requested or held at once.
 
-        :return: BlockChain instance for use with its methods.
+        :param fetch: callable that takes an argument and makes the call for
+               its page.
+        :param args: iterable of arguments, one per page.
+        :param concurrency: maximum number of calls in flight.
+        :param stop: (optional) predicate that ends the walk at the first
+               item it is true for.
+        :param before: (optional) callable that makes a call before the
+               pages are requested, when the walk starts.
         """
-        return BlockChain(self)
 
-    @property
-    def node(self):
+    @abc.abstractmethod
+    def fetch_many(self, fetch, args, concurrency=None,
+                   return_exceptions=False):
         """
-        Represents node related requests from API.
+        Make a call for each of distinct arguments concurrently.
+        Calls are bounded by the rate limiter and concurrency limits of
+        the client, like any others.
 
-        :return: Node instance for use with its methods.
+        :param fetch: callable that takes an argument and makes the call.
+        :param args: iterable of arguments, duplicates are called once.
+        :param concurrency: (optional) maximum number of calls in flight,
+               the size of the connection pool by default.
+        :param return_exceptions: return exceptions of failed calls in place
+               of their results, instead of raising `BatchError`.
+        :return: ordered mapping of arguments to results.
         """
-        return Node(self)
 
-    @property
-    def namespace(self):
+    @abc.abstractmethod
+    def follow(self, fetch, follower, min_interval=1, max_interval=15):
         """
-        Represents namespaces related requests from API.
+        Walk the items of a growing API resource as they appear.
+        Pages are requested one after another while `follower` asks for
+        more, then polled with exponential backoff from `min_interval`
+        to `max_interval` seconds, reset when new items arrive.
 
-        :return: Namespace instance for use with its methods.
+        :param fetch: callable that takes the cursor of the follower and
+               makes the call for the items after it.
+        :param follower: object with `cursor` attribute and `accept(items)`
+               method, which returns the new items and whether the next
+               page should be requested at once.
+        :param min_interval: delay in seconds before polling again after
+               new items arrived.
+        :param max_interval: maximum delay in seconds between polls.
         """
-        return Namespace(self)
 
-    @property
-    def transaction(self):
+    def heartbeat(self):
+        """
+        Implements https://nemproject.github.io/#heart-beat-request
+        Determines if NIS is up and responsive.
+        If there is no response to this request, NIS is either not running or
+        is in a state where it can't serve requests.
         """
-        Represents transaction related requests methods from API.
+        return self.call('GET', 'heartbeat')
 
-        :return: Transaction instance for use with its methods.
+    def status(self):
         """
-        return Transaction(self)
+        Implements https://nemproject.github.io/#status-request
+        Determines the status of NIS.
+        If there is no response to this request, NIS is either not running or
+        is in a state where it can't serve requests
+        """
+        return self.call('GET', 'status')
 
     @property
-    def debug(self):
+    def endpoint(self):
         """
-        Represents requests for additional information from NIS.
-
-        :return: Transaction instance for use with its methods.
+        Address of the NIS.
         """
-        return Debug(self)
+        return self._endpoint
+
+    @endpoint.setter
+    def endpoint(self, endpoint):
+        self._endpoint = endpoint
+        # URLs of API endpoint methods, joined once per name
+        self._urls = {}
 
 
-class Account:
+class Account(object):
     """
     Implements account related methods from API.
     https://nemproject.github.io/#account-related-requests
     """
 
+    __slots__ = ('client',)
+
+    name = 'account/'
+
     def __init__(self, client):
-        self.name = 'account/'
         self.client = client
 
     def generate(self):
@@ -181,7 +516,7 @@ class Account:
         Generates a `KeyPairViewModel`
         (https://nemproject.github.io/#keyPairViewModel).
         """
-        return self.client.call('GET', self.name + 'generate')
+        return self.client.call('GET', 'account/generate')
 
     def get(self, address):
         """
@@ -192,7 +527,7 @@ class Account:
 
         :param address: the address of the account.
         """
-        return self.client.call('GET', self.name + 'get',
+        return self.client.call('GET', 'account/get',
                                 params={'address': address})
 
     def get_from_public_key(self, pub_key):
@@ -204,7 +539,7 @@ class Account:
 
         :param pub_key: The public key of the account as hex string.
         """
-        return self.client.call('GET', self.name + 'get/from-public-key',
+        return self.client.call('GET', 'account/get/from-public-key',
                                 params={'publicKey': pub_key})
 
     def get_forwarded(self, address):
@@ -221,7 +556,7 @@ class Account:
         :param address: the address of the delegate account.
 
         """
-        return self.client.call('GET', self.name + 'get/forwarded',
+        return self.client.call('GET', 'account/get/forwarded',
                                 params={'address': address})
 
     def get_forwarded_from_public_key(self, pub_key):
@@ -234,9 +569,24 @@ class Account:
         :param pub_key: the public key of the account as hex string.
         """
         return self.client.call('GET',
-                                self.name + 'get/forwarded/from-public-key',
+                                'account/get/forwarded/from-public-key',
                                 params={'publicKey': pub_key})
 
+    def get_many(self, addresses, concurrency=None, return_exceptions=False):
+        """
+        Gets `AccountMetaDataPair` objects of many accounts with concurrent
+        `get` calls, one per distinct address.
+        With `AsyncioClient` a coroutine is returned.
+
+        :param addresses: iterable of addresses of the accounts.
+        :param concurrency: (optional) maximum number of calls in flight.
+        :param return_exceptions: return exceptions of failed calls in place
+               of their results, instead of raising `BatchError` with them.
+        :return: ordered mapping of addresses to results of `get`.
+        """
+        return self.client.fetch_many(self.get, addresses, concurrency,
+                                      return_exceptions)
+
     def status(self, address):
         """
         Implements https://nemproject.github.io/#requesting-the-account-status
@@ -246,9 +596,25 @@ class Account:
 
         :param address: the address of the account.
         """
-        return self.client.call('GET', self.name + 'status',
+        return self.client.call('GET', 'account/status',
                                 params={'address': address})
 
+    def status_many(self, addresses, concurrency=None,
+                    return_exceptions=False):
+        """
+        Gets `AccountMetaData` objects of many accounts with concurrent
+        `status` calls, one per distinct address.
+        With `AsyncioClient` a coroutine is returned.
+
+        :param addresses: iterable of addresses of the accounts.
+        :param concurrency: (optional) maximum number of calls in flight.
+        :param return_exceptions: return exceptions of failed calls in place
+               of their results, instead of raising `BatchError` with them.
+        :return: ordered mapping of addresses to results of `status`.
+        """
+        return self.client.fetch_many(self.status, addresses, concurrency,
+                                      return_exceptions)
+
     def transfers_incoming(self, address, _hash=None, _id=None):
         """
         Implements https://nemproject.github.io/#requesting-transaction-data-for-an-account
@@ -267,7 +633,7 @@ class Account:
         :param _id: (optional) the transaction id up to which transactions are
                     returned.
         """
-        return self.client.call('GET', self.name + 'transfers/incoming',
+        return self.client.call('GET', 'account/transfers/incoming',
                                 params={'address': address,
                                         'hash': _hash,
                                         'id': _id})
@@ -287,7 +653,7 @@ class Account:
         :param _id: (optional) the transaction id up to which transactions are
                     returned.
         """
-        return self.client.call('GET', self.name + 'transfers/outgoing',
+        return self.client.call('GET', 'account/transfers/outgoing',
                                 params={'address': address,
                                         'hash': _hash,
                                         'id': _id})
@@ -307,11 +673,54 @@ class Account:
         :param _id: (optional) the transaction id up to which transactions are
                     returned.
         """
-        return self.client.call('GET', self.name + 'transfers/all',
+        return self.client.call('GET', 'account/transfers/all',
                                 params={'address': address,
                                         'hash': _hash,
                                         'id': _id})
 
+    def iter_transfers_incoming(self, address, _id=None):
+        """
+        Iterates over all incoming `TransactionMetaDataPair` objects of an
+        account, walking `transfers_incoming` pages from the most recent one.
+        With `AsyncioClient` an asynchronous generator is returned.
+
+        :param address: the address of the account.
+        :param _id: (optional) the transaction id up to which transactions are
+                    returned.
+        """
+        return self.client.paginate(
+            lambda cursor: self.transfers_incoming(address, _id=cursor),
+            _meta_id, start=_id, page_size=TRANSFERS_PAGE_SIZE)
+
+    def iter_transfers_outgoing(self, address, _id=None):
+        """
+        Iterates over all outgoing `TransactionMetaDataPair` objects of an
+        account, walking `transfers_outgoing` pages from the most recent one.
+        With `AsyncioClient` an asynchronous generator is returned.
+
+        :param address: the address of the account.
+        :param _id: (optional) the transaction id up to which transactions are
+                    returned.
+        """
+        return self.client.paginate(
+            lambda cursor: self.transfers_outgoing(address, _id=cursor),
+            _meta_id, start=_id, page_size=TRANSFERS_PAGE_SIZE)
+
+    def iter_transfers_all(self, address, _id=None):
+        """
+        Iterates over all `TransactionMetaDataPair` objects for which an
+        account is the sender or receiver, walking `transfers_all` pages
+        from the most recent one.
+        With `AsyncioClient` an asynchronous generator is returned.
+
+        :param address: the address of the account.
+        :param _id: (optional) the transaction id up to which transactions are
+                    returned.
+        """
+        return self.client.paginate(
+            lambda cursor: self.transfers_all(address, None, _id=cursor),
+            _meta_id, start=_id, page_size=TRANSFERS_PAGE_SIZE)
+
     def unconfirmed_transactions(self, address):
         """
         Implements https://nemproject.github.io/#requesting-transaction-data-for-an-account
@@ -323,7 +732,7 @@ class Account:
 
         :param address: the address of the account.
         """
-        return self.client.call('GET', self.name + 'unconfirmedTransactions',
+        return self.client.call('GET', 'account/unconfirmedTransactions',
                                 params={'address': address})
 
     def _transfers_incoming(self, private_key, _hash=None, _id=None):
@@ -391,7 +800,7 @@ class Account:
         :param _hash: the 256 bit sha3 hash of the block up to which harvested
                blocks are returned.
         """
-        return self.client.call('GET', self.name + 'harvests',
+        return self.client.call('GET', 'account/harvests',
                                 params={'address': address, 'hash': _hash})
 
     def importances(self):
@@ -399,7 +808,7 @@ class Account:
         Implements https://nemproject.github.io/#retrieving-account-importances-for-accounts
         Gets an array of account importance view model objects.
         """
-        return self.client.call('GET', self.name + 'importances')
+        return self.client.call('GET', 'account/importances')
 
     def namespace_page(self, address, parent, _id, page_size=None):
         """
@@ -416,7 +825,7 @@ class Account:
                 are returned.
         :param page_size: (optional) number of namespaces to be returned.
         """
-        return self.client.call('GET', self.name + 'namespace/page',
+        return self.client.call('GET', 'account/namespace/page',
                                 params={'address': address,
                                         'parent': parent,
                                         'id': _id,
@@ -436,7 +845,7 @@ class Account:
         :param _id: (optional) mosaic definition database id up to which mosaic
                definitions are returned.
         """
-        return self.client.call('GET', self.name + 'mosaic/definition/page',
+        return self.client.call('GET', 'account/mosaic/definition/page',
                                 params={'address': address,
                                         'parent': parent,
                                         'id': _id})
@@ -449,7 +858,7 @@ class Account:
 
         :param address: the address of the account.
         """
-        return self.client.call('GET', self.name + 'mosaic/owned',
+        return self.client.call('GET', 'account/mosaic/owned',
                                 params={'address': address})
 
     def unlock(self, private_key):
@@ -462,7 +871,7 @@ class Account:
         :param private_key: A PrivateKey JSON object:
                (https://nemproject.github.io/#privateKey)
         """
-        return self.client.call('POST', self.name + 'unlock',
+        return self.client.call('POST', 'account/unlock',
                                 payload={'value': private_key})
 
     def lock(self, private_key):
@@ -475,7 +884,7 @@ class Account:
         :param private_key: A PrivateKey JSON object:
                (https://nemproject.github.io/#privateKey)
         """
-        return self.client.call('POST', self.name + 'lock',
+        return self.client.call('POST', 'account/lock',
                                 payload={'value': private_key})
 
     def unlocked_info(self):
@@ -484,7 +893,7 @@ class Account:
         Gives information about the maximum number of allowed harvesters and
         how many harvesters are already using the node.
         """
-        return self.client.call('POST', self.name + 'unlocked/info')
+        return self.client.call('POST', 'account/unlocked/info')
 
     def historical_get(self, address, start_height, end_height, inc):
         """
@@ -508,41 +917,72 @@ class Account:
                     NIS can supply up to 1000 data points with one request.
                     Requesting more than 1000 data points results in an error.
         """
-        return self.client.call('GET', self.name + 'historical/get',
+        return self.client.call('GET', 'account/historical/get',
                                 params={'address': address,
                                         'startHeight': start_height,
                                         'endHeight': end_height,
                                         'increment': inc})
 
+    def historical_range(self, address, start_height, end_height, inc=1,
+                         concurrency=4):
+        """
+        Iterates over `AccountHistoricalDataViewModel` JSON objects
+        (https://nemproject.github.io/#accountHistoricalDataViewModel) of an
+        account from `start_height` to `end_height`, in height order.
+        The range is split into windows of `historical_get` calls of up to
+        1000 data points, which are fetched concurrently, so it can be of any
+        length. Collect the points with `HistoricalSeries` to get columns.
+        With `AsyncioClient` an asynchronous generator is returned.
 
-class BlockChain:
+        :param address: the address of the account.
+        :param start_height: height of the first data point.
+        :param end_height: height up to which the data points are supplied.
+        :param inc: the value by which the height is incremented between
+               each data point.
+        :param concurrency: maximum number of windows fetched at once.
+        """
+        if inc < 1 or start_height > end_height:
+            raise ValueError('inc must be positive and start_height must not '
+                             'be greater than end_height')
+        window = HISTORICAL_DATA_SIZE * inc
+        starts = six.moves.range(start_height, end_height + 1, window)
+        return self.client.fetch_pages(
+            lambda start: self.historical_get(
+                address, start, min(end_height, start + window - inc), inc),
+            starts, concurrency)
+
+
+class BlockChain(object):
     """
     Implements block chain related methods from API.
     https://nemproject.github.io/#block-chain-related-requests
     """
 
+    __slots__ = ('client',)
+
+    name = 'chain/'
+
     def __init__(self, client):
-        self.name = 'chain/'
         self.client = client
 
     def height(self):
         """
         Gets the current height of the block chain.
         """
-        return self.client.call('GET', self.name + 'height')
+        return self.client.call('GET', 'chain/height')
 
     def score(self):
         """
         Gets the current score of the block chain.
         """
-        return self.client.call('GET', self.name + 'score')
+        return self.client.call('GET', 'chain/score')
 
     def last_block(self):
         """
         Gets the current last block of the chain.
 
         """
-        return self.client.call('GET', self.name + 'last-block')
+        return self.client.call('GET', 'chain/last-block')
 
     def at_public(self, block_height):
         """
@@ -572,15 +1012,94 @@ class BlockChain:
             'height': block_height
         })
 
-
-class Node:
+    def _blocks_after(self, block_height):
+        """
+        Gets blocks after given height for the block walks. Client with
+        a block store gets them as JSON, so they can be read from it.
+        """
+        if self.client.block_store is None or self.client.decoded:
+            return self.local_chain_blocks_after(block_height)
+        return self.client.call_json('POST', 'local/chain/blocks-after',
+                                     payload={'height': block_height})
+
+    def iter_blocks(self, start_height, end_height, concurrency=4,
+                    tip=None):
+        """
+        Iterates over `ExplorerBlockViewModel` JSON objects
+        (https://nemproject.github.io/#explorerBlockViewModel) of the blocks
+        from `start_height` to `end_height` inclusive, in height order.
+        The range is split into windows of `local_chain_blocks_after` calls,
+        which are fetched concurrently.
+        With a block store, the height of the chain is requested once when
+        the walk starts, unless `tip` is passed, so the blocks of the range
+        deep enough under it are stored as final.
+        With `AsyncioClient` an asynchronous generator is returned.
+
+        :param start_height: height of the first block. Must be greater than
+               1, since blocks can only be requested after a positive height.
+        :param end_height: height of the last block.
+        :param concurrency: maximum number of windows fetched at once.
+        :param tip: (optional) known height of the chain.
+        """
+        if start_height < 2:
+            raise ValueError('start_height must be greater than 1')
+        heights = six.moves.range(start_height - 1, end_height,
+                                  BLOCKS_AFTER_SIZE)
+        before = None
+        if self.client.block_store is not None:
+            if tip is None:
+                before = self._observe_tip
+            else:
+                self.client.block_store.observe(tip)
+        return self.client.fetch_pages(
+            self._blocks_after, heights, concurrency,
+            stop=lambda block: block['block']['height'] > end_height,
+            before=before)
+
+    def _observe_tip(self):
+        """
+        Gets the height of the chain as JSON, so the block store sees it.
+        """
+        return self.client.call_json('GET', 'chain/height')
+
+    def follow(self, from_height, min_interval=1, max_interval=15,
+               depth=BLOCKS_AFTER_SIZE):
+        """
+        Iterates over `ExplorerBlockViewModel` JSON objects
+        (https://nemproject.github.io/#explorerBlockViewModel) of the blocks
+        from `from_height` on, endlessly, as the chain grows.
+        Catches up with `local_chain_blocks_after` calls, then polls the tip
+        of the chain with backoff. Each block is yielded once; if the chain
+        is forked, so that walked blocks are replaced, the blocks of the new
+        chain are yielded from the height of the fork, at most `depth`
+        blocks back.
+        With `AsyncioClient` an asynchronous generator is returned.
+
+        :param from_height: height of the first block. Must be greater than
+               1, since blocks can only be requested after a positive height.
+        :param min_interval: delay in seconds before polling the tip again
+               after new blocks arrived.
+        :param max_interval: maximum delay in seconds between polls.
+        :param depth: number of recent blocks re-checked for a fork.
+        """
+        if from_height < 2:
+            raise ValueError('from_height must be greater than 1')
+        return self.client.follow(self._blocks_after,
+                                  _ChainFollower(from_height, depth),
+                                  min_interval, max_interval)
+
+
+class Node(object):
     """
     Implements node related methods from API.
     https://nemproject.github.io/#node-related-requests
     """
 
+    __slots__ = ('client',)
+
+    name = 'node/'
+
     def __init__(self, client):
-        self.name = 'node/'
         self.client = client
 
     def info(self):
@@ -589,7 +1108,7 @@ class Node:
         In case the node has not been booted yet, NIS will return a
         JSON error object.
         """
-        return self.client.call('GET', self.name + 'info')
+        return self.client.call('GET', 'node/info')
 
     def extended_info(self):
         """
@@ -597,7 +1116,7 @@ class Node:
         In case the node has not been booted yet, NIS will return a
         JSON error object.
         """
-        return self.client.call('GET', self.name + 'extended-info')
+        return self.client.call('GET', 'node/extended-info')
 
     def peer_list_all(self):
         """
@@ -605,7 +1124,7 @@ class Node:
         n case the node has not been booted yet, NIS will return a
         JSON error object.
         """
-        return self.client.call('GET', self.name + 'peer-list/all')
+        return self.client.call('GET', 'node/peer-list/all')
 
     def peer_list_reachable(self):
         """
@@ -613,7 +1132,7 @@ class Node:
         In case the node has not been booted yet, NIS will return a
         JSON error object.
         """
-        return self.client.call('GET', self.name + 'peer-list/reachable')
+        return self.client.call('GET', 'node/peer-list/reachable')
 
     def peer_list_active(self):
         """
@@ -622,7 +1141,7 @@ class Node:
         In case the node has not been booted yet, NIS will return a
         JSON error object.
         """
-        return self.client.call('GET', self.name + 'peer-list/active')
+        return self.client.call('GET', 'node/peer-list/active')
 
     def max_chain_height(self):
         """
@@ -632,7 +1151,7 @@ class Node:
         error object.
         """
         return self.client.call('GET',
-                                self.name + 'active-peers/max-chain-height')
+                                'node/active-peers/max-chain-height')
 
     def experiences(self):
         """
@@ -641,7 +1160,7 @@ class Node:
         JSON error object.
         """
         return self.client.call('GET',
-                                self.name + 'experiences')
+                                'node/experiences')
 
     def boot(self, boot_node_request):
         """
@@ -654,17 +1173,20 @@ class Node:
                (https://nemproject.github.io/#bootNodeRequest)
         """
         return self.client.call('POST',
-                                self.name + 'boot', payload=boot_node_request)
+                                'node/boot', payload=boot_node_request)
 
 
-class Namespace:
+class Namespace(object):
     """
     Implements namespace related methods from API.
     https://nemproject.github.io/#namespaces-and-mosaics
     """
 
+    __slots__ = ('client',)
+
+    name = 'namespace/'
+
     def __init__(self, client):
-        self.name = 'namespace/'
         self.client = client
 
     def root_page(self, _id=None, page_size=25):
@@ -679,7 +1201,7 @@ class Namespace:
                value is 100.
         """
         return self.client.call('GET',
-                                self.name + 'root/page',
+                                'namespace/root/page',
                                 params={'id': _id, 'pageSize': page_size})
 
     def namespace(self, namespace):
@@ -689,7 +1211,7 @@ class Namespace:
         :param namespace: the namespace id.
         """
         return self.client.call('GET',
-                                self.name, params={'namespace': namespace})
+                                'namespace/', params={'namespace': namespace})
 
     def mosaic_definition_page(self, namespace, _id=None, pagesize=25):
         """
@@ -705,20 +1227,59 @@ class Namespace:
                is 25, the minimum value is 5 and hte maximum value is 100.
         """
         return self.client.call('GET',
-                                self.name + 'mosaic/definition/page',
+                                'namespace/mosaic/definition/page',
                                 params={'namespace': namespace, 'id': _id,
                                         'pagesize': pagesize})
 
+    def iter_roots(self, _id=None, since=None):
+        """
+        Iterates over `NamespaceMetaDataPair` objects of root namespaces,
+        walking `root_page` pages from the most recent one.
+        With `AsyncioClient` an asynchronous generator is returned.
+
+        :param _id: (optional) the topmost namespace database id up to which
+                    root namespaces are returned.
+        :param since: (optional) namespace database id at which the walk
+               stops, to get only the root namespaces added after it.
+        """
+        return self.client.paginate(
+            lambda cursor: self.root_page(cursor, NAMESPACE_PAGE_SIZE),
+            _meta_id, start=_id, page_size=NAMESPACE_PAGE_SIZE,
+            stop=None if since is None else
+            lambda item: _meta_id(item) <= since)
+
+    def iter_mosaic_definitions(self, namespace, _id=None, since=None):
+        """
+        Iterates over `MosaicDefinitionMetaDataPair` objects of a namespace,
+        walking `mosaic_definition_page` pages from the most recent one.
+        With `AsyncioClient` an asynchronous generator is returned.
+
+        :param namespace: the namespace id.
+        :param _id: (optional) the topmost mosaic definition database id up
+                    to which mosaic definitions are returned.
+        :param since: (optional) mosaic definition database id at which the
+               walk stops, to get only the definitions added after it.
+        """
+        return self.client.paginate(
+            lambda cursor: self.mosaic_definition_page(
+                namespace, cursor, NAMESPACE_PAGE_SIZE),
+            _meta_id, start=_id, page_size=NAMESPACE_PAGE_SIZE,
+            stop=None if since is None else
+            lambda item: _meta_id(item) <= since)
+
 
-class Transaction:
+class Transaction(object):
     """
     Implements transaction related methods from API.
     According to documentation, should be used with care!
     https://nemproject.github.io/#initiating-transactions
     """
 
+    __slots__ = ('client',)
+
+    name = 'transaction/'
+
     def __init__(self, client):
-        self.name = 'transaction/'
         self.client = client
 
     def prepare_announce(self, request_announce):
@@ -731,7 +1292,7 @@ class Transaction:
                (https://nemproject.github.io/#requestPrepareAnnounce)
         """
         return self.client.call('POST',
-                                self.name + 'prepare-announce',
+                                'transaction/prepare-announce',
                                 payload=request_announce)
 
     def announce(self, request_announce):
@@ -742,18 +1303,21 @@ class Transaction:
                (https://nemproject.github.io/#requestAnnounce)
         """
         return self.client.call('POST',
-                                self.name + 'announce',
+                                'transaction/announce',
                                 payload=request_announce)
 
 
-class Debug:
+class Debug(object):
     """
     Implements requests for additional information from NIS.
     https://nemproject.github.io/#requests-for-additional-information-from-NIS
     """
 
+    __slots__ = ('client',)
+
+    name = 'debug/'
+
     def __init__(self, client):
-        self.name = 'debug/'
         self.client = client
 
     def time_synchronization(self):
@@ -761,7 +1325,7 @@ class Debug:
         Gets an array of time synchronization results.
         You can monitor the change in network time with this information.
         """
-        return self.client.call('GET', self.name + 'time-synchronization')
+        return self.client.call('GET', 'debug/time-synchronization')
 
     def connections_incoming(self):
         """
@@ -769,7 +1333,7 @@ class Debug:
         You can monitor the outstanding and recent incoming requests with
         this information.
         """
-        return self.client.call('GET', self.name + 'connections/incoming')
+        return self.client.call('GET', 'debug/connections/incoming')
 
     def connections_outgoing(self):
         """
@@ -777,7 +1341,7 @@ class Debug:
         You can monitor the outstanding and recent outgoing requests with
         this information.
         """
-        return self.client.call('GET', self.name + 'connections/outgoing')
+        return self.client.call('GET', 'debug/connections/outgoing')
 
     def timers(self):
         """
@@ -785,4 +1349,4 @@ class Debug:
         You can monitor the statistics for periodic tasks with
         this information.
         """
-        return self.client.call('GET', self.name + '/timers')
+        return self.client.call('GET', 'debug/timers')
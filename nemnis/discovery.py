@@ -0,0 +1,143 @@
+__copyright__ = "2017 Oleksii Semeshchuk"
+__license__ = "License: MIT, see LICENSE."
+__version__ = "0.0.9"
+__author__ = "Oleksii Semeshchuk"
+__email__ = "semolex@live.com"
+
+'''
+    discovery
+    ---------
+
+    Discovery of NIS nodes from the peer graph.
+
+    Starting from the nodes of an `AsyncioPooledClient`, crawls their peer
+    lists concurrently, probes the found nodes and adds the healthy ones to
+    the pool of the client, so reads are routed to them. Requests to each
+    node are bounded by its adaptive limit in the client.
+'''
+
+import aiohttp
+import asyncio
+from .core import explain_status
+from .pool import _SERVING
+
+__all__ = [
+    'PEER_LISTS',
+    'Discovery',
+]
+
+
+PEER_LISTS = ('node/peer-list/active', 'node/peer-list/reachable')
+
+
+def _peer_endpoint(node):
+    """
+    Gets address of NIS from `Node` JSON object of a peer list.
+
+    :return: address of the node, or `None` if its endpoint is incomplete.
+    """
+    endpoint = node.get('endpoint') or {}
+    protocol, host, port = (endpoint.get('protocol'), endpoint.get('host'),
+                            endpoint.get('port'))
+    if not (protocol and host and port):
+        return None
+    return '{0}://{1}:{2}'.format(protocol, host, port)
+
+
+class Discovery(object):
+    """
+    Crawls peer lists of NIS nodes and keeps the healthy ones in the pool of
+    an `AsyncioPooledClient`.
+    """
+
+    def __init__(self, client, max_nodes=500, max_depth=2,
+                 peer_lists=PEER_LISTS):
+        """
+        Initialize discovery.
+        :param client: `AsyncioPooledClient`, nodes of its pool are the
+               starting points of the crawl.
+        :param max_nodes: maximum number of nodes probed in one crawl.
+        :param max_depth: number of peer list hops from the starting nodes.
+        :param peer_lists: API endpoint methods which return peers of a node.
+        """
+        self.client = client
+        self.max_nodes = max_nodes
+        self.max_depth = max_depth
+        self.peer_lists = peer_lists
+        self.statuses = {}
+
+    async def crawl(self):
+        """
+        Crawl the peer graph breadth first. Found nodes which respond to
+        `heartbeat` and are in a state to serve requests are added to the
+        pool. Verbose status of every probed node is kept in `statuses`
+        (see `explain_status`).
+
+        :return: addresses of healthy nodes in the routing order.
+        """
+        seen = set(self.client.pool.endpoints)
+        frontier = list(seen)
+        for depth in range(self.max_depth + 1):
+            checks = await asyncio.gather(*[
+                self._check(endpoint, discovered=depth > 0)
+                for endpoint in frontier])
+            healthy = [endpoint for endpoint, ok in zip(frontier, checks)
+                       if ok]
+            if depth == self.max_depth:
+                break
+            frontier = []
+            for peers in await asyncio.gather(*[
+                    self._peers(endpoint) for endpoint in healthy]):
+                for endpoint in peers:
+                    if endpoint not in seen and len(seen) < self.max_nodes:
+                        seen.add(endpoint)
+                        frontier.append(endpoint)
+            if not frontier:
+                break
+        return self.client.pool.ranked()
+
+    async def watch(self, interval=300):
+        """
+        Crawl the peer graph every `interval` seconds, until cancelled.
+        """
+        while True:
+            await self.crawl()
+            await asyncio.sleep(interval)
+
+    async def _check(self, endpoint, discovered):
+        """
+        Probe a node with `heartbeat` and `status` requests.
+        Discovered node is added to the pool only if it is healthy.
+        Nodes with status codes out of `STATUS_LIST` are not.
+        """
+        try:
+            heartbeat = await self.client._node_json(endpoint, 'heartbeat')
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            heartbeat = None
+        status = None
+        if heartbeat and heartbeat.get('code') == 1:
+            status = await self.client.probe(endpoint, add=discovered)
+        if status is None:
+            return False
+        self.statuses[endpoint] = explain_status(status)
+        return status['code'] in _SERVING
+
+    async def _peers(self, endpoint):
+        """
+        Get addresses of peers of a node from all of `peer_lists`.
+        """
+        peers = []
+        for name in self.peer_lists:
+            try:
+                nodes = await self.client._node_json(endpoint, name)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                continue
+            if isinstance(nodes, dict):
+                # arrays are wrapped in `data`, `NodeCollection` is not
+                nodes = nodes['data'] if 'data' in nodes else [
+                    node for group in nodes.values() for node in group]
+            for node in nodes:
+                peer = _peer_endpoint(node)
+                if peer is not None:
+                    peers.append(peer)
+        return peers
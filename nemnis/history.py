@@ -0,0 +1,78 @@
+__copyright__ = "2017 Oleksii Semeshchuk"
+__license__ = "License: MIT, see LICENSE."
+__version__ = "0.0.9"
+__author__ = "Oleksii Semeshchuk"
+__email__ = "semolex@live.com"
+
+'''
+    history
+    -------
+
+    Columnar series of historical account data.
+
+    Data points of `Account.historical_range` are kept in typed arrays,
+    one per field, which take a few bytes per point instead of a dict,
+    and can be viewed as NumPy arrays without copying, if it is installed.
+'''
+
+import array
+import importlib
+
+__all__ = [
+    'HistoricalSeries',
+]
+
+
+class HistoricalSeries(object):
+    """
+    Columns of `AccountHistoricalDataViewModel` JSON objects
+    (https://nemproject.github.io/#accountHistoricalDataViewModel)
+    in the order they were added.
+    """
+
+    # column name, JSON key and array type code
+    _columns = (
+        ('height', 'height', 'Q'),
+        ('balance', 'balance', 'Q'),
+        ('vested_balance', 'vestedBalance', 'Q'),
+        ('unvested_balance', 'unvestedBalance', 'Q'),
+        ('importance', 'importance', 'd'),
+        ('page_rank', 'pageRank', 'd'),
+    )
+
+    def __init__(self, points=()):
+        """
+        Initialize series.
+        :param points: (optional) iterable of data points to add.
+        """
+        for name, _, typecode in self._columns:
+            setattr(self, name, array.array(typecode))
+        self.extend(points)
+
+    def __len__(self):
+        return len(self.height)
+
+    def append(self, point):
+        """
+        Adds a data point.
+        :param point: `AccountHistoricalDataViewModel` JSON object.
+        """
+        for name, key, _ in self._columns:
+            getattr(self, name).append(point[key])
+
+    def extend(self, points):
+        """
+        Adds data points from an iterable.
+        """
+        for point in points:
+            self.append(point)
+
+    def to_numpy(self):
+        """
+        Gets the columns as NumPy arrays, which share memory with the series,
+        so it cannot grow while they exist. Requires `numpy` to be installed.
+        :return: dict of column names to arrays.
+        """
+        numpy = importlib.import_module('numpy')
+        return dict((name, numpy.frombuffer(getattr(self, name), typecode))
+                    for name, _, typecode in self._columns)
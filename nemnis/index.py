@@ -0,0 +1,213 @@
+__copyright__ = "2017 Oleksii Semeshchuk"
+__license__ = "License: MIT, see LICENSE."
+__version__ = "0.0.9"
+__author__ = "Oleksii Semeshchuk"
+__email__ = "semolex@live.com"
+
+'''
+    index
+    -----
+
+    Index of account transactions over a local block store.
+
+    Walks blocks of a `BlockStore` in height order and keeps, for each
+    account, a compact array of locations of its transactions in the
+    chain. Transfer queries are answered from the index and the store,
+    with any page size, in the order and with the paging of the
+    `account/transfers/*` API endpoint methods.
+
+    The store only keeps blocks at least `finality` (360) blocks below the
+    tip of the chain, so the most recent transactions are not in the index.
+'''
+
+import array
+import bisect
+import heapq
+import threading
+
+__all__ = [
+    'AccountIndex',
+]
+
+
+# multisig transaction, its inner transaction is in `otherTrans`
+_MULTISIG = 4100
+
+# a location is `height << _POSITION_BITS | position in the block`
+_POSITION_BITS = 16
+
+
+def _accounts(tx):
+    """
+    Gets recipients and signers of a transaction and its inner transaction.
+    """
+    recipients, signers = set(), set()
+    while tx is not None:
+        if tx.get('recipient'):
+            recipients.add(tx['recipient'])
+        signers.add(tx['signer'])
+        tx = tx.get('otherTrans') if tx.get('type') == _MULTISIG else None
+    return recipients, signers
+
+
+class AccountIndex(object):
+    """
+    Thread-safe index of transactions of accounts in a `BlockStore`.
+    Ids of returned `TransactionMetaDataPair` objects are locations of
+    transactions in the chain, so they are only comparable to each other.
+    """
+
+    def __init__(self, store, address_of=None):
+        """
+        Initialize index, empty.
+        :param store: `BlockStore` with the blocks to index.
+        :param address_of: (optional) function that gets the address of
+               an account from its public key. Without it, sent transactions
+               are indexed by public keys of their signers.
+        """
+        self.store = store
+        self.address_of = address_of
+        self.height = 0
+        self._indexed = bytearray()
+        self._incoming = {}
+        self._outgoing = {}
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+
+    def update(self, start_height=None):
+        """
+        Indexes final blocks of the store after `height`, stepping over
+        heights missing from the store, so it can be called again as the
+        store grows. Blocks stored later at heights below `height` are only
+        indexed when the store is walked again from `start_height`.
+        :param start_height: (optional) height to walk the store from,
+               the lowest stored height on the first update.
+        :return: number of indexed blocks.
+        """
+        count = 0
+        with self._update_lock:
+            final = self.store.tip - self.store.finality
+            if start_height is None:
+                start_height = (self.height + 1 if self.height else
+                                self.store.first or final + 1)
+            for height in range(max(start_height, 1), final + 1):
+                if height < len(self._indexed) and self._indexed[height]:
+                    continue
+                block = self.store.get(height)
+                if block is not None:
+                    self._add(height, block)
+                    count += 1
+        return count
+
+    def transfers_incoming(self, address, _id=None, limit=None):
+        """
+        Gets `TransactionMetaDataPair` JSON objects of transactions
+        received by an account, most recent first.
+        :param address: the address of the account.
+        :param _id: (optional) id of the transaction up to which
+               transactions are returned.
+        :param limit: (optional) maximum number of returned transactions.
+        """
+        return self._pairs(self._incoming, address, _id, limit)
+
+    def transfers_outgoing(self, account, _id=None, limit=None):
+        """
+        Gets `TransactionMetaDataPair` JSON objects of transactions sent
+        by an account, most recent first.
+        :param account: the address of the account, or its public key if
+               the index has no `address_of`.
+        :param _id: (optional) id of the transaction up to which
+               transactions are returned.
+        :param limit: (optional) maximum number of returned transactions.
+        """
+        return self._pairs(self._outgoing, account, _id, limit)
+
+    def transfers_all(self, address, public_key=None, _id=None, limit=None):
+        """
+        Gets `TransactionMetaDataPair` JSON objects of transactions sent
+        or received by an account, most recent first.
+        :param address: the address of the account.
+        :param public_key: (optional) the public key of the account, to find
+               the sent transactions if the index has no `address_of`.
+        :param _id: (optional) id of the transaction up to which
+               transactions are returned.
+        :param limit: (optional) maximum number of returned transactions.
+        """
+        sources = [(self._incoming, address), (self._outgoing, address)]
+        if public_key is not None:
+            sources.append((self._outgoing, public_key))
+        with self._lock:
+            arrays = [index.get(key, ()) for index, key in sources]
+            locations = [self._before(locations, _id)
+                         for locations in arrays]
+        merged, last = [], None
+        for location in heapq.merge(*locations):
+            if location != last:
+                merged.append(location)
+                last = location
+        return self._fetch(merged[::-1][:limit])
+
+    def _add(self, height, block):
+        """
+        Indexes transactions of a block. Blocks below `height` are
+        inserted in order.
+        """
+        entries = []
+        for position, tx in enumerate(block['txes']):
+            location = height << _POSITION_BITS | position
+            recipients, signers = _accounts(tx['tx'])
+            if self.address_of is not None:
+                signers = set(self.address_of(key) for key in signers)
+            entries.append((location, recipients, signers))
+        with self._lock:
+            for location, recipients, signers in entries:
+                for index, keys in ((self._incoming, recipients),
+                                    (self._outgoing, signers)):
+                    for key in keys:
+                        locations = index.get(key)
+                        if locations is None:
+                            locations = index[key] = array.array('Q')
+                        if locations and locations[-1] > location:
+                            bisect.insort(locations, location)
+                        else:
+                            locations.append(location)
+            if height >= len(self._indexed):
+                self._indexed.extend(bytearray(
+                    height - len(self._indexed) + 1))
+            self._indexed[height] = 1
+            self.height = max(self.height, height)
+
+    def _pairs(self, index, key, _id, limit):
+        """
+        Gets transactions at locations of an account, most recent first.
+        """
+        with self._lock:
+            locations = self._before(index.get(key, ()), _id)
+        return self._fetch(locations[::-1][:limit])
+
+    @staticmethod
+    def _before(locations, _id):
+        """
+        Gets locations lower than `_id`, copied to be safe from updates.
+        """
+        if _id is None:
+            return locations[:]
+        return locations[:bisect.bisect_left(locations, _id)]
+
+    def _fetch(self, locations):
+        """
+        Reads transactions at locations from the store.
+        """
+        pairs, block, block_height = [], None, None
+        for location in locations:
+            height = location >> _POSITION_BITS
+            if height != block_height:
+                block, block_height = self.store.get(height), height
+            tx = block['txes'][location & (2 ** _POSITION_BITS - 1)]
+            pairs.append({
+                'meta': {'height': height, 'id': location,
+                         'hash': {'data': tx['hash']},
+                         'innerHash': {'data': tx.get('innerHash')}},
+                'transaction': tx['tx'],
+            })
+        return pairs
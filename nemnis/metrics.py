@@ -0,0 +1,320 @@
+__copyright__ = "2017 Oleksii Semeshchuk"
+__license__ = "License: MIT, see LICENSE."
+__version__ = "0.0.9"
+__author__ = "Oleksii Semeshchuk"
+__email__ = "semolex@live.com"
+
+'''
+    metrics
+    -------
+
+    Instrumentation of the NIS clients.
+
+    For each API endpoint method, records latency of HTTP requests, time
+    spent waiting for the rate limiter and the concurrency limits, time
+    of JSON decoding, bytes sent and received and status codes. Timings
+    are kept in histograms with log-linear buckets, like HdrHistogram:
+    recording is a few integer operations, and quantiles are within
+    about 3% of the true values. For each node, the adaptive limit of
+    calls in flight of `AsyncioClient`, the calls in flight and the calls
+    waiting for a slot are read when exported. Metrics can be exported as
+    a dict or in the Prometheus text format.
+'''
+
+import threading
+
+__all__ = [
+    'Histogram',
+    'EndpointMetrics',
+    'Metrics',
+]
+
+
+def _number(value):
+    """
+    Formats a sample value of the Prometheus text format.
+    """
+    return 'NaN' if value is None else repr(float(value))
+
+
+class Histogram(object):
+    """
+    Thread-safe histogram of durations in seconds, with buckets of
+    a constant relative width from 1 microsecond to about 19 hours.
+    """
+
+    unit = 1e-6
+    sub_bits = 5
+    max_bits = 36
+
+    def __init__(self):
+        self._sub_count = 2 ** self.sub_bits
+        self._half = self._sub_count // 2
+        self.counts = [0] * self._index(2 ** self.max_bits - 1) + [0]
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def _index(self, units):
+        """
+        Gets the bucket of a value in units. Values below `2 ** sub_bits`
+        units have buckets of their own, each power of 2 above them is
+        split into `2 ** (sub_bits - 1)` buckets.
+        """
+        if units < self._sub_count:
+            return units
+        shift = units.bit_length() - self.sub_bits
+        return self._sub_count + (shift - 1) * self._half + \
+            (units >> shift) - self._half
+
+    def _value(self, index):
+        """
+        Gets the middle of a bucket, in seconds.
+        """
+        if index < self._sub_count:
+            return index * self.unit
+        shift, sub = divmod(index - self._sub_count, self._half)
+        shift += 1
+        return ((sub + self._half) << shift) * self.unit + \
+            (1 << shift) * self.unit / 2
+
+    def record(self, value):
+        """
+        Records a duration in seconds.
+        """
+        units = min(int(value / self.unit), 2 ** self.max_bits - 1)
+        index = self._index(max(units, 0))
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def merge(self, other):
+        """
+        Adds durations recorded by another histogram, e.g. to get
+        latencies of several API endpoint methods together.
+        """
+        with other._lock:
+            counts = list(other.counts)
+            count, total = other.count, other.total
+            low, high = other.min, other.max
+        with self._lock:
+            for index, value in enumerate(counts):
+                self.counts[index] += value
+            self.count += count
+            self.total += total
+            if low is not None and (self.min is None or low < self.min):
+                self.min = low
+            if high is not None and (self.max is None or high > self.max):
+                self.max = high
+
+    def percentile(self, q):
+        """
+        Gets a quantile of the recorded durations.
+        :param q: quantile, from 0 to 1.
+        :return: duration in seconds, or `None` if nothing was recorded.
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            rank = max(1, q * self.count)
+            seen = 0
+            # the last bucket also holds values beyond the range
+            for index, count in enumerate(self.counts[:-1]):
+                seen += count
+                if seen >= rank:
+                    return min(max(self._value(index), self.min), self.max)
+            return self.max
+
+    def snapshot(self, quantiles=(0.5, 0.9, 0.99)):
+        """
+        Gets a summary of the histogram.
+        :return: dict with `count`, `sum`, `min`, `max` and the quantiles.
+        """
+        summary = {'count': self.count, 'sum': self.total,
+                   'min': self.min, 'max': self.max}
+        for q in quantiles:
+            summary['p{0:g}'.format(q * 100)] = self.percentile(q)
+        return summary
+
+
+class EndpointMetrics(object):
+    """
+    Metrics of calls of one API endpoint method.
+    """
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.wait = Histogram()
+        self.decode = Histogram()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.statuses = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """
+        Gets metrics as a dict.
+        """
+        with self._lock:
+            counters = {'bytes_sent': self.bytes_sent,
+                        'bytes_received': self.bytes_received,
+                        'statuses': dict(self.statuses)}
+        counters.update(latency=self.latency.snapshot(),
+                        wait=self.wait.snapshot(),
+                        decode=self.decode.snapshot())
+        return counters
+
+
+class Metrics(object):
+    """
+    Thread-safe metrics of a client by API endpoint method.
+    Pass it to a client as `metrics` to record its calls.
+    """
+
+    def __init__(self):
+        self.endpoints = {}
+        self.limiters = {}
+        self._lock = threading.Lock()
+
+    def endpoint(self, name):
+        """
+        Gets metrics of an API endpoint method, created on first use.
+        """
+        metrics = self.endpoints.get(name)
+        if metrics is None:
+            with self._lock:
+                metrics = self.endpoints.setdefault(name, EndpointMetrics())
+        return metrics
+
+    def request(self, name, latency, status, sent=0, received=0):
+        """
+        Records an HTTP request.
+        :param latency: seconds from sending the request to receiving the
+               response.
+        :param status: status code of the response, or `None` if the
+               request failed without one.
+        :param sent: size of the request body in bytes.
+        :param received: size of the response body in bytes.
+        """
+        metrics = self.endpoint(name)
+        metrics.latency.record(latency)
+        status = 'error' if status is None else status
+        with metrics._lock:
+            metrics.bytes_sent += sent
+            metrics.bytes_received += received
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+    def add_limiter(self, node, limiter):
+        """
+        Adds the adaptive limiter of calls in flight to a node, whose
+        `limit`, `in_flight` and `queue_depth` are exported as gauges.
+        :param node: address of the NIS.
+        :param limiter: `AdaptiveLimiter` of the node.
+        """
+        with self._lock:
+            self.limiters[node] = limiter
+
+    def wait(self, name, seconds):
+        """
+        Records time a call waited for the rate limiter or a free slot of
+        the concurrency limit.
+        """
+        self.endpoint(name).wait.record(seconds)
+
+    def decode(self, name, seconds):
+        """
+        Records time of decoding JSON of a response.
+        """
+        self.endpoint(name).decode.record(seconds)
+
+    def snapshot(self):
+        """
+        Gets metrics of all API endpoint methods. With adaptive limiters,
+        also their state by node under `limits`.
+        :return: dict of API endpoint method names to dicts of metrics.
+        """
+        with self._lock:
+            endpoints = list(self.endpoints.items())
+            limiters = list(self.limiters.items())
+        snapshot = dict((name, metrics.snapshot())
+                        for name, metrics in endpoints)
+        if limiters:
+            snapshot['limits'] = dict(
+                (node, {'limit': limiter.limit,
+                        'in_flight': limiter.in_flight,
+                        'queue_depth': limiter.queue_depth})
+                for node, limiter in limiters)
+        return snapshot
+
+    def prometheus(self, prefix='nemnis', quantiles=(0.5, 0.9, 0.99)):
+        """
+        Gets metrics in the Prometheus text exposition format.
+        Timings are exported as summaries, labelled by `endpoint`.
+        :param prefix: prefix of the metric names.
+        :param quantiles: quantiles of the summaries.
+        :return: text of the metrics.
+        """
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            limiters = sorted(self.limiters.items())
+        lines = []
+        for metric, attr, doc in (
+                ('request_seconds', 'latency', 'Latency of NIS requests.'),
+                ('wait_seconds', 'wait',
+                 'Time calls waited for rate and concurrency limits.'),
+                ('decode_seconds', 'decode', 'Time of JSON decoding.')):
+            metric = '{0}_{1}'.format(prefix, metric)
+            lines.append('# HELP {0} {1}'.format(metric, doc))
+            lines.append('# TYPE {0} summary'.format(metric))
+            for name, metrics in endpoints:
+                histogram = getattr(metrics, attr)
+                for q in quantiles:
+                    value = histogram.percentile(q)
+                    lines.append('{0}{{endpoint="{1}",quantile="{2:g}"}} '
+                                 '{3}'.format(metric, name, q, _number(value)))
+                lines.append('{0}_sum{{endpoint="{1}"}} {2}'.format(
+                    metric, name, _number(histogram.total)))
+                lines.append('{0}_count{{endpoint="{1}"}} {2}'.format(
+                    metric, name, histogram.count))
+        for metric, attr, doc in (
+                ('sent_bytes_total', 'bytes_sent',
+                 'Bytes of request bodies sent.'),
+                ('received_bytes_total', 'bytes_received',
+                 'Bytes of response bodies received.')):
+            metric = '{0}_{1}'.format(prefix, metric)
+            lines.append('# HELP {0} {1}'.format(metric, doc))
+            lines.append('# TYPE {0} counter'.format(metric))
+            for name, metrics in endpoints:
+                lines.append('{0}{{endpoint="{1}"}} {2}'.format(
+                    metric, name, getattr(metrics, attr)))
+        metric = '{0}_responses_total'.format(prefix)
+        lines.append('# HELP {0} Responses by status code.'.format(metric))
+        lines.append('# TYPE {0} counter'.format(metric))
+        for name, metrics in endpoints:
+            with metrics._lock:
+                statuses = sorted(metrics.statuses.items(),
+                                  key=lambda item: str(item[0]))
+            for status, count in statuses:
+                lines.append('{0}{{endpoint="{1}",status="{2}"}} {3}'.format(
+                    metric, name, status, count))
+        if limiters:
+            for metric, attr, doc in (
+                    ('concurrency_limit', 'limit',
+                     'Adaptive limit of calls in flight to a node.'),
+                    ('in_flight', 'in_flight', 'Calls in flight to a node.'),
+                    ('queue_depth', 'queue_depth',
+                     'Calls waiting for a free slot of a node.')):
+                metric = '{0}_{1}'.format(prefix, metric)
+                lines.append('# HELP {0} {1}'.format(metric, doc))
+                lines.append('# TYPE {0} gauge'.format(metric))
+                for node, limiter in limiters:
+                    lines.append('{0}{{node="{1}"}} {2}'.format(
+                        metric, node, _number(getattr(limiter, attr))))
+        return '\n'.join(lines) + '\n'
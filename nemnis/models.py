@@ -0,0 +1,472 @@
+__copyright__ = "2017 Oleksii Semeshchuk"
+__license__ = "License: MIT, see LICENSE."
+__version__ = "0.0.9"
+__author__ = "Oleksii Semeshchuk"
+__email__ = "semolex@live.com"
+
+'''
+    models
+    ------
+
+    Compact models for NIS JSON payloads.
+
+    Models keep their fields in `__slots__`, so a decoded payload takes
+    a fraction of memory of the nested dicts it was built from.
+    Rarely used nested collections (block transactions, cosignatories,
+    inner multisig transactions, etc.) are kept as raw JSON and decoded
+    on the first access. Fields can be accessed either as attributes in
+    snake case (`pair.meta.id`) or by their JSON keys (`pair['meta']['id']`).
+'''
+
+import six
+
+__all__ = [
+    'MODELS',
+    'decode',
+    'Model',
+    'AccountInfo',
+    'AccountMetaData',
+    'AccountMetaDataPair',
+    'TransactionMetaData',
+    'Transaction',
+    'TransactionMetaDataPair',
+    'Block',
+    'ExplorerTransferViewModel',
+    'ExplorerBlockViewModel',
+    'NodeMetaData',
+    'NodeEndpoint',
+    'NodeIdentity',
+    'Node',
+    'NodeCollection',
+    'MetaData',
+    'MosaicId',
+    'MosaicDefinition',
+    'MosaicDefinitionMetaDataPair',
+]
+
+
+def _intern(value):
+    """
+    Interns addresses and public keys, which repeat across payloads.
+    """
+    if isinstance(value, str):
+        return six.moves.intern(value)
+    return value
+
+
+def _hash_data(value):
+    """
+    Unwraps `HashData` JSON object to the hash string.
+    Empty object, used for missing inner hash, is unwrapped to `None`.
+    """
+    return value.get('data')
+
+
+def _many(model):
+    """
+    Makes decoder for an array of given model.
+    """
+    def decode_many(values):
+        return tuple(model.from_json(value) for value in values)
+    return decode_many
+
+
+class _Lazy(object):
+    """
+    Descriptor of a field that is decoded on the first access.
+    Raw JSON (dict or list) is kept in the slot until then.
+    """
+
+    def __init__(self, slot, decoder):
+        self.slot = slot
+        self.decoder = decoder
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = getattr(instance, self.slot)
+        if isinstance(value, (dict, list)):
+            value = self.decoder(value)
+            setattr(instance, self.slot, value)
+        return value
+
+
+class _ModelMeta(type):
+    """
+    Builds `__slots__` and JSON key lookup of a model from its `_fields`.
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        fields = namespace.get('_fields', ())
+        lazy = namespace.get('_lazy', ())
+        slots = []
+        decoders = []
+        for attr, key, decoder in fields:
+            if attr in lazy:
+                namespace[attr] = _Lazy('_' + attr, decoder)
+                attr, decoder = '_' + attr, None
+            slots.append(attr)
+            decoders.append((attr, key, decoder))
+        namespace['__slots__'] = tuple(slots + namespace.get('_extra', []))
+        namespace['_decoders'] = tuple(decoders)
+        namespace['_keys'] = dict((key, attr) for attr, key, _ in fields)
+        return super(_ModelMeta, mcs).__new__(mcs, name, bases, namespace)
+
+
+@six.add_metaclass(_ModelMeta)
+class Model(object):
+    """
+    Base class for models of NIS JSON objects.
+    Subclasses describe their fields in `_fields` as
+    `(attribute, JSON key, decoder)` tuples and may name fields decoded
+    on the first access in `_lazy`.
+    """
+
+    _fields = ()
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        Build model from decoded JSON object.
+
+        :param data: dict with JSON object.
+        :return: model instance.
+        """
+        instance = cls.__new__(cls)
+        for slot, key, decoder in cls._decoders:
+            value = data.get(key)
+            if value is not None and decoder is not None:
+                value = decoder(value)
+            setattr(instance, slot, value)
+        return instance
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self._keys[key])
+        except KeyError:
+            raise KeyError(key)
+
+    def __repr__(self):
+        return '{0}({1})'.format(type(self).__name__, ', '.join(
+            '{0}={1!r}'.format(attr, getattr(self, attr))
+            for attr, _, _ in self._fields))
+
+
+class AccountInfo(Model):
+    """
+    `AccountInfo` JSON object.
+    https://nemproject.github.io/#accountInfo
+    """
+
+    _fields = (
+        ('address', 'address', _intern),
+        ('balance', 'balance', None),
+        ('vested_balance', 'vestedBalance', None),
+        ('importance', 'importance', None),
+        ('public_key', 'publicKey', _intern),
+        ('label', 'label', None),
+        ('harvested_blocks', 'harvestedBlocks', None),
+        ('multisig_info', 'multisigInfo', None),
+    )
+
+
+class AccountMetaData(Model):
+    """
+    `AccountMetaData` JSON object.
+    https://nemproject.github.io/#accountMetaData
+    """
+
+    _fields = (
+        ('status', 'status', _intern),
+        ('remote_status', 'remoteStatus', _intern),
+        ('cosignatory_of', 'cosignatoryOf', _many(AccountInfo)),
+        ('cosignatories', 'cosignatories', _many(AccountInfo)),
+    )
+    _lazy = ('cosignatory_of', 'cosignatories')
+
+
+class AccountMetaDataPair(Model):
+    """
+    `AccountMetaDataPair` JSON object.
+    https://nemproject.github.io/#accountMetaDataPair
+    """
+
+    _fields = (
+        ('account', 'account', AccountInfo.from_json),
+        ('meta', 'meta', AccountMetaData.from_json),
+    )
+
+
+class TransactionMetaData(Model):
+    """
+    `TransactionMetaData` JSON object.
+    https://nemproject.github.io/#transactionMetaData
+    """
+
+    _fields = (
+        ('height', 'height', None),
+        ('id', 'id', None),
+        ('hash', 'hash', _hash_data),
+        ('inner_hash', 'innerHash', _hash_data),
+    )
+
+
+class Transaction(Model):
+    """
+    Transaction JSON object of any type.
+    https://nemproject.github.io/#transferTransaction
+    Fields common to all types and transfer transaction fields are kept
+    as attributes, fields specific to other types are kept in `extra` dict.
+    """
+
+    _fields = (
+        ('type', 'type', None),
+        ('version', 'version', None),
+        ('time_stamp', 'timeStamp', None),
+        ('deadline', 'deadline', None),
+        ('signer', 'signer', _intern),
+        ('signature', 'signature', None),
+        ('fee', 'fee', None),
+        ('recipient', 'recipient', _intern),
+        ('amount', 'amount', None),
+        ('message', 'message', None),
+        ('mosaics', 'mosaics', None),
+        ('other_trans', 'otherTrans',
+         lambda value: Transaction.from_json(value)),
+        ('signatures', 'signatures',
+         lambda value: _many(Transaction)(value)),
+    )
+    _lazy = ('other_trans', 'signatures')
+    _extra = ['extra']
+
+    @classmethod
+    def from_json(cls, data):
+        instance = super(Transaction, cls).from_json(data)
+        extra = dict((key, value) for key, value in data.items()
+                     if key not in cls._keys)
+        instance.extra = extra or None
+        return instance
+
+    def __getitem__(self, key):
+        if key not in self._keys and self.extra and key in self.extra:
+            return self.extra[key]
+        return super(Transaction, self).__getitem__(key)
+
+
+class TransactionMetaDataPair(Model):
+    """
+    `TransactionMetaDataPair` JSON object.
+    https://nemproject.github.io/#transactionMetaDataPair
+    """
+
+    _fields = (
+        ('meta', 'meta', TransactionMetaData.from_json),
+        ('transaction', 'transaction', Transaction.from_json),
+    )
+
+
+class Block(Model):
+    """
+    `Block` JSON object.
+    https://nemproject.github.io/#block
+    """
+
+    _fields = (
+        ('type', 'type', None),
+        ('version', 'version', None),
+        ('time_stamp', 'timeStamp', None),
+        ('height', 'height', None),
+        ('signer', 'signer', _intern),
+        ('signature', 'signature', None),
+        ('prev_block_hash', 'prevBlockHash', _hash_data),
+        ('transactions', 'transactions', _many(Transaction)),
+    )
+    _lazy = ('transactions',)
+
+
+class ExplorerTransferViewModel(Model):
+    """
+    `ExplorerTransferViewModel` JSON object.
+    https://nemproject.github.io/#explorerTransferViewModel
+    """
+
+    _fields = (
+        ('tx', 'tx', Transaction.from_json),
+        ('hash', 'hash', None),
+        ('inner_hash', 'innerHash', None),
+    )
+
+
+class ExplorerBlockViewModel(Model):
+    """
+    `ExplorerBlockViewModel` JSON object.
+    https://nemproject.github.io/#explorerBlockViewModel
+    """
+
+    _fields = (
+        ('block', 'block', Block.from_json),
+        ('hash', 'hash', None),
+        ('difficulty', 'difficulty', None),
+        ('txes', 'txes', _many(ExplorerTransferViewModel)),
+    )
+    _lazy = ('txes',)
+
+
+class NodeMetaData(Model):
+    """
+    Meta data of `Node` JSON object.
+    https://nemproject.github.io/#node
+    """
+
+    _fields = (
+        ('features', 'features', None),
+        ('application', 'application', _intern),
+        ('network_id', 'networkId', None),
+        ('version', 'version', _intern),
+        ('platform', 'platform', _intern),
+    )
+
+
+class NodeEndpoint(Model):
+    """
+    `NodeEndpoint` JSON object.
+    https://nemproject.github.io/#nodeEndpoint
+    """
+
+    _fields = (
+        ('protocol', 'protocol', _intern),
+        ('host', 'host', None),
+        ('port', 'port', None),
+    )
+
+
+class NodeIdentity(Model):
+    """
+    `NodeIdentity` JSON object.
+    https://nemproject.github.io/#nodeIdentity
+    """
+
+    _fields = (
+        ('name', 'name', None),
+        ('public_key', 'public-key', _intern),
+    )
+
+
+class Node(Model):
+    """
+    `Node` JSON object.
+    https://nemproject.github.io/#node
+    """
+
+    _fields = (
+        ('meta_data', 'metaData', NodeMetaData.from_json),
+        ('endpoint', 'endpoint', NodeEndpoint.from_json),
+        ('identity', 'identity', NodeIdentity.from_json),
+    )
+
+
+class NodeCollection(Model):
+    """
+    `NodeCollection` JSON object.
+    https://nemproject.github.io/#nodeCollection
+    """
+
+    _fields = (
+        ('active', 'active', _many(Node)),
+        ('busy', 'busy', _many(Node)),
+        ('inactive', 'inactive', _many(Node)),
+        ('failure', 'failure', _many(Node)),
+    )
+
+
+class MetaData(Model):
+    """
+    Meta data with database id of paged objects, like mosaic definitions.
+    """
+
+    _fields = (
+        ('id', 'id', None),
+    )
+
+
+class MosaicId(Model):
+    """
+    `MosaicId` JSON object.
+    https://nemproject.github.io/#mosaicId
+    """
+
+    _fields = (
+        ('namespace_id', 'namespaceId', _intern),
+        ('name', 'name', _intern),
+    )
+
+
+class MosaicDefinition(Model):
+    """
+    `MosaicDefinition` JSON object.
+    https://nemproject.github.io/#mosaicDefinition
+    """
+
+    _fields = (
+        ('creator', 'creator', _intern),
+        ('id', 'id', MosaicId.from_json),
+        ('description', 'description', None),
+        ('properties', 'properties', None),
+        ('levy', 'levy', None),
+    )
+
+
+class MosaicDefinitionMetaDataPair(Model):
+    """
+    `MosaicDefinitionMetaDataPair` JSON object.
+    https://nemproject.github.io/#mosaicDefinitionMetaDataPair
+    """
+
+    _fields = (
+        ('meta', 'meta', MetaData.from_json),
+        ('mosaic', 'mosaic', MosaicDefinition.from_json),
+    )
+
+
+MODELS = {
+    'account/get': AccountMetaDataPair,
+    'account/get/from-public-key': AccountMetaDataPair,
+    'account/get/forwarded': AccountMetaDataPair,
+    'account/get/forwarded/from-public-key': AccountMetaDataPair,
+    'account/status': AccountMetaData,
+    'account/transfers/incoming': TransactionMetaDataPair,
+    'account/transfers/outgoing': TransactionMetaDataPair,
+    'account/transfers/all': TransactionMetaDataPair,
+    'local/transfers/incoming': TransactionMetaDataPair,
+    'local/transfers/outgoing': TransactionMetaDataPair,
+    'local/transfers/all': TransactionMetaDataPair,
+    'account/mosaic/definition/page': MosaicDefinition,
+    'chain/last-block': Block,
+    'block/at/public': Block,
+    'local/chain/blocks-after': ExplorerBlockViewModel,
+    'node/info': Node,
+    'node/peer-list/all': NodeCollection,
+    'node/peer-list/reachable': Node,
+    'node/peer-list/active': Node,
+    'namespace/mosaic/definition/page': MosaicDefinitionMetaDataPair,
+}
+
+
+def decode(name, data):
+    """
+    Decodes JSON payload of API endpoint to its model.
+    Arrays, which NIS wraps in `data` object, are returned as lists.
+    Payloads of endpoints without a model are returned as is.
+
+    :param name: name of the API endpoint method.
+    :param data: decoded JSON payload.
+    :return: model instance, list of them or JSON payload.
+    """
+    model = MODELS.get(name)
+    if isinstance(data, dict) and isinstance(data.get('data'), list):
+        if model is None:
+            return data['data']
+        return [model.from_json(item) for item in data['data']]
+    if model is None or not isinstance(data, dict):
+        return data
+    return model.from_json(data)
@@ -0,0 +1,220 @@
+__copyright__ = "2017 Oleksii Semeshchuk"
+__license__ = "License: MIT, see LICENSE."
+__version__ = "0.0.9"
+__author__ = "Oleksii Semeshchuk"
+__email__ = "semolex@live.com"
+
+'''
+    pool
+    ----
+
+    Pool of NIS endpoints for the pooled clients.
+
+    Keeps latency, chain height and status of each node, measured by
+    periodic probes and by the calls themselves, and ranks nodes for
+    routing: nodes that respond and are in sync with the highest chain
+    seen come first, the fastest of them on top.
+'''
+
+import collections
+import threading
+from .core import _clock
+
+__all__ = [
+    'READ_POSTS',
+    'NodeState',
+    'EndpointPool',
+]
+
+
+READ_POSTS = frozenset([
+    'block/at/public',
+    'local/chain/blocks-after',
+    'account/unlocked/info',
+])
+
+# status codes of NIS which can serve requests, see `STATUS_LIST`
+_SERVING = frozenset([3, 4, 5, 6, 7])
+
+
+class NodeState(object):
+    """
+    State of a NIS node in the pool.
+    """
+
+    __slots__ = ('endpoint', 'latency', 'height', 'status', 'failures')
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.latency = None
+        self.height = None
+        self.status = None
+        self.failures = 0
+
+    def __repr__(self):
+        return ('NodeState({0!r}, latency={1!r}, height={2!r}, status={3!r}, '
+                'failures={4!r})').format(self.endpoint, self.latency,
+                                          self.height, self.status,
+                                          self.failures)
+
+
+class EndpointPool(object):
+    """
+    Thread-safe set of NIS endpoints ranked by health and latency.
+    """
+
+    def __init__(self, endpoints, max_lag=2, refresh_interval=30,
+                 decay=0.3):
+        """
+        Initialize pool.
+        :param endpoints: addresses of the NIS nodes.
+        :param max_lag: number of blocks a node can be behind the highest
+               chain seen and still be treated as in sync.
+        :param refresh_interval: number of seconds between probes of nodes.
+        :param decay: weight of a new latency sample in the moving average.
+        """
+        if not endpoints:
+            raise ValueError('at least one endpoint is required')
+        self.max_lag = max_lag
+        self.refresh_interval = refresh_interval
+        self.decay = decay
+        self.nodes = collections.OrderedDict(
+            (endpoint, NodeState(endpoint)) for endpoint in endpoints)
+        self._next_refresh = None
+        self._lock = threading.Lock()
+
+    @property
+    def endpoints(self):
+        """
+        Addresses of all nodes in the pool.
+        """
+        with self._lock:
+            return list(self.nodes)
+
+    @property
+    def height(self):
+        """
+        Highest chain height seen among the nodes, or `None`.
+        """
+        return self._height(self._snapshot())
+
+    def add(self, endpoint):
+        """
+        Adds a node to the pool, if it is not there.
+        """
+        with self._lock:
+            if endpoint not in self.nodes:
+                self.nodes[endpoint] = NodeState(endpoint)
+
+    def remove(self, endpoint):
+        """
+        Removes a node from the pool, if it is there.
+        """
+        with self._lock:
+            self.nodes.pop(endpoint, None)
+
+    def due(self):
+        """
+        Checks if nodes should be probed, and if so, schedules the next probe.
+        Only one of concurrent callers gets `True`.
+        """
+        now = _clock()
+        with self._lock:
+            if self._next_refresh is not None and now < self._next_refresh:
+                return False
+            self._next_refresh = now + self.refresh_interval
+            return True
+
+    def in_sync(self, endpoint):
+        """
+        Checks if a node can serve reads: it responds, its status allows it
+        and its chain is not behind the highest one by more than `max_lag`.
+        """
+        return self._in_sync(self.nodes[endpoint], self.height)
+
+    def ranked(self):
+        """
+        Gets addresses of nodes in the routing order: nodes in sync by
+        latency, then the rest by number of failures and latency.
+        """
+        nodes = self._snapshot()
+        best = self._height(nodes)
+
+        def rank(node):
+            latency = node.latency
+            return (not self._in_sync(node, best), node.failures,
+                    float('inf') if latency is None else latency)
+        return [node.endpoint for node in sorted(nodes, key=rank)]
+
+    def succeeded(self, endpoint, latency):
+        """
+        Records a successful call to a node and its latency.
+        """
+        with self._lock:
+            node = self.nodes.get(endpoint)
+            if node is None:
+                return
+            node.failures = 0
+            if node.latency is None:
+                node.latency = latency
+            else:
+                node.latency += self.decay * (latency - node.latency)
+
+    def failed(self, endpoint):
+        """
+        Records a failed call to a node.
+        """
+        with self._lock:
+            node = self.nodes.get(endpoint)
+            if node is not None:
+                node.failures += 1
+
+    def update(self, endpoint, latency, status, height, add=False):
+        """
+        Records a successful probe of a node.
+        :param latency: latency of the probe.
+        :param status: status code from `status` request.
+        :param height: height from `chain/height` request.
+        :param add: add the node, if it is not in the pool and its status
+               allows it to serve calls.
+        """
+        if add and status in _SERVING:
+            self.add(endpoint)
+        self.succeeded(endpoint, latency)
+        with self._lock:
+            node = self.nodes.get(endpoint)
+            if node is not None:
+                node.status = status
+                node.height = height
+
+    def _snapshot(self):
+        """
+        Gets the list of node states, safe to iterate.
+        """
+        with self._lock:
+            return list(self.nodes.values())
+
+    def _in_sync(self, node, best):
+        """
+        Checks if a node is in sync with the highest chain height `best`.
+        """
+        if node.failures or (node.status is not None and
+                             node.status not in _SERVING):
+            return False
+        return (best is None or node.height is None or
+                node.height >= best - self.max_lag)
+
+    @staticmethod
+    def _height(nodes):
+        """
+        Gets the highest chain height of nodes, or `None`.
+        """
+        heights = [node.height for node in nodes if node.height is not None]
+        return max(heights) if heights else None
+
+    @staticmethod
+    def is_read(method, name):
+        """
+        Checks if a call only reads data, so it can be retried on other node.
+        """
+        return method == 'GET' or name in READ_POSTS
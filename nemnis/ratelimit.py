@@ -0,0 +1,103 @@
+__copyright__ = "2017 Oleksii Semeshchuk"
+__license__ = "License: MIT, see LICENSE."
+__version__ = "0.0.9"
+__author__ = "Oleksii Semeshchuk"
+__email__ = "semolex@live.com"
+
+'''
+    ratelimit
+    ---------
+
+    Client-side rate limiting for the NIS clients.
+
+    Calls are grouped by patterns of API endpoint names, each group
+    spends tokens of its own bucket. A call over the budget is delayed
+    until its token is available instead of failing, so bursts are
+    smoothed to the sustained rate of the group.
+'''
+
+import fnmatch
+import threading
+from .core import _clock
+
+__all__ = [
+    'TokenBucket',
+    'RateLimiter',
+]
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket, refilled at `rate` tokens per second
+    up to `burst` tokens.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        Initialize bucket, full.
+        :param rate: number of tokens added per second.
+        :param burst: (optional) capacity of the bucket, `rate` by default.
+        """
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+        self.tokens = self.burst
+        self._updated = _clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """
+        Take tokens from the bucket, borrowing from the future if there is
+        not enough of them. Callers are served in the order of reservation.
+        :return: number of seconds to wait before the tokens are available.
+        """
+        with self._lock:
+            now = _clock()
+            self.tokens = min(self.burst, self.tokens +
+                              (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= tokens
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class RateLimiter(object):
+    """
+    Token buckets of API endpoint groups.
+    """
+
+    def __init__(self, groups):
+        """
+        Initialize limiter.
+        :param groups: list of `(pattern, bucket)` pairs, where pattern
+               matches API endpoint method names as in `fnmatch`
+               (e.g. `account/*`) and bucket is a `TokenBucket` or
+               a `(rate, burst)` pair. The first matching group is used,
+               calls which match no group are not limited.
+        """
+        self.groups = [(pattern, bucket if isinstance(bucket, TokenBucket)
+                        else TokenBucket(*bucket))
+                       for pattern, bucket in groups]
+        self._buckets = {}
+
+    def bucket(self, name):
+        """
+        Gets the bucket of the group an API endpoint method belongs to.
+        :return: `TokenBucket` instance, or `None` if it is not limited.
+        """
+        try:
+            return self._buckets[name]
+        except KeyError:
+            pass
+        bucket = next((bucket for pattern, bucket in self.groups
+                       if fnmatch.fnmatchcase(name, pattern)), None)
+        self._buckets[name] = bucket
+        return bucket
+
+    def reserve(self, name):
+        """
+        Take a token for a call of API endpoint method.
+        :return: number of seconds to wait before making the call.
+        """
+        bucket = self.bucket(name)
+        return 0.0 if bucket is None else bucket.reserve()
@@ -0,0 +1,105 @@
+__copyright__ = "2017 Oleksii Semeshchuk"
+__license__ = "License: MIT, see LICENSE."
+__version__ = "0.0.9"
+__author__ = "Oleksii Semeshchuk"
+__email__ = "semolex@live.com"
+
+'''
+    retry
+    -----
+
+    Retry policy for the NIS clients.
+
+    Failed reads are retried with exponential backoff and full jitter.
+    Calls which change state, like `transaction/announce`, are retried only
+    if the connection to the node could not be established, so the request
+    was surely not sent. Optionally, a read which takes longer than the
+    recent p95 latency of its endpoint is hedged: a second attempt is made
+    (to the next node for pooled clients) and the first response wins.
+'''
+
+import collections
+import random
+import threading
+from .pool import READ_POSTS
+
+__all__ = [
+    'RETRY_STATUSES',
+    'RetryPolicy',
+]
+
+
+RETRY_STATUSES = frozenset([502, 503, 504])
+
+
+class RetryPolicy(object):
+    """
+    Retry and hedging settings, with recent latencies of API endpoints.
+    """
+
+    def __init__(self, attempts=3, backoff=0.1, max_backoff=5,
+                 statuses=RETRY_STATUSES, hedge=False, hedge_quantile=0.95,
+                 hedge_samples=20, window=200):
+        """
+        Initialize policy.
+        :param attempts: maximum number of attempts of a call.
+        :param backoff: base delay in seconds, doubled with each attempt.
+        :param max_backoff: maximum delay in seconds between attempts.
+        :param statuses: HTTP status codes of responses to retry reads on.
+        :param hedge: hedge reads which take longer than `hedge_quantile`
+               of recent latencies of their endpoint.
+        :param hedge_quantile: quantile of latencies to hedge after.
+        :param hedge_samples: minimum number of latencies of an endpoint
+               seen before its reads are hedged.
+        :param window: number of recent latencies kept per endpoint.
+        """
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_samples = hedge_samples
+        self.window = window
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def idempotent(method, name):
+        """
+        Checks if a call only reads data, so it can be safely repeated.
+        """
+        return method == 'GET' or name in READ_POSTS
+
+    def delay(self, attempt):
+        """
+        Gets the delay before the next attempt, with full jitter.
+        :param attempt: number of the failed attempt, starting from 0.
+        :return: number of seconds to wait.
+        """
+        return random.uniform(0, min(self.max_backoff,
+                                     self.backoff * 2 ** attempt))
+
+    def record(self, name, latency):
+        """
+        Records latency of a successful call of API endpoint method.
+        """
+        with self._lock:
+            latencies = self._latencies.get(name)
+            if latencies is None:
+                latencies = self._latencies[name] = collections.deque(
+                    maxlen=self.window)
+            latencies.append(latency)
+
+    def hedge_delay(self, name):
+        """
+        Gets the time after which a call of API endpoint method is hedged.
+        :return: number of seconds, or `None` if the call is not hedged.
+        """
+        if not self.hedge:
+            return None
+        with self._lock:
+            latencies = sorted(self._latencies.get(name, ()))
+        if len(latencies) < self.hedge_samples:
+            return None
+        return latencies[int(self.hedge_quantile * (len(latencies) - 1))]
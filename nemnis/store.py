@@ -0,0 +1,275 @@
+__copyright__ = "2017 Oleksii Semeshchuk"
+__license__ = "License: MIT, see LICENSE."
+__version__ = "0.0.9"
+__author__ = "Oleksii Semeshchuk"
+__email__ = "semolex@live.com"
+
+'''
+    store
+    -----
+
+    Local persistent store of blocks for the NIS clients.
+
+    Blocks fetched with `local/chain/blocks-after` are appended, as compact
+    JSON, to segment files in a directory, and their locations are kept in
+    a memory-mapped index of fixed-size records, one per height. Only blocks
+    deeper than `finality` below the highest height seen are stored, since
+    the chain above them can still be rewritten. Block reads of the clients
+    are served from the store at the stored heights, without requests.
+'''
+
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+from .core import BLOCKS_AFTER_SIZE, JSON_DECODER
+
+__all__ = [
+    'FINALITY',
+    'BlockStore',
+]
+
+
+# NIS never rewrites more than 360 blocks of its chain
+FINALITY = 360
+
+_MAGIC = b'NEMBLKS1'
+# magic, highest height seen
+_HEADER = struct.Struct('<8sQ')
+# segment number, offset and length of a block, zero length if missing
+_RECORD = struct.Struct('<IQI')
+_GROWTH = 2 ** 16
+# any byte of a stored record is not zero, since its length is not
+_STORED = re.compile(b'[^\x00]')
+
+
+class BlockStore(object):
+    """
+    Thread-safe append-only store of `ExplorerBlockViewModel` JSON objects
+    (https://nemproject.github.io/#explorerBlockViewModel) by height.
+    """
+
+    def __init__(self, path, finality=FINALITY, segment_size=64 * 2 ** 20):
+        """
+        Open the store, creating it if it does not exist.
+        :param path: directory of the store files.
+        :param finality: number of blocks below the highest height seen
+               which can still be replaced by a fork, and are not stored.
+        :param segment_size: size in bytes after which blocks are appended
+               to a new segment file.
+        """
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self.path = path
+        self.finality = finality
+        self.segment_size = segment_size
+        self._pending = {}
+        self._readers = {}
+        self._lock = threading.Lock()
+        index = os.path.join(path, 'index')
+        if not os.path.exists(index):
+            with open(index, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, 0))
+                f.truncate(_HEADER.size + _GROWTH * _RECORD.size)
+        self._index_file = open(index, 'r+b')
+        self._index = mmap.mmap(self._index_file.fileno(), 0)
+        magic, self.tip = _HEADER.unpack_from(self._index)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError('{0} is not a block store'.format(path))
+        # lowest stored height, 0 while the store is empty
+        stored = _STORED.search(self._index, _HEADER.size)
+        self.first = 0 if stored is None else (
+            (stored.start() - _HEADER.size) // _RECORD.size + 1)
+        segments = sorted(int(name[8:-4]) for name in os.listdir(path)
+                          if name.startswith('segment-') and
+                          name.endswith('.blk'))
+        self._segment = segments[-1] if segments else 0
+        self._writer = open(self._segment_path(self._segment), 'ab')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __contains__(self, height):
+        return self._locate(height) is not None
+
+    @property
+    def capacity(self):
+        """
+        Number of heights the index has room for, grown as needed.
+        """
+        return (len(self._index) - _HEADER.size) // _RECORD.size
+
+    def get(self, height):
+        """
+        Gets a stored block.
+        :return: `ExplorerBlockViewModel` JSON object, or `None` if there is
+                 no block at this height in the store.
+        """
+        data = self._read(height)
+        return None if data is None else JSON_DECODER(data)
+
+    def blocks_after(self, height, count=BLOCKS_AFTER_SIZE):
+        """
+        Gets stored blocks after a height, like `local/chain/blocks-after`.
+        :return: list of `count` blocks, or `None` if any of them is not
+                 in the store.
+        """
+        blocks = []
+        for h in range(height + 1, height + count + 1):
+            data = self._read(h)
+            if data is None:
+                return None
+            blocks.append(data)
+        return [JSON_DECODER(data) for data in blocks]
+
+    def observe(self, height):
+        """
+        Records a height of the chain, moving the pending blocks which are
+        final under it to the store.
+        """
+        with self._lock:
+            if height <= self.tip:
+                return
+            self.tip = height
+            _HEADER.pack_into(self._index, 0, _MAGIC, height)
+            final = height - self.finality
+            for h in sorted(h for h in self._pending if h <= final):
+                self._append(h, self._pending.pop(h))
+
+    def put(self, block):
+        """
+        Stores a block, if it is final, or keeps it in memory until it is.
+        Stored blocks are never replaced.
+        :param block: `ExplorerBlockViewModel` JSON object.
+        """
+        height = block['block']['height']
+        data = json.dumps(block, separators=(',', ':')).encode('utf-8')
+        with self._lock:
+            if height > self.tip - self.finality:
+                self._pending[height] = data
+            elif self._record(height) is None:
+                self._append(height, data)
+
+    def lookup(self, name, payload=None):
+        """
+        Gets JSON payload of a call of API endpoint method from the store.
+        :return: decoded JSON, or `None` if the call cannot be served.
+        """
+        if name == 'block/at/public':
+            block = self.get(payload['height'])
+            return None if block is None else block['block']
+        if name == 'local/chain/blocks-after':
+            blocks = self.blocks_after(payload['height'])
+            return None if blocks is None else {'data': blocks}
+        return None
+
+    def record(self, name, data):
+        """
+        Takes blocks and chain heights from JSON payload of a call of API
+        endpoint method.
+        """
+        if not isinstance(data, dict):
+            return
+        if name == 'local/chain/blocks-after':
+            blocks = data.get('data') or []
+            if blocks:
+                self.observe(blocks[-1]['block']['height'])
+            for block in blocks:
+                self.put(block)
+        elif name in ('chain/height', 'chain/last-block', 'block/at/public'):
+            self.observe(data['height'])
+
+    def flush(self):
+        """
+        Writes appended blocks and the index to disk.
+        """
+        with self._lock:
+            self._writer.flush()
+            self._index.flush()
+
+    def close(self):
+        """
+        Flushes and closes the store files. Pending blocks are dropped.
+        """
+        with self._lock:
+            if getattr(self, '_writer', None) is not None:
+                self._writer.close()
+                self._writer = None
+            for reader in self._readers.values():
+                reader.close()
+            self._readers.clear()
+            if not self._index.closed:
+                self._index.flush()
+                self._index.close()
+                self._index_file.close()
+
+    def _segment_path(self, segment):
+        return os.path.join(self.path, 'segment-{0:05d}.blk'.format(segment))
+
+    def _record(self, height):
+        """
+        Gets the index record of a height, or `None` if it is missing.
+        """
+        if not 0 < height <= self.capacity:
+            return None
+        record = _RECORD.unpack_from(
+            self._index, _HEADER.size + (height - 1) * _RECORD.size)
+        return record if record[2] else None
+
+    def _locate(self, height):
+        with self._lock:
+            return self._record(height)
+
+    def _read(self, height):
+        """
+        Gets the encoded block at a height, or `None`.
+        """
+        with self._lock:
+            record = self._record(height)
+            if record is None:
+                return None
+            segment, offset, length = record
+            if segment == self._segment:
+                self._writer.flush()
+            reader = self._readers.get(segment)
+            if reader is None:
+                reader = self._readers[segment] = open(
+                    self._segment_path(segment), 'rb')
+            reader.seek(offset)
+            return reader.read(length)
+
+    def _append(self, height, data):
+        """
+        Appends an encoded block to the active segment and indexes it.
+        Must be called with the lock held.
+        """
+        if height > self.capacity:
+            self._grow(height)
+        offset = self._writer.tell()
+        if offset and offset + len(data) > self.segment_size:
+            self._writer.close()
+            self._segment += 1
+            self._writer = open(self._segment_path(self._segment), 'ab')
+            offset = 0
+        self._writer.write(data)
+        _RECORD.pack_into(self._index,
+                          _HEADER.size + (height - 1) * _RECORD.size,
+                          self._segment, offset, len(data))
+        if not 0 < self.first <= height:
+            self.first = height
+
+    def _grow(self, height):
+        """
+        Extends the index to fit a height.
+        """
+        capacity = max(height, self.capacity * 2) + _GROWTH
+        self._index.flush()
+        self._index.close()
+        self._index_file.truncate(_HEADER.size + capacity * _RECORD.size)
+        self._index = mmap.mmap(self._index_file.fileno(), 0)
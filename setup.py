@@ -53,6 +53,7 @@ setup(
     install_requires=[
         'requests==2.20.0',
         'six',
+        'futures; python_version < "3"',
     ],
     test_requires=[
         'requests-mock==1.4.0',
@@ -2,12 +2,14 @@ from unittest import TestCase
 
 import requests
 import requests_mock
-from nemnis import Client, Account
+from nemnis import Client, Account, BatchError, HistoricalSeries
 
 
 class TestAccount(TestCase):
     def setUp(self):
         self.client = Client(endpoint='mock://127.0.0.1:7890')
+        # query params are only sent for http urls
+        self.http_client = Client(endpoint='http://127.0.0.1:7890')
 
     def test_client_is_used(self):
         account = Account(self.client)
@@ -69,6 +71,39 @@ class TestAccount(TestCase):
             self.assertEqual(resp.url, 'mock://127.0.0.1:7890/account/status')
             self.assertEqual(resp.status_code, 200)
 
+    @staticmethod
+    def _status(request, context):
+        address = request.qs['address'][0].upper()
+        if address == 'BAD':
+            context.status_code = 400
+            return {'error': 'invalid address'}
+        return {'status': 'LOCKED', 'address': address}
+
+    def test_get_many(self):
+        client = Client(endpoint='http://127.0.0.1:7890', decoded=True)
+        addresses = ['A{0}'.format(i) for i in range(20)]
+        with requests_mock.Mocker() as m:
+            m.get('http://127.0.0.1:7890/account/get', json={
+                'account': {'balance': 1}, 'meta': {'status': 'LOCKED'}})
+            results = client.account.get_many(addresses + addresses[:5],
+                                              concurrency=4)
+            self.assertEqual(m.call_count, 20)
+        self.assertEqual(list(results), addresses)
+        self.assertEqual(results['A3'].account.balance, 1)
+
+    def test_status_many_errors(self):
+        client = Client(endpoint='http://127.0.0.1:7890', decoded=True)
+        with requests_mock.Mocker() as m:
+            m.get('http://127.0.0.1:7890/account/status', json=self._status)
+            with self.assertRaises(BatchError) as cm:
+                client.account.status_many(['A', 'BAD', 'C'])
+            self.assertEqual(list(cm.exception.errors), ['BAD'])
+            self.assertEqual(cm.exception.results['C'].status, 'LOCKED')
+            results = client.account.status_many(['A', 'BAD'],
+                                                 return_exceptions=True)
+        self.assertIsInstance(results['BAD'], requests.HTTPError)
+        self.assertEqual(results['A'].status, 'LOCKED')
+
     def test_transfers_incoming(self):
         with requests_mock.Mocker() as m:
             m.get('mock://127.0.0.1:7890/account/transfers/incoming',
@@ -228,3 +263,86 @@ class TestAccount(TestCase):
             self.assertEqual(resp.url,
                              'mock://127.0.0.1:7890/account/historical/get')
             self.assertEqual(resp.status_code, 200)
+
+    @staticmethod
+    def _transfers_pages(total):
+        def pages(request, context):
+            top = int(request.qs['id'][0]) if 'id' in request.qs else total + 1
+            ids = range(top - 1, max(top - 26, 0), -1)
+            return {'data': [{'meta': {'id': i}, 'transaction': {}}
+                             for i in ids]}
+        return pages
+
+    def test_iter_transfers_incoming(self):
+        with requests_mock.Mocker() as m:
+            m.get('http://127.0.0.1:7890/account/transfers/incoming',
+                  json=self._transfers_pages(60))
+            items = list(self.http_client.account.iter_transfers_incoming(
+                'TESTADDRESS'))
+            self.assertEqual([i['meta']['id'] for i in items],
+                             list(range(60, 0, -1)))
+            self.assertEqual(m.call_count, 3)
+
+    def test_iter_transfers_outgoing(self):
+        with requests_mock.Mocker() as m:
+            m.get('http://127.0.0.1:7890/account/transfers/outgoing',
+                  json=self._transfers_pages(50))
+            items = list(self.http_client.account.iter_transfers_outgoing(
+                'TESTADDRESS'))
+            self.assertEqual(len(items), 50)
+            self.assertEqual(m.call_count, 3)
+            self.assertEqual(m.last_request.qs['id'], ['1'])
+
+    def test_iter_transfers_all(self):
+        with requests_mock.Mocker() as m:
+            m.get('http://127.0.0.1:7890/account/transfers/all',
+                  json=self._transfers_pages(60))
+            items = list(self.http_client.account.iter_transfers_all(
+                'TESTADDRESS', _id=11))
+            self.assertEqual([i['meta']['id'] for i in items],
+                             list(range(10, 0, -1)))
+            self.assertEqual(m.call_count, 1)
+
+    def test_iter_transfers_error(self):
+        with requests_mock.Mocker() as m:
+            m.get('http://127.0.0.1:7890/account/transfers/all',
+                  status_code=400)
+            with self.assertRaises(requests.HTTPError):
+                list(self.http_client.account.iter_transfers_all('TESTADDRESS'))
+
+    @staticmethod
+    def _historical(request, context):
+        start, end, inc = (int(request.qs[k][0]) for k in
+                           ('startheight', 'endheight', 'increment'))
+        if (end - start) // inc + 1 > 1000:
+            context.status_code = 400
+            return {'error': 'too many data points'}
+        return {'data': [{'height': h, 'address': 'A', 'balance': h * 10,
+                          'vestedBalance': h, 'unvestedBalance': h * 9,
+                          'importance': 0.5, 'pageRank': 0.25}
+                         for h in range(start, end + 1, inc)]}
+
+    def test_historical_range(self):
+        with requests_mock.Mocker() as m:
+            m.get('http://127.0.0.1:7890/account/historical/get',
+                  json=self._historical)
+            points = list(self.http_client.account.historical_range(
+                'A', 5, 4004, concurrency=3))
+            self.assertEqual(m.call_count, 4)
+        self.assertEqual([p['height'] for p in points], list(range(5, 4005)))
+
+    def test_historical_range_inc(self):
+        client = Client(endpoint='http://127.0.0.1:7890', decoded=True)
+        with requests_mock.Mocker() as m:
+            m.get('http://127.0.0.1:7890/account/historical/get',
+                  json=self._historical)
+            series = HistoricalSeries(client.account.historical_range(
+                'A', 1, 3000, inc=2))
+            self.assertEqual(m.call_count, 2)
+        self.assertEqual(len(series), 1500)
+        self.assertEqual(list(series.height[:3]), [1, 3, 5])
+        self.assertEqual(series.height[-1], 2999)
+        self.assertEqual(series.balance[-1], 29990)
+        self.assertEqual(series.page_rank[0], 0.25)
+        with self.assertRaises(ValueError):
+            client.account.historical_range('A', 10, 1)
@@ -0,0 +1,170 @@
+import binascii
+import struct
+from unittest import TestCase, mock
+
+import requests
+import requests_mock
+from nemnis import Announcement, AnnouncePipeline, Client
+
+
+def _request(i, deadline=1000):
+    data = struct.pack('<IIII', 257, 1744830465, 900, 32) + b'\x01' * 32 + \
+        struct.pack('<QI', 100000, deadline) + struct.pack('<I', i)
+    return {'data': binascii.hexlify(data).decode(),
+            'signature': 's{0}'.format(i)}
+
+
+def _result(request, message='SUCCESS', code=1):
+    return {'type': 1, 'code': code, 'message': message,
+            'transactionHash': {'data': 'h' + request['data'][-8:]}}
+
+
+class FakeNIS(object):
+    def __init__(self):
+        self.height = 100
+        self.blocks = {}
+        self.unconfirmed = {}
+        self.results = {}
+        self.failed = set()
+
+    def announce(self, request, context):
+        payload = request.json()
+        results = self.results.get(payload['data'])
+        if results:
+            result = results.pop(0)
+            if isinstance(result, int):
+                context.status_code = result
+                return {'error': 'error', 'status': result}
+            return result
+        return _result(payload)
+
+    def blocks_after(self, request, context):
+        height = request.json()['height']
+        if height in self.failed:
+            context.status_code = 503
+            return {'error': 'error', 'status': 503}
+        return {'data': [self.blocks[h] for h in range(height + 1, height + 11)
+                         if h in self.blocks]}
+
+    def unconfirmed_transactions(self, request, context):
+        # requests_mock lowercases query strings
+        address = request.qs['address'][0].upper()
+        return {'data': [{'meta': {'data': None},
+                          'transaction': {'signature': signature}}
+                         for signature in self.unconfirmed.get(address, [])]}
+
+    def mock(self, m):
+        m.get('http://127.0.0.1:7890/chain/height',
+              json=lambda request, context: {'height': self.height})
+        m.post('http://127.0.0.1:7890/transaction/announce',
+               json=self.announce)
+        m.post('http://127.0.0.1:7890/local/chain/blocks-after',
+               json=self.blocks_after)
+        m.get('http://127.0.0.1:7890/account/unconfirmedTransactions',
+              json=self.unconfirmed_transactions)
+
+
+class TestAnnouncePipeline(TestCase):
+    def setUp(self):
+        # query params are only sent for http urls
+        self.client = Client(endpoint='http://127.0.0.1:7890')
+        self.nis = FakeNIS()
+
+    def test_deadline(self):
+        self.assertEqual(Announcement(_request(1, 12345)).deadline, 12345)
+        self.assertIsNone(Announcement({'data': 'zz'}).deadline)
+        self.assertIsNone(Announcement({}).deadline)
+
+    @mock.patch('time.sleep')
+    def test_announce(self, sleep):
+        requests_ = [_request(i) for i in range(6)]
+        results = {
+            1: [503, 503],
+            2: [_result(requests_[2], 'FAILURE_INSUFFICIENT_BALANCE', 5)],
+            3: [_result(requests_[3], 'FAILURE_TRANSACTION_CACHE_TOO_FULL',
+                        14)],
+            4: [400],
+            5: [_result(requests_[5], 'NEUTRAL', 0)],
+        }
+        self.nis.results = dict((requests_[i]['data'], result)
+                                for i, result in results.items())
+        pipeline = AnnouncePipeline(self.client, concurrency=4, batch_size=6,
+                                    backoff=1)
+        announcements = [pipeline.submit(r) for r in requests_]
+        with requests_mock.Mocker() as m:
+            self.nis.mock(m)
+            self.assertEqual(pipeline.announce(), 4)
+        self.assertEqual([a.state for a in announcements],
+                         ['announced', 'announced', 'rejected', 'announced',
+                          'rejected', 'announced'])
+        self.assertEqual(announcements[2].message,
+                         'FAILURE_INSUFFICIENT_BALANCE')
+        self.assertEqual(announcements[1].attempts, 3)
+        self.assertEqual([c[0][0] for c in sleep.call_args_list], [1, 2])
+        self.assertEqual(pipeline.window, 2)
+        self.assertEqual(pipeline.height, 100)
+        self.assertFalse(pipeline.settled)
+
+    @mock.patch('time.sleep')
+    def test_failed(self, sleep):
+        pipeline = AnnouncePipeline(self.client, attempts=2)
+        announcement = pipeline.submit(_request(1))
+        with requests_mock.Mocker() as m:
+            self.nis.mock(m)
+            m.post('http://127.0.0.1:7890/transaction/announce',
+                   exc=requests.ConnectionError)
+            self.assertEqual(pipeline.announce(), 0)
+        self.assertEqual(announcement.state, 'failed')
+        self.assertEqual(announcement.attempts, 2)
+        self.assertTrue(pipeline.settled)
+
+    @mock.patch('time.sleep')
+    def test_run(self, sleep):
+        pipeline = AnnouncePipeline(self.client)
+        confirmed = pipeline.submit(_request(1), address='NA')
+        unconfirmed = pipeline.submit(_request(2), address='NA')
+        expired = pipeline.submit(_request(3, deadline=990))
+        with requests_mock.Mocker() as m:
+            self.nis.mock(m)
+            pipeline.announce()
+            self.nis.height = 112
+            self.nis.blocks[105] = {
+                'block': {'height': 105, 'timeStamp': 980},
+                'txes': [{'hash': confirmed.hash, 'tx': {}}]}
+            self.nis.unconfirmed['NA'] = [unconfirmed.request['signature']]
+            self.assertEqual(pipeline.track(), [confirmed, unconfirmed])
+            self.assertEqual(confirmed.state, 'confirmed')
+            self.assertEqual(confirmed.height, 105)
+            self.assertEqual(unconfirmed.state, 'unconfirmed')
+            self.assertEqual(expired.state, 'announced')
+            self.assertEqual(pipeline.height, 112)
+
+            self.nis.height = 113
+            self.nis.blocks[113] = {
+                'block': {'height': 113, 'timeStamp': 1001},
+                'txes': [{'hash': unconfirmed.hash, 'tx': {}}]}
+            self.assertEqual(pipeline.run(), pipeline.announcements)
+        self.assertEqual([a.state for a in pipeline.announcements],
+                         ['confirmed', 'confirmed', 'expired'])
+        self.assertTrue(pipeline.settled)
+        sleep.assert_called_once_with(15)
+
+    @mock.patch('time.sleep')
+    def test_track_failed_blocks(self, sleep):
+        pipeline = AnnouncePipeline(self.client, concurrency=1)
+        announcement = pipeline.submit(_request(1))
+        with requests_mock.Mocker() as m:
+            self.nis.mock(m)
+            pipeline.announce()
+            self.nis.height = 125
+            self.nis.failed.add(110)
+            self.nis.blocks[115] = {
+                'block': {'height': 115, 'timeStamp': 900},
+                'txes': [{'hash': announcement.hash, 'tx': {}}]}
+            self.assertEqual(pipeline.track(), [])
+            self.assertEqual(pipeline.height, 110)
+            self.nis.failed.clear()
+            self.assertEqual(pipeline.track(), [announcement])
+        self.assertEqual((announcement.state, announcement.height),
+                         ('confirmed', 115))
+        self.assertEqual(pipeline.height, 125)
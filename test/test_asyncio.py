@@ -0,0 +1,353 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase, TestCase, mock
+
+import nemnis
+from aiohttp import test_utils, web
+from nemnis import (AdaptiveLimiter, AsyncioAnnouncePipeline, AsyncioClient,
+                    AsyncioMosaicCatalogue, AsyncioPooledClient, BatchError,
+                    Metrics, as_completed)
+
+
+class TestHelpers(TestCase):
+    def test_loop(self):
+        self.assertIs(nemnis.loop(), nemnis.loop())
+
+    def test_run_map(self):
+        async def double(x):
+            return x * 2
+        self.assertEqual(nemnis.run(double(2)), 4)
+        self.assertEqual(nemnis.map([double(1), double(2)]), [2, 4])
+
+    def test_event_loops(self):
+        async def heartbeat(request):
+            return web.json_response({'code': 1, 'type': 2, 'message': 'ok'})
+
+        client = AsyncioClient()
+        sessions = []
+
+        async def main():
+            app = web.Application()
+            app.router.add_get('/heartbeat', heartbeat)
+            async with test_utils.TestServer(app) as server:
+                client.endpoint = str(server.make_url('')).rstrip('/')
+                data = await client.call_json('GET', 'heartbeat')
+                sessions.append((client.session,
+                                 client.limiter(client.endpoint)))
+                return data['message']
+
+        # the same client in two event loops, one after the other
+        self.assertEqual(asyncio.run(main()), 'ok')
+        self.assertEqual(asyncio.run(main()), 'ok')
+        self.assertIsNot(sessions[0][0], sessions[1][0])
+        self.assertIsNot(sessions[0][1], sessions[1][1])
+        asyncio.run(client.aclose())
+
+
+class TestAsCompleted(IsolatedAsyncioTestCase):
+    async def test_limit(self):
+        running = []
+        created = []
+
+        async def job(i):
+            running.append(i)
+            self.assertLessEqual(len(running), 3)
+            await asyncio.sleep(0.001 * (i % 4))
+            running.remove(i)
+            return i
+
+        def jobs():
+            for i in range(20):
+                created.append(i)
+                # coroutines are created only as slots free up
+                self.assertLessEqual(len(created) - i, 1)
+                yield job(i)
+
+        results = [r async for r in as_completed(jobs(), limit=3)]
+        self.assertEqual(sorted(results), list(range(20)))
+
+    async def test_error_cancels_pending(self):
+        cancelled = []
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def fail():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            async for _ in as_completed([slow(), fail()]):
+                pass
+        await asyncio.sleep(0)
+        self.assertEqual(cancelled, [True])
+
+
+class TestAdaptiveLimiter(IsolatedAsyncioTestCase):
+    async def test_queue(self):
+        limiter = AdaptiveLimiter(initial=2)
+        await limiter.acquire()
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        self.assertEqual((limiter.in_flight, limiter.queue_depth), (2, 1))
+        limiter.release()
+        await waiter
+        self.assertEqual((limiter.in_flight, limiter.queue_depth), (2, 0))
+
+    async def test_cancelled_waiter(self):
+        limiter = AdaptiveLimiter(initial=1)
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        self.assertEqual((limiter.in_flight, limiter.queue_depth), (1, 0))
+
+    async def test_aimd(self):
+        limiter = AdaptiveLimiter(initial=4, max_limit=5)
+        for _ in range(4):
+            await limiter.acquire()
+        for _ in range(4):
+            limiter.release(latency=0.1)
+        self.assertGreater(limiter.limit, 4)
+        for _ in range(20):
+            await limiter.acquire()
+            limiter.release(latency=0.1)
+        # the limit does not grow while it is not reached
+        self.assertLess(limiter.limit, 5)
+        limit = limiter.limit
+        await limiter.acquire()
+        limiter.release(failed=True)
+        self.assertAlmostEqual(limiter.limit, limit * 0.7)
+
+    async def test_latency_spike(self):
+        limiter = AdaptiveLimiter(initial=10, min_limit=2)
+        await limiter.acquire()
+        limiter.release(latency=0.1)
+        for _ in range(10):
+            await limiter.acquire()
+            limiter.release(latency=1.0)
+            limiter._decreased = 0
+        self.assertEqual(limiter.limit, 2)
+
+
+class TestAsyncioClient(IsolatedAsyncioTestCase):
+    async def test_session_lifecycle(self):
+        async with AsyncioClient(max_concurrency=7) as client:
+            self.assertIsNone(client._session)
+            session = client.session
+            self.assertIs(client.session, session)
+            self.assertEqual(session.connector.limit, 7)
+        self.assertTrue(session.closed)
+        self.assertIsNone(client._session)
+
+    async def test_follow(self):
+        chain = ['h{0}'.format(h) for h in range(14)]
+
+        async def blocks_after(height):
+            return [{'block': {'height': h, 'prevBlockHash': chain[h - 1]},
+                     'hash': chain[h]}
+                    for h in range(height + 1, min(height + 11, len(chain)))]
+
+        async def on_sleep(interval):
+            chain[13:] = ['f13', 'f14']
+
+        client = AsyncioClient(decoded=True)
+        with mock.patch('nemnis.asyncio.asyncio.sleep',
+                        side_effect=on_sleep) as sleep:
+            follow = client.follow(blocks_after, nemnis.core._ChainFollower(
+                2, depth=10))
+            blocks = [await follow.__anext__() for _ in range(14)]
+            await follow.aclose()
+        self.assertEqual([b['hash'] for b in blocks],
+                         chain[2:13] + ['h13'] + chain[13:])
+        sleep.assert_called_once_with(1)
+
+    async def test_fetch_many(self):
+        active, peak = [0], [0]
+
+        async def fetch(arg):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0)
+            active[0] -= 1
+            if arg == 'bad':
+                raise ValueError(arg)
+            return arg.upper()
+
+        client = AsyncioClient()
+        args = ['a{0}'.format(i) for i in range(10)] + ['bad', 'a1']
+        with self.assertRaises(BatchError) as cm:
+            await client.fetch_many(fetch, args, concurrency=3)
+        self.assertEqual(list(cm.exception.results), args[:-1])
+        self.assertIsInstance(cm.exception.errors['bad'], ValueError)
+        self.assertEqual(cm.exception.results['a9'], 'A9')
+        self.assertEqual(peak[0], 3)
+        results = await client.fetch_many(fetch, ['a', 'bad'],
+                                          return_exceptions=True)
+        self.assertIsInstance(results['bad'], ValueError)
+
+    async def test_mosaic_catalogue(self):
+        roots = [{'meta': {'id': i},
+                  'namespace': {'fqn': 'r{0}'.format(i), 'owner': 'A'}}
+                 for i in range(1, 4)]
+        mosaics = {'r2': [{'meta': {'id': 10},
+                           'mosaic': {'id': {'namespaceId': 'r2',
+                                             'name': 'coin'}}}],
+                   'r3.sub': [{'meta': {'id': 11},
+                               'mosaic': {'id': {'namespaceId': 'r3.sub',
+                                                 'name': 'gem'}}}]}
+
+        async def call(method, name, params=None, payload=None):
+            top = params['id']
+            if name == 'namespace/root/page':
+                entries = roots
+            else:
+                entries = mosaics.get(params['namespace'], [])
+            return [e for e in reversed(entries)
+                    if top is None or e['meta']['id'] < top]
+
+        async def call_json(method, name, params=None, payload=None):
+            subs = [{'fqn': 'r3.sub', 'owner': 'A', 'height': 1}]
+            return {'data': subs if params['parent'] == 'r3' else []}
+
+        client = AsyncioClient(decoded=True)
+        client.call = call
+        client.call_json = call_json
+        catalogue = AsyncioMosaicCatalogue(client)
+        self.assertEqual(await catalogue.refresh(), 2)
+        self.assertEqual(sorted(catalogue.namespaces),
+                         ['r1', 'r2', 'r3', 'r3.sub'])
+        self.assertEqual(list(catalogue.mosaics),
+                         [('r2', 'coin'), ('r3.sub', 'gem')])
+        self.assertEqual(await catalogue.refresh(), 0)
+
+    async def test_announce_pipeline(self):
+        overloaded, failed = [], []
+        heights = [10, 12]
+
+        async def call_json(method, name, params=None, payload=None, **kwds):
+            if name == 'chain/height':
+                return {'height': heights.pop(0) if len(heights) > 1
+                        else heights[0]}
+            if name == 'transaction/announce':
+                if payload['data'] == 'b' and not overloaded:
+                    overloaded.append(payload)
+                    return {'code': 14,
+                            'message': 'FAILURE_TRANSACTION_CACHE_TOO_FULL'}
+                return {'code': 1, 'message': 'SUCCESS',
+                        'transactionHash': {'data': 'h' + payload['data']}}
+            if name == 'local/chain/blocks-after':
+                if not failed:
+                    failed.append(payload)
+                    raise ValueError('blocks-after failed')
+                return {'data': [{'block': {'height': 11, 'timeStamp': 5},
+                                  'txes': [{'hash': 'ha'}, {'hash': 'hb'}]}]}
+            return {'data': [{'meta': {'data': None},
+                              'transaction': {'signature': 'sb'}}]}
+
+        client = AsyncioClient()
+        client.call_json = call_json
+        pipeline = AsyncioAnnouncePipeline(client, backoff=0.25)
+        pipeline.submit({'data': 'a'})
+        pipeline.submit({'data': 'b', 'signature': 'sb'}, address='NB')
+        with mock.patch('asyncio.sleep') as sleep:
+            await pipeline.announce()
+            self.assertEqual(await pipeline.track(),
+                             pipeline.announcements[1:])
+            self.assertEqual(pipeline.announcements[1].state, 'unconfirmed')
+            self.assertEqual(pipeline.height, 10)
+            announcements = await pipeline.run(interval=1)
+        self.assertEqual([(a.state, a.height) for a in announcements],
+                         [('confirmed', 11), ('confirmed', 11)])
+        self.assertEqual([c[0][0] for c in sleep.call_args_list], [0.25, 1])
+
+    async def test_cancelled_request(self):
+        async def slow(request):
+            await asyncio.sleep(5)
+            return web.json_response({})
+
+        app = web.Application()
+        app.router.add_get('/heartbeat', slow)
+        server = test_utils.TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        endpoint = str(server.make_url('')).rstrip('/')
+        async with AsyncioClient(endpoint, initial_concurrency=20) as client:
+            limiter = client.limiter(endpoint)
+            for _ in range(3):
+                with self.assertRaises(asyncio.TimeoutError):
+                    await asyncio.wait_for(client.heartbeat(), 0.05)
+            # cancelled calls free their slots without cutting the limit
+            self.assertEqual((limiter.limit, limiter.in_flight), (20, 0))
+
+    async def test_limiter_metrics(self):
+        metrics = Metrics()
+        async with AsyncioClient('http://node-a:7890',
+                                 metrics=metrics) as client:
+            limiter = client.limiter('http://node-a:7890')
+            self.assertIs(metrics.limiters['http://node-a:7890'], limiter)
+            self.assertEqual(
+                metrics.snapshot()['limits']['http://node-a:7890']['limit'],
+                limiter.limit)
+
+    async def test_pooled_probe(self):
+        def node(status, height):
+            async def json(request):
+                return web.json_response(
+                    {'/heartbeat': {'code': 1, 'type': 2, 'message': 'ok'},
+                     '/status': {'code': status, 'type': 4,
+                                 'message': 'status'},
+                     '/chain/height': {'height': height}}[request.path])
+            app = web.Application()
+            for path in ('/heartbeat', '/status', '/chain/height'):
+                app.router.add_get(path, json)
+            return test_utils.TestServer(app)
+
+        servers = [node(6, 100), node(6, 90), node(6, 100), node(8, 100)]
+        for server in servers:
+            await server.start_server()
+            self.addAsyncCleanup(server.close)
+        a, b, c, d = [str(server.make_url('')).rstrip('/')
+                      for server in servers]
+        async with AsyncioPooledClient([a, b]) as client:
+            # the first call refreshes the pool with real probes
+            self.assertEqual((await client.heartbeat()).status, 200)
+            self.assertEqual(client.pool.nodes[a].height, 100)
+            self.assertFalse(client.pool.in_sync(b))
+            self.assertEqual((await client.probe(c, add=True))['code'], 6)
+            self.assertEqual((await client.probe(d, add=True))['code'], 8)
+            self.assertEqual(client.pool.endpoints, [a, b, c])
+
+    async def test_pooled_background_refresh(self):
+        client = AsyncioPooledClient(['http://node-a:7890',
+                                      'http://node-b:7890'])
+        release = asyncio.Event()
+        refreshes = []
+
+        async def refresh():
+            refreshes.append(len(refreshes))
+            if len(refreshes) > 1:
+                await release.wait()
+            client._refreshed = True
+
+        async def attempt(endpoint, method, name, *args, **kwds):
+            return mock.Mock(status=200)
+
+        client.refresh = refresh
+        client._attempt = attempt
+        await client._route('GET', 'status', None, None, False)
+        client.pool._next_refresh = 0
+        # the call does not wait for the due refresh
+        await asyncio.wait_for(
+            client._route('GET', 'status', None, None, False), 1)
+        await asyncio.sleep(0)
+        self.assertEqual(refreshes, [0, 1])
+        self.assertFalse(client._refresh_task.done())
+        release.set()
+        await client._refresh_task
+        await client.aclose()
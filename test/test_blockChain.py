@@ -1,4 +1,4 @@
-from unittest import TestCase
+from unittest import TestCase, mock
 
 import requests
 import requests_mock
@@ -55,3 +55,78 @@ class TestBlockChain(TestCase):
             self.assertEqual(resp.url,
                              'mock://127.0.0.1:7890/local/chain/blocks-after')
             self.assertEqual(resp.status_code, 200)
+
+    @staticmethod
+    def _blocks_after(request, context):
+        height = request.json()['height']
+        return {'data': [{'block': {'height': h}, 'txes': []}
+                         for h in range(height + 1, min(height + 11, 96))]}
+
+    def test_iter_blocks(self):
+        with requests_mock.Mocker() as m:
+            m.post('mock://127.0.0.1:7890/local/chain/blocks-after',
+                   json=self._blocks_after)
+            blocks = list(self.client.blockchain.iter_blocks(
+                5, 47, concurrency=3))
+            self.assertEqual([b['block']['height'] for b in blocks],
+                             list(range(5, 48)))
+            self.assertEqual(m.call_count, 5)
+
+    def test_iter_blocks_chain_end(self):
+        with requests_mock.Mocker() as m:
+            m.post('mock://127.0.0.1:7890/local/chain/blocks-after',
+                   json=self._blocks_after)
+            blocks = list(self.client.blockchain.iter_blocks(80, 120))
+            self.assertEqual([b['block']['height'] for b in blocks],
+                             list(range(80, 96)))
+
+    def test_iter_blocks_start_height(self):
+        with self.assertRaises(ValueError):
+            self.client.blockchain.iter_blocks(1, 10)
+
+    def _follow(self, chain, on_sleep, count):
+        def blocks_after(request, context):
+            height = request.json()['height']
+            return {'data': [
+                {'block': {'height': h,
+                           'prevBlockHash': {'data': chain[h - 1]}},
+                 'hash': chain[h], 'txes': []}
+                for h in range(height + 1, min(height + 11, len(chain)))]}
+
+        with requests_mock.Mocker() as m, \
+                mock.patch('nemnis.client.time.sleep',
+                           side_effect=on_sleep) as sleep:
+            m.post('mock://127.0.0.1:7890/local/chain/blocks-after',
+                   json=blocks_after)
+            follow = self.client.blockchain.follow(5, max_interval=4)
+            blocks = [next(follow) for _ in range(count)]
+        return blocks, [c[0][0] for c in sleep.call_args_list]
+
+    def test_follow(self):
+        chain = ['h{0}'.format(h) for h in range(30)]
+        sleeps = []
+
+        def on_sleep(interval):
+            sleeps.append(interval)
+            if len(sleeps) == 4:
+                chain.append('h30')
+
+        blocks, intervals = self._follow(chain, on_sleep, 26)
+        self.assertEqual([b['block']['height'] for b in blocks],
+                         list(range(5, 31)))
+        self.assertEqual(intervals, [1, 2, 4, 4])
+
+    def test_follow_fork(self):
+        chain = ['h{0}'.format(h) for h in range(30)]
+
+        def on_sleep(interval):
+            chain[27:] = ['f27', 'f28', 'f29', 'f30']
+
+        blocks, intervals = self._follow(chain, on_sleep, 29)
+        self.assertEqual([b['hash'] for b in blocks],
+                         chain[5:27] + ['h27', 'h28', 'h29'] + chain[27:])
+        self.assertEqual(intervals, [1])
+
+    def test_follow_from_height(self):
+        with self.assertRaises(ValueError):
+            self.client.blockchain.follow(1)
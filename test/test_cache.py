@@ -0,0 +1,99 @@
+from unittest import TestCase, mock
+
+import requests_mock
+from nemnis import Client, ResponseCache, FOREVER, UntilFinal
+
+
+class TestResponseCache(TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(
+            max_bytes=64, policies={'block/at/public': FOREVER,
+                                    'account/get': 15})
+        self.client = Client(endpoint='mock://127.0.0.1:7890',
+                             cache=self.cache)
+
+    def test_key(self):
+        self.assertIsNone(self.cache.key('POST', 'transaction/announce',
+                                         payload={'data': 'ff'}))
+        self.assertEqual(
+            self.cache.key('GET', 'account/get', {'address': 'A', 'id': None}),
+            self.cache.key('GET', 'account/get', {'address': 'A'}))
+        self.assertNotEqual(
+            self.cache.key('POST', 'block/at/public', payload={'height': 1}),
+            self.cache.key('POST', 'block/at/public', payload={'height': 2}))
+
+    def test_lru_eviction(self):
+        keys = [self.cache.key('POST', 'block/at/public',
+                               payload={'height': h}) for h in range(3)]
+        self.cache.put(keys[0], 'a', 30)
+        self.cache.put(keys[1], 'b', 30)
+        self.assertEqual(self.cache.get(keys[0]), 'a')
+        self.cache.put(keys[2], 'c', 30)
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertEqual(self.cache.get(keys[0]), 'a')
+        self.assertEqual((len(self.cache), self.cache.size), (2, 60))
+        self.cache.put(keys[1], 'b', 65)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+
+    def test_ttl(self):
+        key = self.cache.key('GET', 'account/get', {'address': 'A'})
+        with mock.patch('nemnis.cache._clock', return_value=100):
+            self.cache.put(key, 'a', 1)
+        with mock.patch('nemnis.cache._clock', return_value=114):
+            self.assertEqual(self.cache.get(key), 'a')
+        with mock.patch('nemnis.cache._clock', return_value=116):
+            self.assertIsNone(self.cache.get(key))
+        self.assertEqual((len(self.cache), self.cache.size), (0, 0))
+
+    def test_until_final(self):
+        cache = ResponseCache(policies={'block/at/public': UntilFinal(15)},
+                              finality=10)
+        keys = [cache.key('POST', 'block/at/public', payload={'height': h})
+                for h in (90, 91)]
+        with mock.patch('nemnis.cache._clock', return_value=100):
+            cache.put(keys[0], 'unknown tip', 1)
+            cache.observe(100)
+            cache.put(keys[1], 'near tip', 1)
+        with mock.patch('nemnis.cache._clock', return_value=200):
+            self.assertIsNone(cache.get(keys[0]))
+            self.assertIsNone(cache.get(keys[1]))
+            cache.put(keys[0], 'final', 1)
+            cache.put(keys[1], 'near tip', 1)
+        with mock.patch('nemnis.cache._clock', return_value=10 ** 9):
+            self.assertEqual(cache.get(keys[0]), 'final')
+            self.assertIsNone(cache.get(keys[1]))
+
+    def test_client_observes_tip(self):
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/chain/height', json={'height': 500})
+            self.client.call_json('GET', 'chain/height')
+        self.assertEqual(self.cache.tip, 500)
+
+    def test_client_call(self):
+        with requests_mock.Mocker() as m:
+            m.post('mock://127.0.0.1:7890/block/at/public',
+                   json={'height': 100})
+            first = self.client.blockchain.at_public(100)
+            self.assertIs(self.client.blockchain.at_public(100), first)
+            self.assertEqual(
+                self.client.call_json('POST', 'block/at/public',
+                                      payload={'height': 100}),
+                {'height': 100})
+            self.assertEqual(m.call_count, 1)
+
+    def test_client_errors_not_cached(self):
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/account/get', status_code=500)
+            self.client.account.get('A')
+            self.client.account.get('A')
+            self.assertEqual(m.call_count, 2)
+            self.assertEqual(len(self.cache), 0)
+
+    def test_client_not_cached_endpoint(self):
+        with requests_mock.Mocker() as m:
+            m.post('mock://127.0.0.1:7890/transaction/announce', json={})
+            self.client.transaction.announce({'data': 'ff'})
+            self.client.transaction.announce({'data': 'ff'})
+            self.assertEqual(m.call_count, 2)
+            self.assertEqual(self.cache.misses, 0)
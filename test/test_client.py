@@ -1,9 +1,13 @@
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 from unittest import TestCase
 
 import requests
 import requests_mock
 from nemnis import (Client, Account, BlockChain, Node, Namespace, Transaction,
-                    Debug)
+                    Debug, BatchError, JSON_DECODER)
 
 
 class TestClient(TestCase):
@@ -17,6 +21,74 @@ class TestClient(TestCase):
             resp = self.client.call('GET', 'test/api')
             self.assertIsInstance(resp, requests.Response)
 
+    def test_call_json(self):
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/test/api', json={'code': 1})
+            self.assertEqual(self.client.call_json('GET', 'test/api'),
+                             {'code': 1})
+            self.assertIs(self.client.json_decoder, JSON_DECODER)
+
+    def test_call_json_empty(self):
+        with requests_mock.Mocker() as m:
+            m.post('mock://127.0.0.1:7890/test/api', status_code=200)
+            self.assertIsNone(self.client.call_json('POST', 'test/api'))
+
+    def test_call_json_error(self):
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/test/api', status_code=500)
+            with self.assertRaises(requests.HTTPError):
+                self.client.call_json('GET', 'test/api')
+
+    def test_json_decoder(self):
+        client = Client(endpoint='mock://127.0.0.1:7890',
+                        json_decoder=lambda content: content)
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/test/api', content=b'{}')
+            self.assertEqual(client.call_json('GET', 'test/api'), b'{}')
+
+    def test_coalesce(self):
+        client = Client(endpoint='mock://127.0.0.1:7890', coalesce=True)
+        release = threading.Event()
+
+        def height(request, context):
+            release.wait(5)
+            return {'height': 100}
+
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/chain/height', json=height)
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                futures = [executor.submit(client.blockchain.height)
+                           for _ in range(4)]
+                time.sleep(0.1)
+                release.set()
+                responses = [f.result() for f in futures]
+            self.assertEqual(m.call_count, 1)
+            self.assertTrue(all(r is responses[0] for r in responses))
+            self.assertEqual(client._in_flight, {})
+            client.blockchain.height()
+            self.assertEqual(m.call_count, 2)
+
+    def test_coalesce_error(self):
+        client = Client(endpoint='mock://127.0.0.1:7890', coalesce=True)
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/chain/height',
+                  exc=requests.ConnectionError)
+            with self.assertRaises(requests.ConnectionError):
+                client.blockchain.height()
+            self.assertEqual(client._in_flight, {})
+
+    def test_connection_pool(self):
+        client = Client(endpoint='http://127.0.0.1:7890', pool_size=64,
+                        pool_block=True, keep_alive=False, tcp_nodelay=False)
+        adapter = client.session.get_adapter('http://127.0.0.1:7890')
+        pool = adapter.poolmanager.connection_from_url(client.endpoint)
+        self.assertEqual(pool.pool.maxsize, 64)
+        self.assertTrue(pool.block)
+        self.assertEqual(pool.conn_kw['socket_options'][0][2], 0)
+        self.assertEqual(client.session.headers['Connection'], 'close')
+        self.assertEqual(self.client.session.headers['Connection'],
+                         'keep-alive')
+
     def test_heartbeat(self):
         with requests_mock.Mocker() as m:
             m.get('mock://127.0.0.1:7890/heartbeat', status_code=200)
@@ -50,3 +122,101 @@ class TestClient(TestCase):
 
     def test_debug(self):
         self.assertIsInstance(self.client.debug, Debug)
+
+    def test_groups_shared(self):
+        self.assertIs(self.client.account, self.client.account)
+        self.assertIs(self.client.account.client, self.client)
+        with self.assertRaises(AttributeError):
+            self.client.account.extra = 1
+
+    def test_endpoint_change(self):
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/status', text='old')
+            m.get('mock://127.0.0.2:7890/status', text='new')
+            self.assertEqual(self.client.status().text, 'old')
+            self.client.endpoint = 'mock://127.0.0.2:7890'
+            self.assertEqual(self.client.status().text, 'new')
+
+
+class TestBatch(TestCase):
+    def setUp(self):
+        # query params are only sent for http urls
+        self.client = Client(endpoint='http://127.0.0.1:7890')
+
+    @staticmethod
+    def _account(request, context):
+        address = request.qs['address'][0].upper()
+        if address == 'BAD':
+            context.status_code = 400
+            return {'error': 'invalid address'}
+        return {'account': {'address': address}}
+
+    def test_map(self):
+        addresses = ['A{0}'.format(i) for i in range(20)]
+        with requests_mock.Mocker() as m:
+            m.get('http://127.0.0.1:7890/account/get', json=self._account)
+            results = self.client.map(
+                [functools.partial(self.client.call_json, 'GET', 'account/get',
+                                   {'address': a}) for a in addresses],
+                max_workers=4)
+            self.assertEqual([r['account']['address'] for r in results],
+                             addresses)
+
+    def test_map_partial_failure(self):
+        calls = [functools.partial(self.client.call_json, 'GET',
+                                   'account/get', {'address': a})
+                 for a in ('A', 'BAD', 'C')]
+        with requests_mock.Mocker() as m:
+            m.get('http://127.0.0.1:7890/account/get', json=self._account)
+            with self.assertRaises(BatchError) as cm:
+                self.client.map(calls)
+            self.assertEqual(list(cm.exception.errors), [1])
+            self.assertIsInstance(cm.exception.errors[1], requests.HTTPError)
+            self.assertEqual(cm.exception.results[2]['account']['address'],
+                             'C')
+            results = self.client.map(calls, return_exceptions=True)
+            self.assertIsInstance(results[1], requests.HTTPError)
+
+    def test_batch_timeout(self):
+        with requests_mock.Mocker() as m:
+            m.get('http://127.0.0.1:7890/heartbeat', json={'code': 1})
+            with self.client.batch(max_workers=2, timeout=3) as batch:
+                future = batch.submit(self.client.heartbeat)
+            self.assertEqual(future.result().json(), {'code': 1})
+            self.assertEqual(m.last_request.timeout, 3)
+            self.client.heartbeat()
+            self.assertIsNone(m.last_request.timeout)
+
+    def test_call_timeout(self):
+        release = threading.Event()
+
+        def slow():
+            release.wait(5)
+            return 'slow'
+
+        def late():
+            time.sleep(0.05)
+            return 'late'
+
+        with requests_mock.Mocker() as m:
+            m.get('http://127.0.0.1:7890/heartbeat', json={'code': 1})
+            start = time.time()
+            results = self.client.map(
+                [(slow, 0.1), (late, 0.01),
+                 (self.client.heartbeat, 3), lambda: 'plain'],
+                return_exceptions=True)
+            self.assertLess(time.time() - start, 2)
+            self.assertEqual(m.last_request.timeout, 3)
+        release.set()
+        self.assertIsInstance(results[0], TimeoutError)
+        self.assertIsInstance(results[1], TimeoutError)
+        self.assertEqual(results[2].json(), {'code': 1})
+        self.assertEqual(results[3], 'plain')
+
+        with self.client.batch() as batch:
+            batch.submit(late, timeout=0.01)
+            batch.submit(late, timeout=1)
+        with self.assertRaises(BatchError) as cm:
+            batch.results()
+        self.assertEqual(list(cm.exception.errors), [0])
+        self.assertEqual(cm.exception.results[1], 'late')
@@ -0,0 +1,88 @@
+from unittest import IsolatedAsyncioTestCase
+
+import aiohttp
+from nemnis import Discovery, EndpointPool
+
+
+def node(host):
+    return {'endpoint': {'protocol': 'http', 'host': host, 'port': 7890}}
+
+
+PEERS = {
+    'http://a:7890': [node('b'), node('c')],
+    'http://b:7890': [node('a'), node('d'), node('g')],
+    'http://c:7890': [node('e'), {'endpoint': {}}],
+    'http://d:7890': [node('f')],
+}
+
+STATUSES = {
+    'http://a:7890': 6,
+    'http://b:7890': 6,
+    'http://c:7890': 8,
+    'http://d:7890': 5,
+    'http://g:7890': 42,
+}
+
+
+class StubClient(object):
+    """
+    Pooled client which answers from `PEERS` and `STATUSES`.
+    Nodes without status do not respond.
+    """
+
+    def __init__(self, endpoints):
+        self.pool = EndpointPool(endpoints)
+        self.probed_in_pool = []
+
+    async def _node_json(self, endpoint, name):
+        if endpoint not in STATUSES:
+            raise aiohttp.ClientConnectionError()
+        if name == 'heartbeat':
+            return {'code': 1}
+        if name == 'node/peer-list/all':
+            return {'active': PEERS.get(endpoint, []), 'busy': []}
+        return {'data': PEERS.get(endpoint, [])}
+
+    async def probe(self, endpoint, add=False):
+        if endpoint in self.pool.endpoints:
+            self.probed_in_pool.append(endpoint)
+        status = {'code': STATUSES[endpoint]}
+        self.pool.update(endpoint, 0.1, status['code'], 100, add)
+        return status
+
+
+class TestDiscovery(IsolatedAsyncioTestCase):
+    async def test_crawl(self):
+        discovery = Discovery(StubClient(['http://a:7890']), max_depth=2)
+        ranked = await discovery.crawl()
+        self.assertEqual(set(ranked),
+                         {'http://a:7890', 'http://b:7890', 'http://d:7890'})
+        self.assertEqual(discovery.statuses['http://c:7890']['verbose'],
+                         'NIS is currently loading the block chain from the '
+                         'database. In this state NIS cannot serve any '
+                         'requests')
+        self.assertNotIn('http://e:7890', discovery.statuses)
+        self.assertEqual(discovery.statuses['http://g:7890']['verbose'],
+                         'Unknown status')
+        # discovered nodes join the pool only after their probe
+        self.assertEqual(discovery.client.probed_in_pool, ['http://a:7890'])
+
+    async def test_max_depth(self):
+        discovery = Discovery(StubClient(['http://a:7890']), max_depth=1)
+        ranked = await discovery.crawl()
+        self.assertEqual(set(ranked), {'http://a:7890', 'http://b:7890'})
+
+    async def test_max_nodes(self):
+        discovery = Discovery(StubClient(['http://a:7890']), max_nodes=2)
+        ranked = await discovery.crawl()
+        self.assertEqual(set(ranked), {'http://a:7890', 'http://b:7890'})
+
+    async def test_bootstrap_kept(self):
+        client = StubClient(['http://x:7890'])
+        self.assertEqual(await Discovery(client).crawl(), ['http://x:7890'])
+
+    async def test_node_collection(self):
+        discovery = Discovery(StubClient(['http://a:7890']), max_depth=1,
+                              peer_lists=['node/peer-list/all'])
+        ranked = await discovery.crawl()
+        self.assertEqual(set(ranked), {'http://a:7890', 'http://b:7890'})
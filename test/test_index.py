@@ -0,0 +1,102 @@
+import shutil
+import tempfile
+from unittest import TestCase, mock
+
+from nemnis import AccountIndex, BlockStore
+from nemnis.models import TransactionMetaDataPair
+
+
+def _transfer(signer, recipient):
+    return {'type': 257, 'signer': signer, 'recipient': recipient,
+            'amount': 1}
+
+
+def _block(height, txes):
+    return {'block': {'height': height},
+            'hash': 'b{0}'.format(height),
+            'txes': [{'tx': tx, 'hash': 't{0}-{1}'.format(height, i),
+                      'innerHash': None} for i, tx in enumerate(txes)]}
+
+
+class TestAccountIndex(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = BlockStore(self.path, finality=0)
+        self.store.observe(100)
+        self.index = AccountIndex(self.store,
+                                  address_of=lambda key: key.upper())
+        self.store.put(_block(1, [_transfer('a', 'B'), _transfer('b', 'A')]))
+        self.store.put(_block(2, []))
+        self.store.put(_block(3, [
+            _transfer('a', 'A'),
+            {'type': 4100, 'signer': 'c',
+             'otherTrans': _transfer('m', 'B')}]))
+        self.store.put(_block(5, [_transfer('b', 'A')]))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.path)
+
+    def _hashes(self, pairs):
+        return [pair['meta']['hash']['data'] for pair in pairs]
+
+    def test_update(self):
+        self.assertEqual(self.index.update(), 4)
+        self.assertEqual(self.index.height, 5)
+        self.assertEqual(self.index.update(), 0)
+        self.store.put(_block(4, [_transfer('c', 'A')]))
+        self.assertEqual(self.index.update(), 0)
+        self.assertEqual(self.index.update(start_height=1), 1)
+        self.assertEqual(self._hashes(self.index.transfers_incoming('A')),
+                         ['t5-0', 't4-0', 't3-0', 't1-1'])
+
+    def test_update_final(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        with BlockStore(path, finality=10) as store:
+            store.observe(1020)
+            for height in (1001, 1002, 1004):
+                store.put(_block(height, [_transfer('a', 'B')]))
+            index = AccountIndex(store)
+            with mock.patch.object(store, 'get', wraps=store.get) as get:
+                self.assertEqual(index.update(), 3)
+            # walked from the lowest stored height, not from 1
+            self.assertEqual(get.call_args_list[0], mock.call(1001))
+            self.assertEqual(index.height, 1004)
+            store.put(_block(1011, [_transfer('a', 'B')]))
+            self.assertEqual(index.update(), 0)
+            store.observe(1021)
+            self.assertEqual(index.update(), 1)
+            self.assertEqual(self._hashes(index.transfers_incoming('B')),
+                             ['t1011-0', 't1004-0', 't1002-0', 't1001-0'])
+
+    def test_transfers(self):
+        self.index.update()
+        self.assertEqual(self._hashes(self.index.transfers_incoming('B')),
+                         ['t3-1', 't1-0'])
+        self.assertEqual(self._hashes(self.index.transfers_outgoing('A')),
+                         ['t3-0', 't1-0'])
+        self.assertEqual(self._hashes(self.index.transfers_outgoing('M')),
+                         ['t3-1'])
+        self.assertEqual(self._hashes(self.index.transfers_all('A')),
+                         ['t5-0', 't3-0', 't1-1', 't1-0'])
+        self.assertEqual(self.index.transfers_all('X'), [])
+
+    def test_paging(self):
+        self.index.update()
+        page = self.index.transfers_all('A', limit=2)
+        self.assertEqual(self._hashes(page), ['t5-0', 't3-0'])
+        page = self.index.transfers_all('A', _id=page[-1]['meta']['id'],
+                                        limit=2)
+        self.assertEqual(self._hashes(page), ['t1-1', 't1-0'])
+        pair = TransactionMetaDataPair.from_json(page[-1])
+        self.assertEqual((pair.meta.height, pair.meta.hash), (1, 't1-0'))
+        self.assertEqual(pair.transaction.recipient, 'B')
+
+    def test_public_keys(self):
+        index = AccountIndex(self.store)
+        index.update()
+        self.assertEqual(self._hashes(index.transfers_outgoing('a')),
+                         ['t3-0', 't1-0'])
+        self.assertEqual(self._hashes(index.transfers_all('A', 'a')),
+                         ['t5-0', 't3-0', 't1-1', 't1-0'])
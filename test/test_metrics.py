@@ -0,0 +1,112 @@
+import random
+from unittest import TestCase
+
+import requests
+import requests_mock
+from nemnis import AdaptiveLimiter, Client, Histogram, Metrics, RateLimiter
+
+
+class TestHistogram(TestCase):
+    def test_percentiles(self):
+        histogram = Histogram()
+        values = [random.uniform(0.001, 2.0) for _ in range(5000)]
+        for value in values:
+            histogram.record(value)
+        values.sort()
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * len(values)) - 1]
+            self.assertAlmostEqual(histogram.percentile(q) / exact, 1,
+                                   delta=0.04)
+        self.assertEqual(histogram.count, 5000)
+        self.assertEqual((histogram.min, histogram.max),
+                         (values[0], values[-1]))
+
+    def test_small_and_large(self):
+        histogram = Histogram()
+        self.assertIsNone(histogram.percentile(0.5))
+        histogram.record(0.000003)
+        histogram.record(10 ** 6)
+        self.assertEqual(histogram.percentile(0.5), 0.000003)
+        self.assertEqual(histogram.percentile(1), 10 ** 6)
+
+    def test_merge(self):
+        fast, slow = Histogram(), Histogram()
+        for _ in range(90):
+            fast.record(0.01)
+        for _ in range(10):
+            slow.record(1.0)
+        fast.merge(slow)
+        fast.merge(Histogram())
+        self.assertEqual(fast.count, 100)
+        self.assertAlmostEqual(fast.total, 10.9)
+        self.assertEqual((fast.min, fast.max), (0.01, 1.0))
+        self.assertAlmostEqual(fast.percentile(0.5), 0.01, delta=0.0004)
+        self.assertAlmostEqual(fast.percentile(0.95), 1.0, delta=0.04)
+
+
+class TestMetrics(TestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+        self.client = Client(endpoint='mock://127.0.0.1:7890',
+                             metrics=self.metrics,
+                             rate_limiter=RateLimiter([('*', (1000, 10))]))
+
+    def test_client(self):
+        with requests_mock.Mocker() as m:
+            m.post('mock://127.0.0.1:7890/block/at/public',
+                   json={'height': 5})
+            m.get('mock://127.0.0.1:7890/heartbeat', status_code=503)
+            m.get('mock://127.0.0.1:7890/status',
+                  exc=requests.ConnectionError)
+            self.client.call_json('POST', 'block/at/public',
+                                  payload={'height': 5})
+            self.client.heartbeat()
+            with self.assertRaises(requests.ConnectionError):
+                self.client.status()
+        snapshot = self.metrics.snapshot()
+        block = snapshot['block/at/public']
+        self.assertEqual(block['statuses'], {200: 1})
+        self.assertEqual(block['bytes_sent'], len('{"height": 5}'))
+        self.assertEqual(block['bytes_received'], len('{"height": 5}'))
+        self.assertEqual(block['latency']['count'], 1)
+        self.assertEqual(block['wait']['count'], 1)
+        self.assertEqual(block['decode']['count'], 1)
+        self.assertEqual(snapshot['heartbeat']['statuses'], {503: 1})
+        self.assertEqual(snapshot['heartbeat']['decode']['count'], 0)
+        self.assertEqual(snapshot['status']['statuses'], {'error': 1})
+
+    def test_prometheus(self):
+        self.metrics.request('account/get', 0.25, 200, 0, 100)
+        self.metrics.request('account/get', 0.5, None)
+        text = self.metrics.prometheus()
+        lines = text.splitlines()
+        self.assertIn('# TYPE nemnis_request_seconds summary', lines)
+        self.assertIn('nemnis_request_seconds_count{endpoint="account/get"} 2',
+                      lines)
+        self.assertIn('nemnis_request_seconds_sum{endpoint="account/get"} '
+                      '0.75', lines)
+        self.assertIn('nemnis_wait_seconds{endpoint="account/get",'
+                      'quantile="0.5"} NaN', lines)
+        self.assertIn('nemnis_received_bytes_total{endpoint="account/get"} '
+                      '100', lines)
+        self.assertIn('nemnis_responses_total{endpoint="account/get",'
+                      'status="200"} 1', lines)
+        self.assertIn('nemnis_responses_total{endpoint="account/get",'
+                      'status="error"} 1', lines)
+        self.assertTrue(text.endswith('\n'))
+
+    def test_limiters(self):
+        limiter = AdaptiveLimiter(initial=4)
+        limiter.in_flight = 3
+        self.metrics.add_limiter('http://node-a:7890', limiter)
+        self.assertEqual(self.metrics.snapshot()['limits'], {
+            'http://node-a:7890': {'limit': 4, 'in_flight': 3,
+                                   'queue_depth': 0}})
+        lines = self.metrics.prometheus().splitlines()
+        self.assertIn('# TYPE nemnis_concurrency_limit gauge', lines)
+        self.assertIn('nemnis_concurrency_limit{node="http://node-a:7890"} '
+                      '4.0', lines)
+        self.assertIn('nemnis_in_flight{node="http://node-a:7890"} 3.0',
+                      lines)
+        self.assertIn('nemnis_queue_depth{node="http://node-a:7890"} 0.0',
+                      lines)
@@ -0,0 +1,206 @@
+import asyncio
+import time
+from unittest import IsolatedAsyncioTestCase, TestCase, mock
+
+import requests
+import requests_mock
+from nemnis import AsyncioClient, Call, Client, Middleware
+
+
+class Recorder(Middleware):
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+
+    def on_request(self, call):
+        self.log.append((self.name, 'request', call.name))
+        return call
+
+    def on_response(self, call, response):
+        self.log.append((self.name, 'response', call.name))
+        return response
+
+    def on_error(self, call, error):
+        self.log.append((self.name, 'error', type(error).__name__))
+
+
+class Testnet(Middleware):
+    def on_request(self, call):
+        return call._replace(name=call.name.replace('chain', 'local/chain'))
+
+
+class Canned(Middleware):
+    def __init__(self, response):
+        self.response = response
+
+    def on_request(self, call):
+        return self.response if call.name == 'heartbeat' else call
+
+
+class Fallback(Middleware):
+    def __init__(self, response):
+        self.response = response
+
+    def on_error(self, call, error):
+        return self.response
+
+
+class Reissue(Middleware):
+    def __init__(self, delay):
+        self.delay = delay
+
+    def handle(self, call, next):
+        try:
+            return next(call)
+        except requests.ConnectionError:
+            time.sleep(self.delay)
+            return next(call._replace(name='status'))
+
+    async def ahandle(self, call, next):
+        try:
+            return await next(call)
+        except ValueError:
+            await asyncio.sleep(self.delay)
+            return await next(call._replace(name='status'))
+
+
+class Timeout(Middleware):
+    def __init__(self, timeout):
+        self.timeout = timeout
+
+    def on_request(self, call):
+        return call._replace(options=dict(call.options, timeout=self.timeout))
+
+
+class TestMiddleware(TestCase):
+    def test_call(self):
+        call = Call('GET', 'chain/height', None, None)
+        self.assertEqual(call._replace(name='status').name, 'status')
+        with self.assertRaises(AttributeError):
+            call.name = 'status'
+
+    def test_order(self):
+        log = []
+        client = Client(endpoint='mock://127.0.0.1:7890', middleware=[
+            Recorder('outer', log), Testnet(), Recorder('inner', log)])
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/local/chain/height',
+                  json={'height': 5})
+            self.assertEqual(client.blockchain.height().json(),
+                             {'height': 5})
+        self.assertEqual(log, [('outer', 'request', 'chain/height'),
+                               ('inner', 'request', 'local/chain/height'),
+                               ('inner', 'response', 'local/chain/height'),
+                               ('outer', 'response', 'chain/height')])
+
+    def test_chain(self):
+        log = []
+        client = Client(endpoint='mock://127.0.0.1:7890',
+                        middleware=[Recorder('first', log)])
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/heartbeat', json={'code': 1})
+            client.heartbeat()
+            chain = client._chain
+            client.heartbeat()
+            self.assertIs(client._chain, chain)
+            client.middleware = (Recorder('second', log),)
+            client.heartbeat()
+        self.assertEqual([name for name, _, _ in log],
+                         ['first'] * 4 + ['second'] * 2)
+
+    def test_options(self):
+        client = Client(endpoint='mock://127.0.0.1:7890',
+                        middleware=[Timeout(3)])
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/heartbeat', json={'code': 1})
+            client.heartbeat()
+            self.assertEqual(m.last_request.timeout, 3)
+
+    def test_short_circuit(self):
+        log = []
+        canned = requests.Response()
+        canned.status_code = 200
+        canned._content = b'{"code": 1}'
+        client = Client(endpoint='mock://127.0.0.1:7890', decoded=True,
+                        middleware=[Recorder('outer', log), Canned(canned),
+                                    Recorder('inner', log)])
+        with requests_mock.Mocker() as m:
+            self.assertEqual(client.heartbeat(), {'code': 1})
+            self.assertEqual(m.call_count, 0)
+        self.assertEqual(log, [('outer', 'request', 'heartbeat'),
+                               ('outer', 'response', 'heartbeat')])
+
+    def test_error(self):
+        log = []
+        fallback = requests.Response()
+        fallback.status_code = 503
+        client = Client(endpoint='mock://127.0.0.1:7890', middleware=[
+            Recorder('outer', log), Fallback(fallback),
+            Recorder('inner', log)])
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/status',
+                  exc=requests.ConnectionError)
+            self.assertIs(client.status(), fallback)
+        self.assertEqual(log, [('outer', 'request', 'status'),
+                               ('inner', 'request', 'status'),
+                               ('inner', 'error', 'ConnectionError'),
+                               ('outer', 'response', 'status')])
+        client = Client(endpoint='mock://127.0.0.1:7890',
+                        middleware=[Recorder('outer', log)])
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/status',
+                  exc=requests.ConnectionError)
+            with self.assertRaises(requests.ConnectionError):
+                client.status()
+
+    @mock.patch('time.sleep')
+    def test_handle(self, sleep):
+        log = []
+        client = Client(endpoint='mock://127.0.0.1:7890', middleware=[
+            Recorder('outer', log), Reissue(2), Recorder('inner', log)])
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/heartbeat',
+                  exc=requests.ConnectionError)
+            m.get('mock://127.0.0.1:7890/status', json={'code': 6})
+            self.assertEqual(client.heartbeat().json(), {'code': 6})
+        sleep.assert_called_once_with(2)
+        self.assertEqual(log, [('outer', 'request', 'heartbeat'),
+                               ('inner', 'request', 'heartbeat'),
+                               ('inner', 'error', 'ConnectionError'),
+                               ('inner', 'request', 'status'),
+                               ('inner', 'response', 'status'),
+                               ('outer', 'response', 'heartbeat')])
+
+
+class TestAsyncioMiddleware(IsolatedAsyncioTestCase):
+    async def test_short_circuit_and_error(self):
+        log = []
+        canned, fallback = object(), object()
+        async with AsyncioClient(
+                endpoint='http://127.0.0.1:1', middleware=[
+                    Recorder('outer', log), Fallback(fallback),
+                    Canned(canned)]) as client:
+            self.assertIs(await client.heartbeat(), canned)
+            self.assertIs(await client.status(), fallback)
+        self.assertEqual(log, [('outer', 'request', 'heartbeat'),
+                               ('outer', 'response', 'heartbeat'),
+                               ('outer', 'request', 'status'),
+                               ('outer', 'response', 'status')])
+
+    async def test_ahandle(self):
+        log = []
+        calls = []
+
+        async def fetch(method, name, params, payload, read=False, **kwds):
+            calls.append(name)
+            if name == 'heartbeat':
+                raise ValueError(name)
+            return name
+
+        client = AsyncioClient(middleware=[Recorder('outer', log),
+                                           Reissue(0)])
+        client._fetch = fetch
+        self.assertEqual(await client.call('GET', 'heartbeat'), 'status')
+        self.assertEqual(calls, ['heartbeat', 'status'])
+        self.assertEqual(log, [('outer', 'request', 'heartbeat'),
+                               ('outer', 'response', 'heartbeat')])
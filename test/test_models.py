@@ -0,0 +1,163 @@
+from unittest import TestCase
+
+import requests
+import requests_mock
+from nemnis import Client
+from nemnis.models import (decode, AccountMetaDataPair, Block,
+                           ExplorerBlockViewModel, NodeCollection,
+                           TransactionMetaDataPair, Transaction)
+
+ACCOUNT = {
+    'account': {
+        'address': 'TALICELCD3XPH4FFI5STGGNSNSWPOTG5E4DS2TOS',
+        'balance': 124446551689680,
+        'vestedBalance': 104443451695532,
+        'importance': 0.010263666447108395,
+        'publicKey': 'a11a1a6c17a24252e674d151713cdf51991ad101751e4af02a20c61b59f1fe1a',
+        'label': None,
+        'harvestedBlocks': 645,
+        'multisigInfo': {},
+    },
+    'meta': {
+        'cosignatoryOf': [],
+        'cosignatories': [],
+        'status': 'LOCKED',
+        'remoteStatus': 'ACTIVE',
+    },
+}
+
+TRANSFER = {
+    'meta': {
+        'innerHash': {},
+        'id': 2,
+        'hash': {'data': 'fbc6f8b0da1d3a0da2d2d6fe1b8c8b3d31d5ab32b4a8c6f5'},
+        'height': 13,
+    },
+    'transaction': {
+        'timeStamp': 9111526,
+        'amount': 1000000000,
+        'signature': '651a19ccd09c1e0f8b25f6a0aac5825b0a20f158ca4e0d78',
+        'fee': 3000000,
+        'recipient': 'TBCI2A67UQZAKCR6NS4JWAEICEIGEIM72G3MVW5S',
+        'type': 257,
+        'deadline': 9154726,
+        'message': {'payload': '74657374', 'type': 1},
+        'version': -1744830463,
+        'signer': 'a1aaca6c17a24252e674d155713cdf55996ad00175be4af02a20c67b59f9fe8a',
+    },
+}
+
+BLOCK = {
+    'timeStamp': 9232942,
+    'signature': '0a1351e2bd6b7d1b5a1c5de0d5c0e2a5ff4b2fd5e5d9b7c0',
+    'prevBlockHash': {'data': '0bf0ba3d0c2b8ddb9e7f87ab1d5a2c67'},
+    'type': 1,
+    'transactions': [TRANSFER['transaction']],
+    'version': -1744830463,
+    'signer': 'a1aaca6c17a24252e674d155713cdf55996ad00175be4af02a20c67b59f9fe8a',
+    'height': 27,
+}
+
+
+class TestModels(TestCase):
+    def setUp(self):
+        self.client = Client(endpoint='mock://127.0.0.1:7890', decoded=True)
+
+    def test_account_meta_data_pair(self):
+        pair = AccountMetaDataPair.from_json(ACCOUNT)
+        self.assertEqual(pair.account.balance, 124446551689680)
+        self.assertEqual(pair.meta.remote_status, 'ACTIVE')
+        self.assertEqual(pair['account']['vestedBalance'], 104443451695532)
+        self.assertEqual(pair.meta.cosignatories, ())
+        self.assertFalse(hasattr(pair, '__dict__'))
+
+    def test_transaction_meta_data_pair(self):
+        pair = TransactionMetaDataPair.from_json(TRANSFER)
+        self.assertEqual(pair.meta.id, 2)
+        self.assertEqual(pair['meta']['id'], 2)
+        self.assertEqual(pair.meta.hash, TRANSFER['meta']['hash']['data'])
+        self.assertEqual(pair.transaction.amount, 1000000000)
+        self.assertIsNone(pair.transaction.other_trans)
+        self.assertIsNone(pair.transaction.extra)
+
+    def test_transaction_extra(self):
+        transaction = Transaction.from_json({'type': 2049, 'mode': 1,
+                                             'remoteAccount': 'abcd'})
+        self.assertEqual(transaction.extra, {'mode': 1,
+                                             'remoteAccount': 'abcd'})
+        self.assertEqual(transaction['mode'], 1)
+        with self.assertRaises(KeyError):
+            transaction['unknown']
+
+    def test_multisig_transaction_is_lazy(self):
+        transaction = Transaction.from_json({
+            'type': 4100,
+            'otherTrans': TRANSFER['transaction'],
+            'signatures': [],
+        })
+        self.assertIsInstance(transaction._other_trans, dict)
+        self.assertEqual(transaction.other_trans.amount, 1000000000)
+        self.assertIsInstance(transaction._other_trans, Transaction)
+
+    def test_explorer_block_view_model(self):
+        block = ExplorerBlockViewModel.from_json({
+            'txes': [{'tx': TRANSFER['transaction'], 'hash': 'aa',
+                      'innerHash': None}],
+            'block': BLOCK,
+            'hash': 'bb',
+            'difficulty': 100000000000000,
+        })
+        self.assertEqual(block.block.height, 27)
+        self.assertEqual(block['block']['height'], 27)
+        self.assertEqual(block.block.prev_block_hash,
+                         '0bf0ba3d0c2b8ddb9e7f87ab1d5a2c67')
+        self.assertEqual(block.block.transactions[0].fee, 3000000)
+        self.assertEqual(block.txes[0].tx.recipient,
+                         'TBCI2A67UQZAKCR6NS4JWAEICEIGEIM72G3MVW5S')
+
+    def test_node_collection(self):
+        node = {
+            'metaData': {'features': 1, 'application': None,
+                         'networkId': -104, 'version': '0.6.93-BETA',
+                         'platform': 'Oracle Corporation (1.8.0_40) on Linux'},
+            'endpoint': {'protocol': 'http', 'port': 7890,
+                         'host': '81.224.150.114'},
+            'identity': {'name': 'Alice', 'public-key': 'a1aa'},
+        }
+        collection = NodeCollection.from_json({'active': [node], 'busy': [],
+                                               'inactive': [], 'failure': []})
+        self.assertEqual(collection.active[0].endpoint.host, '81.224.150.114')
+        self.assertEqual(collection.active[0].identity.public_key, 'a1aa')
+        self.assertEqual(collection.busy, ())
+
+    def test_decode(self):
+        self.assertIsInstance(decode('account/get', ACCOUNT),
+                              AccountMetaDataPair)
+        pairs = decode('account/transfers/all', {'data': [TRANSFER]})
+        self.assertIsInstance(pairs[0], TransactionMetaDataPair)
+        self.assertEqual(decode('heartbeat', {'code': 1}), {'code': 1})
+        self.assertEqual(decode('account/importances', {'data': []}), [])
+
+    def test_decoded_client(self):
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/account/get', json=ACCOUNT)
+            m.post('mock://127.0.0.1:7890/block/at/public', json=BLOCK)
+            pair = self.client.account.get('TESTADDRESS')
+            self.assertIsInstance(pair, AccountMetaDataPair)
+            block = self.client.blockchain.at_public(27)
+            self.assertIsInstance(block, Block)
+
+    def test_decoded_client_error(self):
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/account/get', status_code=400)
+            with self.assertRaises(requests.HTTPError):
+                self.client.account.get('TESTADDRESS')
+
+    def test_decoded_iter_transfers(self):
+        client = Client(endpoint='http://127.0.0.1:7890', decoded=True)
+        with requests_mock.Mocker() as m:
+            m.get('http://127.0.0.1:7890/account/transfers/all',
+                  json={'data': [TRANSFER]})
+            pairs = list(client.account.iter_transfers_all('TESTADDRESS'))
+            self.assertIsInstance(pairs[0], TransactionMetaDataPair)
+            self.assertEqual(m.call_count, 1)
@@ -2,7 +2,7 @@ from unittest import TestCase
 
 import requests
 import requests_mock
-from nemnis import Client, Namespace
+from nemnis import Client, MosaicCatalogue, Namespace
 
 
 class TestNamespace(TestCase):
@@ -42,3 +42,136 @@ class TestNamespace(TestCase):
             self.assertEqual(resp.url,
                              'mock://127.0.0.1:7890/namespace/mosaic/' + part)
             self.assertEqual(resp.status_code, 200)
+
+
+class FakeNamespaces(object):
+    """
+    Paged namespace resources of NIS over lists of entries.
+    """
+
+    def __init__(self):
+        self.roots = []
+        self.subs = {}
+        self.mosaics = {}
+        self.calls = []
+        self.next_id = 1
+
+    def add_root(self, fqn):
+        self.roots.append({'meta': {'id': self.next_id},
+                           'namespace': {'fqn': fqn, 'owner': 'A'}})
+        self.next_id += 1
+
+    def add_sub(self, fqn, owner='A'):
+        self.subs.setdefault(owner, []).append(
+            {'fqn': fqn, 'owner': owner, 'height': 1})
+
+    def add_mosaic(self, fqn, name, supply=1):
+        self.mosaics.setdefault(fqn, []).append({
+            'meta': {'id': self.next_id},
+            'mosaic': {'id': {'namespaceId': fqn, 'name': name},
+                       'properties': [{'name': 'initialSupply',
+                                       'value': str(supply)}]}})
+        self.next_id += 1
+
+    @staticmethod
+    def _page(entries, params, size_key):
+        top = params.get('id')
+        entries = [e for e in reversed(entries)
+                   if top is None or e['meta']['id'] < int(top[0])]
+        return {'data': entries[:int(params[size_key][0])]}
+
+    def root_page(self, request, context):
+        self.calls.append(('root', request.qs.get('id')))
+        return self._page(self.roots, request.qs, 'pagesize')
+
+    def namespace_page(self, request, context):
+        parent = request.qs['parent'][0]
+        self.calls.append(('sub', parent))
+        # requests_mock lowercases query strings
+        owner = request.qs['address'][0].upper()
+        return {'data': [n for n in self.subs.get(owner, [])
+                         if n['fqn'].startswith(parent + '.')]
+                [:int(request.qs['pagesize'][0])]}
+
+    def mosaic_page(self, request, context):
+        fqn = request.qs['namespace'][0]
+        self.calls.append((fqn, request.qs.get('id')))
+        if fqn == 'broken':
+            context.status_code = 500
+            return {}
+        return self._page(self.mosaics.get(fqn, []), request.qs, 'pagesize')
+
+
+class TestMosaicCatalogue(TestCase):
+    def setUp(self):
+        # query params are only sent for http urls
+        self.client = Client(endpoint='http://127.0.0.1:7890', decoded=True)
+        self.nis = FakeNamespaces()
+        for i in range(150):
+            self.nis.add_root('root{0}'.format(i))
+        for i in range(120):
+            self.nis.add_mosaic('root0', 'm{0}'.format(i))
+        self.nis.add_mosaic('root7', 'token')
+
+    def _refresh(self, catalogue):
+        self.nis.calls = []
+        with requests_mock.Mocker() as m:
+            m.get('http://127.0.0.1:7890/namespace/root/page',
+                  json=self.nis.root_page)
+            m.get('http://127.0.0.1:7890/namespace/mosaic/definition/page',
+                  json=self.nis.mosaic_page)
+            m.get('http://127.0.0.1:7890/account/namespace/page',
+                  json=self.nis.namespace_page)
+            return catalogue.refresh()
+
+    def test_iter_roots(self):
+        with requests_mock.Mocker() as m:
+            m.get('http://127.0.0.1:7890/namespace/root/page',
+                  json=self.nis.root_page)
+            roots = list(self.client.namespace.iter_roots(since=100))
+            self.assertEqual(m.call_count, 1)
+        self.assertEqual([r['meta']['id'] for r in roots],
+                         list(range(150, 100, -1)))
+
+    def test_refresh(self):
+        catalogue = MosaicCatalogue(self.client, concurrency=4)
+        self.assertEqual(self._refresh(catalogue), 121)
+        self.assertEqual(len(catalogue.namespaces), 150)
+        self.assertEqual(len(catalogue.mosaics), 121)
+        self.assertEqual(len(self.nis.calls), 2 + 150 + 150 + 1)
+
+        self.nis.add_root('broken')
+        self.nis.add_mosaic('root7', 'token', supply=2)
+        self.nis.add_mosaic('root9', 'coin')
+        self.assertEqual(self._refresh(catalogue), 2)
+        self.assertEqual(len(self.nis.calls), 1 + 151 + 151)
+        self.assertEqual(list(catalogue.errors), ['broken'])
+        self.assertEqual(len(catalogue.mosaics), 122)
+        token = catalogue.mosaics['root7', 'token']
+        self.assertEqual(token.mosaic.properties[0]['value'], '2')
+
+    def test_sub_namespaces(self):
+        catalogue = MosaicCatalogue(self.client, concurrency=4)
+        self.nis.add_sub('root3.sub')
+        self.nis.add_sub('root3.sub.leaf')
+        self.nis.add_mosaic('root3.sub.leaf', 'gem')
+        self._refresh(catalogue)
+        self.assertEqual(len(catalogue.namespaces), 152)
+        self.assertEqual(catalogue.namespaces['root3.sub']['namespace'],
+                         {'fqn': 'root3.sub', 'owner': 'A', 'height': 1})
+        self.assertIn(('root3.sub.leaf', 'gem'), catalogue.mosaics)
+
+        self.nis.add_sub('root5.new')
+        self.nis.add_mosaic('root5.new', 'coin')
+        self.assertEqual(self._refresh(catalogue), 1)
+        self.assertIn(('root5.new', 'coin'), catalogue.mosaics)
+        self.assertEqual(len(self.nis.calls), 1 + 150 + 153)
+
+    def test_full_sub_namespace_page(self):
+        catalogue = MosaicCatalogue(self.client, concurrency=4)
+        for i in range(101):
+            self.nis.add_sub('root2.sub{0}'.format(i))
+        self._refresh(catalogue)
+        self.assertEqual(len(catalogue.namespaces), 250)
+        self.assertEqual(list(catalogue.errors), ['root2'])
+        self.assertIsInstance(catalogue.errors['root2'], ValueError)
@@ -0,0 +1,142 @@
+import threading
+import time
+from unittest import TestCase
+
+import requests
+import requests_mock
+from nemnis import EndpointPool, PooledClient
+
+NODES = ['mock://node-a:7890', 'mock://node-b:7890', 'mock://node-c:7890']
+
+
+class TestEndpointPool(TestCase):
+    def setUp(self):
+        self.pool = EndpointPool(NODES, max_lag=2)
+
+    def test_empty(self):
+        with self.assertRaises(ValueError):
+            EndpointPool([])
+
+    def test_ranked_by_latency(self):
+        self.pool.update(NODES[0], 0.3, 6, 100)
+        self.pool.update(NODES[1], 0.1, 6, 100)
+        self.pool.update(NODES[2], 0.2, 6, 99)
+        self.assertEqual(self.pool.ranked(), [NODES[1], NODES[2], NODES[0]])
+
+    def test_ranked_lagging_and_failed_last(self):
+        self.pool.update(NODES[0], 0.3, 6, 100)
+        self.pool.update(NODES[1], 0.1, 6, 97)
+        self.pool.update(NODES[2], 0.2, 6, 100)
+        self.pool.failed(NODES[2])
+        self.assertFalse(self.pool.in_sync(NODES[1]))
+        self.assertEqual(self.pool.ranked(), [NODES[0], NODES[1], NODES[2]])
+        self.pool.succeeded(NODES[2], 0.2)
+        self.assertEqual(self.pool.ranked()[0], NODES[2])
+
+    def test_ranked_not_serving(self):
+        self.pool.update(NODES[0], 0.1, 8, 100)
+        self.pool.update(NODES[1], 0.2, 6, 100)
+        self.assertEqual(self.pool.ranked()[0], NODES[1])
+
+    def test_latency_average(self):
+        self.pool.succeeded(NODES[0], 1.0)
+        self.pool.succeeded(NODES[0], 2.0)
+        self.assertAlmostEqual(self.pool.nodes[NODES[0]].latency, 1.3)
+
+    def test_due(self):
+        self.assertTrue(self.pool.due())
+        self.assertFalse(self.pool.due())
+
+    def test_add_remove(self):
+        self.pool.add('mock://node-d:7890')
+        self.pool.remove(NODES[0])
+        self.assertEqual(self.pool.endpoints,
+                         NODES[1:] + ['mock://node-d:7890'])
+
+    def test_update_add(self):
+        self.pool.update('mock://node-e:7890', 0.1, 8, 100, add=True)
+        self.pool.update('mock://node-f:7890', 0.1, 6, 100)
+        self.assertEqual(self.pool.endpoints, NODES)
+        self.pool.update('mock://node-e:7890', 0.1, 6, 100, add=True)
+        self.assertEqual(self.pool.endpoints, NODES + ['mock://node-e:7890'])
+        self.assertEqual(self.pool.nodes['mock://node-e:7890'].height, 100)
+
+
+class TestPooledClient(TestCase):
+    def setUp(self):
+        self.client = PooledClient(NODES[:2])
+
+    def mock_node(self, m, endpoint, code=6, height=100):
+        m.get(endpoint + '/status', json={'code': code})
+        m.get(endpoint + '/chain/height', json={'height': height})
+
+    def test_routes_to_in_sync_node(self):
+        with requests_mock.Mocker() as m:
+            self.mock_node(m, NODES[0], height=90)
+            self.mock_node(m, NODES[1])
+            m.get(NODES[1] + '/account/get', json={})
+            resp = self.client.account.get('TESTADDRESS')
+            self.assertEqual(resp.url, NODES[1] + '/account/get')
+            self.assertEqual(self.client.pool.height, 100)
+
+    def test_failover(self):
+        with requests_mock.Mocker() as m:
+            self.mock_node(m, NODES[0])
+            self.mock_node(m, NODES[1])
+            self.client.refresh()
+            first, second = self.client.pool.ranked()
+            m.get(first + '/account/get', exc=requests.ConnectTimeout)
+            m.get(second + '/account/get', json={})
+            resp = self.client.account.get('TESTADDRESS')
+            self.assertEqual(resp.url, second + '/account/get')
+            self.assertEqual(self.client.pool.ranked(), [second, first])
+
+    def test_server_error_on_all_nodes(self):
+        with requests_mock.Mocker() as m:
+            for endpoint in NODES[:2]:
+                self.mock_node(m, endpoint)
+                m.get(endpoint + '/account/get', status_code=503)
+            resp = self.client.account.get('TESTADDRESS')
+            self.assertEqual(resp.status_code, 503)
+            self.assertEqual(m.call_count, 6)
+
+    def test_writes_not_retried(self):
+        with requests_mock.Mocker() as m:
+            for endpoint in NODES[:2]:
+                self.mock_node(m, endpoint)
+                m.post(endpoint + '/transaction/announce',
+                       exc=requests.ConnectionError)
+            with self.assertRaises(requests.ConnectionError):
+                self.client.transaction.announce({'data': 'ff'})
+            self.assertEqual(m.call_count, 5)
+
+    def test_probe_failure(self):
+        with requests_mock.Mocker() as m:
+            m.get(NODES[0] + '/status', exc=requests.ConnectionError)
+            self.mock_node(m, NODES[1])
+            self.client.refresh()
+            self.assertEqual(self.client.pool.ranked(), [NODES[1], NODES[0]])
+
+    def test_background_refresh(self):
+        with requests_mock.Mocker() as m:
+            self.mock_node(m, NODES[0])
+            self.mock_node(m, NODES[1])
+            m.get(NODES[0] + '/account/get', json={})
+            m.get(NODES[1] + '/account/get', json={})
+            self.client.account.get('TESTADDRESS')
+            release = threading.Event()
+            waited = []
+
+            def probe(endpoint):
+                waited.append(release.wait(2))
+
+            self.client.probe = probe
+            self.client.pool._next_refresh = 0
+            # the call does not wait for the probes of the due refresh
+            self.client.account.get('TESTADDRESS')
+            release.set()
+            for _ in range(100):
+                if len(waited) == 2:
+                    break
+                time.sleep(0.01)
+            self.assertEqual(waited, [True, True])
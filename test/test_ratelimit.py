@@ -0,0 +1,56 @@
+from unittest import TestCase, mock
+
+import requests_mock
+from nemnis import Client, RateLimiter, TokenBucket
+
+
+class TestTokenBucket(TestCase):
+    def test_reserve(self):
+        with mock.patch('nemnis.ratelimit._clock', return_value=100):
+            bucket = TokenBucket(rate=2, burst=2)
+            self.assertEqual(bucket.reserve(), 0)
+            self.assertEqual(bucket.reserve(), 0)
+            # over the budget, calls are spread at the rate
+            self.assertEqual(bucket.reserve(), 0.5)
+            self.assertEqual(bucket.reserve(), 1.0)
+        with mock.patch('nemnis.ratelimit._clock', return_value=110):
+            self.assertEqual(bucket.reserve(), 0)
+            self.assertEqual(bucket.tokens, 1)
+
+    def test_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestRateLimiter(TestCase):
+    def setUp(self):
+        self.announce = TokenBucket(rate=1)
+        self.limiter = RateLimiter([
+            ('transaction/announce', self.announce),
+            ('account/*', (10, 20)),
+            ('local/chain/*', (5, 5)),
+        ])
+
+    def test_bucket(self):
+        self.assertIs(self.limiter.bucket('transaction/announce'),
+                      self.announce)
+        account = self.limiter.bucket('account/get/forwarded')
+        self.assertEqual((account.rate, account.burst), (10, 20))
+        self.assertIs(self.limiter.bucket('account/get'), account)
+        self.assertIsNone(self.limiter.bucket('chain/height'))
+        self.assertEqual(self.limiter.reserve('chain/height'), 0)
+
+    def test_client(self):
+        client = Client(endpoint='mock://127.0.0.1:7890',
+                        rate_limiter=RateLimiter([('chain/*', (1, 1))]))
+        with requests_mock.Mocker() as m, \
+                mock.patch('nemnis.client.time.sleep') as sleep:
+            m.get('mock://127.0.0.1:7890/chain/height', json={'height': 1})
+            m.get('mock://127.0.0.1:7890/heartbeat', json={'code': 1})
+            client.blockchain.height()
+            client.heartbeat()
+            self.assertFalse(sleep.called)
+            client.blockchain.height()
+            self.assertEqual(sleep.call_count, 1)
+            self.assertAlmostEqual(sleep.call_args[0][0], 1, places=2)
+            self.assertEqual(m.call_count, 3)
@@ -0,0 +1,122 @@
+import time
+from unittest import TestCase, mock
+
+import requests
+import requests_mock
+from nemnis import Client, PooledClient, RetryPolicy
+
+
+class TestRetryPolicy(TestCase):
+    def test_delay(self):
+        policy = RetryPolicy(backoff=0.1, max_backoff=1)
+        for attempt in range(10):
+            delay = policy.delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(1, 0.1 * 2 ** attempt))
+
+    def test_idempotent(self):
+        self.assertTrue(RetryPolicy.idempotent('GET', 'account/get'))
+        self.assertTrue(RetryPolicy.idempotent('POST', 'block/at/public'))
+        self.assertFalse(RetryPolicy.idempotent('POST',
+                                                'transaction/announce'))
+
+    def test_hedge_delay(self):
+        policy = RetryPolicy(hedge=True, hedge_samples=5)
+        for latency in range(1, 5):
+            policy.record('account/get', latency)
+        self.assertIsNone(policy.hedge_delay('account/get'))
+        for latency in range(5, 101):
+            policy.record('account/get', latency)
+        self.assertEqual(policy.hedge_delay('account/get'), 95)
+        self.assertIsNone(RetryPolicy().hedge_delay('account/get'))
+
+
+@mock.patch('nemnis.client.time.sleep')
+class TestClientRetry(TestCase):
+    def setUp(self):
+        self.client = Client(endpoint='mock://127.0.0.1:7890',
+                             retry_policy=RetryPolicy(attempts=3))
+
+    def test_retry_status(self, sleep):
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/chain/height',
+                  [{'status_code': 503}, {'status_code': 502},
+                   {'json': {'height': 1}}])
+            resp = self.client.blockchain.height()
+            self.assertEqual(resp.json(), {'height': 1})
+            self.assertEqual(sleep.call_count, 2)
+
+    def test_attempts(self, sleep):
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/chain/height',
+                  exc=requests.ConnectionError)
+            with self.assertRaises(requests.ConnectionError):
+                self.client.blockchain.height()
+            self.assertEqual(m.call_count, 3)
+
+    def test_announce_not_retried(self, sleep):
+        with requests_mock.Mocker() as m:
+            m.post('mock://127.0.0.1:7890/transaction/announce',
+                   exc=requests.ReadTimeout)
+            with self.assertRaises(requests.ReadTimeout):
+                self.client.transaction.announce({'data': 'ff'})
+            m.post('mock://127.0.0.1:7890/transaction/announce',
+                   status_code=503)
+            self.assertEqual(
+                self.client.transaction.announce({'data': 'ff'}).status_code,
+                503)
+            self.assertEqual(m.call_count, 2)
+
+    def test_announce_connect_timeout(self, sleep):
+        with requests_mock.Mocker() as m:
+            m.post('mock://127.0.0.1:7890/transaction/announce',
+                   [{'exc': requests.ConnectTimeout}, {'json': {}}])
+            self.client.transaction.announce({'data': 'ff'})
+            self.assertEqual(m.call_count, 2)
+
+
+class TestHedge(TestCase):
+    def setUp(self):
+        policy = RetryPolicy(hedge=True, hedge_samples=1)
+        policy.record('account/get', 0.05)
+        self.client = Client(endpoint='mock://127.0.0.1:7890',
+                             retry_policy=policy)
+
+    def route(self, stall):
+        # requests_mock serializes requests, so routing is stubbed
+        def route(method, name, params, payload, hedge=False, **kwds):
+            if not hedge:
+                time.sleep(stall)
+            response = requests.Response()
+            response.status_code = 200
+            response.reason = 'hedge' if hedge else 'first'
+            return response
+        return route
+
+    def test_hedge(self):
+        self.client._route = self.route(0.5)
+        start = time.time()
+        self.assertEqual(self.client.account.get('TESTADDRESS').reason,
+                         'hedge')
+        self.assertLess(time.time() - start, 0.4)
+
+    def test_no_hedge_when_fast(self):
+        self.client._route = self.route(0)
+        self.assertEqual(self.client.account.get('TESTADDRESS').reason,
+                         'first')
+
+    def test_not_hedged_writes(self):
+        self.client._route = self.route(0.1)
+        self.assertEqual(self.client.transaction.announce({}).reason,
+                         'first')
+
+    def test_pooled_hedge_endpoint(self):
+        nodes = ['mock://node-a:7890', 'mock://node-b:7890']
+        client = PooledClient(nodes)
+        client.pool.update(nodes[0], 0.01, 6, 100)
+        client.pool.update(nodes[1], 0.02, 6, 100)
+        client.pool.due()
+        with requests_mock.Mocker() as m:
+            m.get(nodes[1] + '/account/get', json={})
+            resp = client._route('GET', 'account/get', None, None, True)
+            self.assertEqual(resp.url, nodes[1] + '/account/get')
@@ -0,0 +1,124 @@
+import shutil
+import tempfile
+from unittest import TestCase
+
+import requests_mock
+from nemnis import BlockStore, Client
+from nemnis.models import Block
+
+
+def _block(height):
+    return {'block': {'height': height, 'transactions': [],
+                      'prevBlockHash': {'data': 'h{0}'.format(height - 1)}},
+            'hash': 'h{0}'.format(height), 'difficulty': 1, 'txes': []}
+
+
+def _blocks_after(request, context):
+    height = request.json()['height']
+    return {'data': [_block(h)
+                     for h in range(height + 1, min(height + 11, 101))]}
+
+
+class TestBlockStore(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = BlockStore(self.path, finality=20, segment_size=1024)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.path)
+
+    def test_finality(self):
+        self.store.put(_block(5))
+        self.assertNotIn(5, self.store)
+        self.store.observe(24)
+        self.assertNotIn(5, self.store)
+        self.store.observe(25)
+        self.assertEqual(self.store.get(5), _block(5))
+        self.store.put(_block(6))
+        self.assertNotIn(6, self.store)
+        self.store.observe(26)
+        self.assertIn(6, self.store)
+        self.assertIsNone(self.store.get(7))
+
+    def test_blocks_after(self):
+        self.store.observe(100)
+        for height in range(1, 15):
+            self.store.put(_block(height))
+        self.assertEqual(self.store.blocks_after(4),
+                         [_block(h) for h in range(5, 15)])
+        self.assertIsNone(self.store.blocks_after(5))
+
+    def test_reopen(self):
+        self.store.observe(100000)
+        for height in (1, 70000, 70001):
+            self.store.put(_block(height))
+        self.assertGreaterEqual(self.store.capacity, 70001)
+        self.store.close()
+        self.store = BlockStore(self.path, finality=20, segment_size=1024)
+        self.assertEqual(self.store.tip, 100000)
+        self.assertEqual(self.store.get(70000), _block(70000))
+        self.store.put(_block(2))
+        self.assertEqual(self.store.get(2), _block(2))
+
+    def test_first(self):
+        self.assertEqual(self.store.first, 0)
+        self.store.observe(100000)
+        for height in (70001, 70000):
+            self.store.put(_block(height))
+        self.assertEqual(self.store.first, 70000)
+        self.store.close()
+        self.store = BlockStore(self.path, finality=20, segment_size=1024)
+        self.assertEqual(self.store.first, 70000)
+        self.store.put(_block(3))
+        self.assertEqual(self.store.first, 3)
+
+    def test_segments(self):
+        self.store.observe(100)
+        for height in range(1, 51):
+            self.store.put(_block(height))
+        self.assertEqual([self.store.get(h) for h in range(1, 51)],
+                         [_block(h) for h in range(1, 51)])
+        self.assertGreater(self.store._segment, 1)
+
+    def test_client(self):
+        client = Client(endpoint='mock://127.0.0.1:7890', decoded=True,
+                        block_store=self.store)
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/chain/height', json={'height': 100})
+            m.post('mock://127.0.0.1:7890/local/chain/blocks-after',
+                   json=_blocks_after)
+            blocks = list(client.blockchain.iter_blocks(2, 100))
+            self.assertEqual(m.call_count, 11)
+            self.assertIn(80, self.store)
+            self.assertNotIn(81, self.store)
+            again = list(client.blockchain.iter_blocks(2, 100))
+            self.assertEqual(m.call_count, 15)
+        self.assertEqual([b.hash for b in again], [b.hash for b in blocks])
+        block = client.blockchain.at_public(50)
+        self.assertIsInstance(block, Block)
+        self.assertEqual(block.height, 50)
+
+    def test_historical_range(self):
+        client = Client(endpoint='mock://127.0.0.1:7890',
+                        block_store=self.store)
+        with requests_mock.Mocker() as m:
+            m.get('mock://127.0.0.1:7890/chain/height', json={'height': 5000})
+            m.post('mock://127.0.0.1:7890/local/chain/blocks-after',
+                   json=_blocks_after)
+            self.assertEqual(len(list(client.blockchain.iter_blocks(2, 100))),
+                             99)
+        self.assertEqual(self.store.tip, 5000)
+        self.assertIn(100, self.store)
+
+    def test_raw_client(self):
+        client = Client(endpoint='mock://127.0.0.1:7890',
+                        block_store=self.store)
+        with requests_mock.Mocker() as m:
+            m.post('mock://127.0.0.1:7890/local/chain/blocks-after',
+                   json=_blocks_after)
+            list(client.blockchain.iter_blocks(2, 100, tip=100))
+            blocks = list(client.blockchain.iter_blocks(2, 71, tip=100))
+            self.assertEqual(m.call_count, 10)
+        self.assertEqual([b['block']['height'] for b in blocks],
+                         list(range(2, 72)))